@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+"""
+Benchmark for PDF Splitter CLI
+Measures wall-clock time and peak memory of split_pdf_by_chunks under
+different memory-management settings, times the pypdf, pdftk and qpdf
+paths over a synthetic PDF corpus, and tracks CLI startup time
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import subprocess
+import tempfile
+from pathlib import Path
+
+# Each configuration runs in a fresh interpreter so peak RSS is not shared
+CHILD_SCRIPT = """
+import json, os, sys, time
+import main
+
+input_pdf, output_folder, pages_per_chunk, method, kwargs = (
+    sys.argv[1], sys.argv[2], int(sys.argv[3]), sys.argv[4], json.loads(sys.argv[5]))
+basename = os.path.splitext(os.path.basename(input_pdf))[0]
+start = time.perf_counter()
+if method == "pdftk":
+    main.split_with_pdftk(input_pdf, pages_per_chunk, output_folder, basename, show_progress=False)
+elif method == "qpdf":
+    main.split_with_qpdf(input_pdf, pages_per_chunk, output_folder, basename, show_progress=False)
+else:
+    main.split_pdf_by_chunks(input_pdf, pages_per_chunk, output_folder, show_progress=False, **kwargs)
+elapsed = time.perf_counter() - start
+
+try:
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+except ImportError:
+    peak_mb = None
+
+chunks = [os.path.join(output_folder, name) for name in os.listdir(output_folder) if name.endswith(".pdf")]
+print(json.dumps({"seconds": elapsed, "peak_rss_mb": peak_mb, "chunks": len(chunks),
+                  "output_bytes": sum(os.path.getsize(path) for path in chunks)}))
+"""
+
+# (label, keyword arguments for split_pdf_by_chunks)
+MEMORY_CONFIGS = [
+    ("gc.collect() every chunk", {"gc_alloc_blocks": 0}),
+    ("memory guard (default)", {}),
+    ("memory guard, RSS limit 150MB", {"gc_rss_mb": 150, "gc_alloc_blocks": None}),
+]
+
+# Split paths timed by the corpus suite; external tools are skipped when not installed
+METHODS = ("pypdf", "pdftk", "qpdf")
+
+# Nesting depth of the page tree in the deep-tree corpus
+DEEP_TREE_DEPTH = 64
+
+# Commands timed by the startup suite, as arguments to the Python interpreter.
+# They run main() the way the installed pdf-splitter script does; "python
+# main.py" would also compile the whole module on every run.
+CLI_ENTRY = ["-c", "from main import main; main()"]
+STARTUP_COMMANDS = {
+    "import main": ["-c", "import main"],
+    "--help": CLI_ENTRY + ["--help"],
+    "split 5 pages": CLI_ENTRY + ["{input}", "-p", "1", "-o", "{output}", "--no-progress"],
+}
+
+def generate_pdf(path, pages):
+    """Generate a synthetic text-only PDF with the given number of pages."""
+    from pypdf import PdfWriter
+    from pypdf.generic import DecodedStreamObject, NameObject
+
+    writer = PdfWriter()
+    for number in range(1, pages + 1):
+        page = writer.add_blank_page(612, 792)
+        content = DecodedStreamObject()
+        content.set_data(f"BT /F1 24 Tf 72 700 Td (Page {number}) Tj ET".encode())
+        page[NameObject("/Contents")] = writer._add_object(content)
+    with open(path, "wb") as output_pdf:
+        writer.write(output_pdf)
+
+def generate_image_pdf(path, pages, size=160):
+    """Generate a PDF with a distinct, incompressible RGB image on every page."""
+    from pypdf import PdfWriter
+    from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject, NumberObject
+
+    writer = PdfWriter()
+    for _ in range(pages):
+        page = writer.add_blank_page(612, 792)
+        image = DecodedStreamObject()
+        image.set_data(os.urandom(size * size * 3))
+        image.update({
+            NameObject("/Type"): NameObject("/XObject"),
+            NameObject("/Subtype"): NameObject("/Image"),
+            NameObject("/Width"): NumberObject(size),
+            NameObject("/Height"): NumberObject(size),
+            NameObject("/ColorSpace"): NameObject("/DeviceRGB"),
+            NameObject("/BitsPerComponent"): NumberObject(8),
+        })
+        page[NameObject("/Resources")] = DictionaryObject({
+            NameObject("/XObject"): DictionaryObject({NameObject("/Im0"): writer._add_object(image)})
+        })
+        content = DecodedStreamObject()
+        content.set_data(b"q 612 0 0 792 0 0 cm /Im0 Do Q")
+        page[NameObject("/Contents")] = writer._add_object(content)
+    with open(path, "wb") as output_pdf:
+        writer.write(output_pdf)
+
+def generate_shared_font_pdf(path, pages, font_kb=300):
+    """Generate a PDF whose pages all reference one large embedded font."""
+    from pypdf import PdfWriter
+    from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+    writer = PdfWriter()
+    font_file = DecodedStreamObject()
+    font_file.set_data(os.urandom(font_kb * 1024))
+    font = writer._add_object(DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica"),
+        NameObject("/FontFile"): writer._add_object(font_file),
+    }))
+    for number in range(1, pages + 1):
+        page = writer.add_blank_page(612, 792)
+        page[NameObject("/Resources")] = DictionaryObject({
+            NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})
+        })
+        content = DecodedStreamObject()
+        content.set_data(f"BT /F1 24 Tf 72 700 Td (Page {number}) Tj ET".encode())
+        page[NameObject("/Contents")] = writer._add_object(content)
+    with open(path, "wb") as output_pdf:
+        writer.write(output_pdf)
+
+def write_raw_pdf(path, objects, corrupt_xref=False):
+    """
+    Write objects ({number: body bytes}, catalog as object 1) with a classic
+    xref table. With corrupt_xref every offset is wrong, so readers have to
+    rebuild the table by scanning the file.
+    """
+    output = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = {}
+    for number in sorted(objects):
+        offsets[number] = len(output)
+        output += f"{number} 0 obj\n".encode() + objects[number] + b"\nendobj\n"
+
+    size = max(objects) + 1
+    xref_offset = len(output)
+    output += f"xref\n0 {size}\n0000000000 65535 f \n".encode()
+    for number in range(1, size):
+        offset = offsets.get(number, 0) + (7 if corrupt_xref else 0)
+        output += f"{offset:010d} 00000 {'n' if number in offsets else 'f'} \n".encode()
+    output += f"trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode()
+    with open(path, "wb") as output_pdf:
+        output_pdf.write(output)
+
+def page_tree_objects(pages, depth=1):
+    """
+    Return objects for a text PDF whose page tree is a chain of depth /Pages
+    nodes, each holding a share of the pages and the next node. /Resources
+    and /MediaBox are inherited from the root.
+    """
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    }
+    depth = max(1, min(depth, pages))
+    nodes = [2] + list(range(4, 4 + depth - 1))
+    next_number = 4 + depth - 1
+    per_node = -(-pages // depth)
+
+    for level, node in enumerate(nodes):
+        kids = []
+        first = level * per_node
+        for number in range(first + 1, min(first + per_node, pages) + 1):
+            content = f"BT /F1 24 Tf 72 700 Td (Page {number}) Tj ET".encode()
+            objects[next_number] = b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream"
+            objects[next_number + 1] = f"<< /Type /Page /Parent {node} 0 R /Contents {next_number} 0 R >>".encode()
+            kids.append(f"{next_number + 1} 0 R")
+            next_number += 2
+        if level + 1 < len(nodes):
+            kids.append(f"{nodes[level + 1]} 0 R")
+        count = pages - min(first, pages)
+        parent = f" /Parent {nodes[level - 1]} 0 R" if level else ""
+        inherited = " /Resources << /Font << /F1 3 0 R >> >> /MediaBox [0 0 612 792]" if level == 0 else ""
+        objects[node] = f"<< /Type /Pages{parent} /Kids [{' '.join(kids)}] /Count {count}{inherited} >>".encode()
+    return objects
+
+def generate_deep_tree_pdf(path, pages):
+    """Generate a text PDF with a page tree DEEP_TREE_DEPTH levels deep."""
+    write_raw_pdf(path, page_tree_objects(pages, DEEP_TREE_DEPTH))
+
+def generate_malformed_xref_pdf(path, pages):
+    """Generate a text PDF whose xref table points at the wrong offsets."""
+    write_raw_pdf(path, page_tree_objects(pages), corrupt_xref=True)
+
+# Corpus kind -> generator(path, pages)
+CORPUS = {
+    "text": generate_pdf,
+    "image-heavy": generate_image_pdf,
+    "shared-font": generate_shared_font_pdf,
+    "deep-tree": generate_deep_tree_pdf,
+    "malformed-xref": generate_malformed_xref_pdf,
+}
+
+def run_config(input_pdf, pages_per_chunk, kwargs, method="pypdf"):
+    """Split input_pdf in a child process and return its timing, memory and output size."""
+    with tempfile.TemporaryDirectory() as output_folder:
+        result = subprocess.run(
+            [sys.executable, "-c", CHILD_SCRIPT, input_pdf, output_folder,
+             str(pages_per_chunk), method, json.dumps(kwargs)],
+            cwd=Path(__file__).parent, capture_output=True, text=True, check=True,
+        )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def environment():
+    """Describe the interpreter and library versions, so result files can be compared."""
+    from importlib.metadata import version
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pypdf": version("pypdf"),
+        "click": version("click"),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+def run_memory_suite(args):
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        input_pdf = os.path.join(work_dir, "synthetic.pdf")
+        print(f"📄 Generating synthetic PDF with {args.pages} pages...", file=sys.stderr)
+        generate_pdf(input_pdf, args.pages)
+
+        for label, kwargs in MEMORY_CONFIGS:
+            print(f"⏱️  Running: {label}", file=sys.stderr)
+            measurement = run_config(input_pdf, args.pages_per_chunk[0], kwargs)
+            results.append({"config": label, "options": kwargs, **measurement})
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"\n{'Configuration':<32} {'Time (s)':>10} {'Peak RSS (MB)':>15}")
+    for row in results:
+        peak = f"{row['peak_rss_mb']:.1f}" if row["peak_rss_mb"] is not None else "n/a"
+        print(f"{row['config']:<32} {row['seconds']:>10.2f} {peak:>15}")
+
+def run_corpus_suite(args):
+    """Time every method on every corpus kind for each -p value."""
+    import shutil
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        corpus_dir = args.corpus_dir or work_dir
+        os.makedirs(corpus_dir, exist_ok=True)
+        for kind in args.kinds:
+            input_pdf = os.path.join(corpus_dir, f"{kind}-{args.pages}.pdf")
+            if not os.path.exists(input_pdf):
+                print(f"📄 Generating {kind} PDF with {args.pages} pages...", file=sys.stderr)
+                CORPUS[kind](input_pdf, args.pages)
+
+            for method in args.methods:
+                for pages_per_chunk in args.pages_per_chunk:
+                    row = {"corpus": kind, "pages": args.pages, "input_bytes": os.path.getsize(input_pdf),
+                           "method": method, "pages_per_chunk": pages_per_chunk}
+                    if method != "pypdf" and shutil.which(method) is None:
+                        results.append({**row, "skipped": f"{method} not installed"})
+                        continue
+                    print(f"⏱️  Running: {kind}, {method}, -p {pages_per_chunk}", file=sys.stderr)
+                    try:
+                        measurement = run_config(input_pdf, pages_per_chunk, {}, method)
+                    except subprocess.CalledProcessError as e:
+                        error_lines = (e.stderr or e.stdout or "").strip().splitlines()
+                        results.append({**row, "error": error_lines[-1] if error_lines else str(e)})
+                        continue
+                    measurement["pages_per_second"] = args.pages / measurement["seconds"]
+                    results.append({**row, **measurement})
+
+    report = {"environment": environment(), "results": results}
+    if args.output:
+        with open(args.output, "w") as report_file:
+            json.dump(report, report_file, indent=2)
+        print(f"📊 Results written to {args.output}", file=sys.stderr)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_corpus_table(results)
+    if args.compare:
+        compare_results(args.compare, results)
+
+def print_corpus_table(results):
+    print(f"\n{'Corpus':<16} {'Method':<7} {'-p':>5} {'Time (s)':>10} {'Pages/s':>10} {'Peak RSS (MB)':>15} {'Output (MB)':>12}")
+    for row in results:
+        prefix = f"{row['corpus']:<16} {row['method']:<7} {row['pages_per_chunk']:>5}"
+        if "seconds" not in row:
+            print(f"{prefix} {row.get('skipped') or 'error: ' + row['error']}")
+            continue
+        peak = f"{row['peak_rss_mb']:.1f}" if row["peak_rss_mb"] is not None else "n/a"
+        print(f"{prefix} {row['seconds']:>10.2f} {row['pages_per_second']:>10.0f} {peak:>15} "
+              f"{row['output_bytes'] / (1024 * 1024):>12.1f}")
+
+def compare_results(baseline_path, results):
+    """Print the change in wall time and peak RSS against an earlier results file."""
+    with open(baseline_path) as baseline_file:
+        baseline = {(row["corpus"], row["method"], row["pages_per_chunk"]): row
+                    for row in json.load(baseline_file)["results"] if "seconds" in row}
+
+    print(f"\nCompared with {baseline_path}:")
+    print(f"{'Corpus':<16} {'Method':<7} {'-p':>5} {'Time':>10} {'Peak RSS':>10}")
+    for row in results:
+        before = baseline.get((row["corpus"], row["method"], row["pages_per_chunk"]))
+        if before is None or "seconds" not in row:
+            continue
+        time_change = (row["seconds"] / before["seconds"] - 1) * 100
+        rss_change = ((row["peak_rss_mb"] / before["peak_rss_mb"] - 1) * 100
+                      if row["peak_rss_mb"] and before["peak_rss_mb"] else None)
+        rss = f"{rss_change:+.1f}%" if rss_change is not None else "n/a"
+        print(f"{row['corpus']:<16} {row['method']:<7} {row['pages_per_chunk']:>5} {time_change:>+9.1f}% {rss:>10}")
+
+def import_times(top=10):
+    """
+    Return the cumulative -X importtime of main in microseconds and the top
+    modules by their own import time, as [(module, self_us, cumulative_us)].
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                            cwd=Path(__file__).parent, capture_output=True, text=True, check=True)
+    modules = []
+    total = None
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if not self_us.isdigit():
+            continue
+        modules.append((name, int(self_us), int(cumulative_us)))
+        if name == "main":
+            total = int(cumulative_us)
+    modules.sort(key=lambda module: module[1], reverse=True)
+    return total, modules[:top]
+
+def time_command(argv, runs):
+    """Run argv runs times and return (median, fastest) wall-clock seconds."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(argv, cwd=Path(__file__).parent, capture_output=True, check=True)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return times[len(times) // 2], times[0]
+
+def run_startup_suite(args):
+    """Time importing main, --help and a tiny split, and break down the imports."""
+    import py_compile
+
+    # Time an installed CLI, not compiling main.py (PYTHONDONTWRITEBYTECODE would redo it every run)
+    py_compile.compile(str(Path(__file__).parent / "main.py"), doraise=True)
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        input_pdf = os.path.join(work_dir, "tiny.pdf")
+        generate_pdf(input_pdf, 5)
+        commands = [(label, [sys.executable] + command) for label, command in STARTUP_COMMANDS.items()]
+        if args.executable:
+            commands.append((f"{os.path.basename(args.executable)} --help", [args.executable, "--help"]))
+        for label, argv in commands:
+            print(f"⏱️  Running: {label} ({args.runs} times)", file=sys.stderr)
+            argv = [arg.format(input=input_pdf, output=os.path.join(work_dir, "chunks")) for arg in argv]
+            median, fastest = time_command(argv, args.runs)
+            results.append({"command": label, "median_seconds": median, "min_seconds": fastest})
+
+    total_us, top_modules = import_times()
+    report = {
+        "environment": environment(),
+        "results": results,
+        "import_main_us": total_us,
+        "top_imports": [{"module": name, "self_us": self_us, "cumulative_us": cumulative_us}
+                        for name, self_us, cumulative_us in top_modules],
+    }
+    if args.output:
+        with open(args.output, "w") as report_file:
+            json.dump(report, report_file, indent=2)
+        print(f"📊 Results written to {args.output}", file=sys.stderr)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"\n{'Command':<32} {'Median (ms)':>12} {'Min (ms)':>10}")
+        for row in results:
+            print(f"{row['command']:<32} {row['median_seconds'] * 1000:>12.1f} {row['min_seconds'] * 1000:>10.1f}")
+        print(f"\n-X importtime of main: {total_us / 1000:.1f}ms; slowest modules (self time):")
+        for name, self_us, cumulative_us in top_modules:
+            print(f"  {name:<40} {self_us / 1000:>8.1f}ms {cumulative_us / 1000:>8.1f}ms cumulative")
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = {row["command"]: row for row in json.load(baseline_file)["results"]}
+        print(f"\nCompared with {args.compare}:")
+        for row in results:
+            before = baseline.get(row["command"])
+            if before is not None:
+                change = (row["median_seconds"] / before["median_seconds"] - 1) * 100
+                print(f"{row['command']:<32} {change:>+9.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark split_pdf_by_chunks and the external-tool fallbacks")
+    parser.add_argument("--suite", choices=("memory", "corpus", "startup"), default="memory",
+                        help="memory: compare memory strategies on one PDF; corpus: time every split "
+                             "method on the synthetic corpus; startup: time CLI startup and imports "
+                             "(default: memory)")
+    parser.add_argument("--pages", type=int, default=2000, help="Pages in each synthetic PDF (default: 2000)")
+    parser.add_argument("-p", "--pages-per-chunk", type=int, action="append",
+                        help="Pages per chunk; repeat for several values (default: 1, or 1, 10 and 100 for corpus)")
+    parser.add_argument("--kinds", nargs="+", choices=list(CORPUS), default=list(CORPUS),
+                        help="Corpus kinds to run (default: all)")
+    parser.add_argument("--methods", nargs="+", choices=METHODS, default=list(METHODS),
+                        help="Split methods to time (default: all)")
+    parser.add_argument("--corpus-dir", help="Keep generated PDFs in this directory and reuse them")
+    parser.add_argument("--runs", type=int, default=20, help="Runs of each startup command (default: 20)")
+    parser.add_argument("--executable", help="Also time --help of a built executable in the startup suite")
+    parser.add_argument("-o", "--output", help="Write corpus or startup results as JSON to this file")
+    parser.add_argument("--compare", metavar="BASELINE",
+                        help="Compare corpus or startup results with an earlier JSON file")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    if args.suite == "startup":
+        run_startup_suite(args)
+    elif args.suite == "corpus":
+        args.pages_per_chunk = args.pages_per_chunk or [1, 10, 100]
+        run_corpus_suite(args)
+    else:
+        args.pages_per_chunk = args.pages_per_chunk or [1]
+        run_memory_suite(args)
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,15 @@
 """
 Cross-platform executable builder for PDF Splitter CLI
 Creates standalone executables for Windows, macOS, and Linux
+
+Usage:
+    python build_executables.py            # single-file executable
+    python build_executables.py --onedir   # folder build, faster to start
 """
 
 import os
 import sys
+import argparse
 import subprocess
 import platform
 import shutil
@@ -80,9 +85,20 @@ def get_platform_info():
     else:
         return system, "bin"
 
-def build_executable(platform_name, extension):
-    """Build executable for the current platform."""
-    print(f"🔨 Building executable for {platform_name}...")
+def directory_size_mb(path):
+    """Total size of the files under path in MB."""
+    return sum(file.stat().st_size for file in Path(path).rglob("*") if file.is_file()) / (1024 * 1024)
+
+def build_executable(platform_name, extension, onedir=False):
+    """
+    Build executable for the current platform.
+
+    A --onefile executable unpacks the whole bundle to a temporary folder
+    on every run, which dominates the run time of short jobs. With onedir
+    the bundle is left unpacked in dist/pdf-splitter/, so each invocation
+    starts as fast as the interpreter and imports allow.
+    """
+    print(f"🔨 Building {'onedir' if onedir else 'onefile'} executable for {platform_name}...")
     
     # Determine output name
     if platform_name == "windows":
@@ -95,7 +111,7 @@ def build_executable(platform_name, extension):
     # PyInstaller command
     cmd = [
         "uv", "run", "pyinstaller",
-        "--onefile",
+        "--onedir" if onedir else "--onefile",
         "--name", "pdf-splitter",
         "--console",
         "main.py"
@@ -108,9 +124,9 @@ def build_executable(platform_name, extension):
     run_command(cmd, f"Building {platform_name} executable")
     
     # Check if executable was created
-    dist_path = Path("dist") / output_name
+    dist_path = Path("dist") / "pdf-splitter" / output_name if onedir else Path("dist") / output_name
     if dist_path.exists():
-        size_mb = dist_path.stat().st_size / (1024 * 1024)
+        size_mb = directory_size_mb(dist_path.parent) if onedir else dist_path.stat().st_size / (1024 * 1024)
         print(f"✅ Executable created: {dist_path} ({size_mb:.1f} MB)")
         return dist_path
     else:
@@ -137,17 +153,27 @@ def test_executable(executable_path):
         print(f"❌ Executable test failed: {e}")
         return False
 
-def create_release_package(executable_path, platform_name):
-    """Create a release package with the executable."""
+def create_release_package(executable_path, platform_name, onedir=False):
+    """Create a release package with the executable (and, for onedir builds, its folder)."""
     print(f"📦 Creating release package for {platform_name}...")
     
     # Create release directory
-    release_dir = Path("release") / platform_name
+    release_dir = Path("release") / (f"{platform_name}-onedir" if onedir else platform_name)
     release_dir.mkdir(parents=True, exist_ok=True)
     
     # Copy executable
-    dest_path = release_dir / executable_path.name
-    shutil.copy2(executable_path, dest_path)
+    if onedir:
+        bundle_dir = release_dir / executable_path.parent.name
+        if bundle_dir.exists():
+            shutil.rmtree(bundle_dir)
+        shutil.copytree(executable_path.parent, bundle_dir)
+        size_mb = directory_size_mb(bundle_dir)
+        run_path = f"{bundle_dir.name}/{executable_path.name}"
+    else:
+        dest_path = release_dir / executable_path.name
+        shutil.copy2(executable_path, dest_path)
+        size_mb = dest_path.stat().st_size / (1024 * 1024)
+        run_path = executable_path.name
     
     # Create README for the release
     readme_content = f"""# PDF Splitter CLI - {platform_name.title()} Release
@@ -160,22 +186,22 @@ def create_release_package(executable_path, platform_name):
 
 ```bash
 # Show help
-./{executable_path.name} --help
+./{run_path} --help
 
 # Split a PDF into 5-page chunks (default)
-./{executable_path.name} document.pdf
+./{run_path} document.pdf
 
 # Split into 10-page chunks
-./{executable_path.name} document.pdf -p 10
+./{run_path} document.pdf -p 10
 
 # Split into custom output folder
-./{executable_path.name} document.pdf -o my_output
+./{run_path} document.pdf -o my_output
 ```
 
 ## Features
 
 - ✅ No Python installation required
-- ✅ Standalone executable
+- ✅ Standalone executable{" (keep the whole pdf-splitter folder together)" if onedir else ""}
 - ✅ Progress bars with ETA
 - ✅ Automatic output file naming
 - ✅ Handles large PDF files
@@ -183,7 +209,7 @@ def create_release_package(executable_path, platform_name):
 
 ## File Size
 
-Executable size: {dest_path.stat().st_size / (1024 * 1024):.1f} MB
+{"Folder" if onedir else "Executable"} size: {size_mb:.1f} MB
 
 ## Support
 
@@ -198,6 +224,12 @@ For issues and updates, visit: https://github.com/jmxt3/pdf-splitter
 
 def main():
     """Main build process."""
+    parser = argparse.ArgumentParser(description="Build the pdf-splitter executable with PyInstaller")
+    parser.add_argument("--onedir", action="store_true",
+                        help="Build an unpacked folder instead of a single file; starts much faster "
+                             "when the CLI is run many times, e.g. from scripts")
+    args = parser.parse_args()
+
     print("🚀 PDF Splitter CLI - Executable Builder")
     print("=" * 50)
     
@@ -212,12 +244,12 @@ def main():
     print(f"🖥️  Building for platform: {platform_name}")
     
     # Build executable
-    executable_path = build_executable(platform_name, extension)
+    executable_path = build_executable(platform_name, extension, args.onedir)
     
     # Test executable
     if test_executable(executable_path):
         # Create release package
-        release_dir = create_release_package(executable_path, platform_name)
+        release_dir = create_release_package(executable_path, platform_name, args.onedir)
         
         print("\n🎉 Build completed successfully!")
         print(f"📁 Executable: {executable_path}")
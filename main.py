@@ -1,399 +1,4312 @@
-from pypdf import PdfReader, PdfWriter
 import os
 import sys
+import io
+import re
+import mmap
+import functools
 import click
-import subprocess
-import shutil
-import tempfile
-import glob
+import gc
+import time
+import json
+import contextlib
+import threading
+import stat
+import struct
+import uuid
+import hashlib
+import array
 
+# Modules only some paths need (pypdf, subprocess, tempfile, zipfile, http.server, ...)
+# are imported where they are used, so that --help and small jobs start quickly
+
+# Default growth in interpreter-allocated blocks that triggers a full collection
+DEFAULT_GC_ALLOC_BLOCKS = 1_000_000
+
+# Inputs larger than this are considered large: a warning is shown and,
+# unless told otherwise, they are read through a memory map
+LARGE_FILE_MB = 100
+
+# Size the split cache is trimmed back to after each run
+DEFAULT_CACHE_MAX_MB = 2048
+
+# With -j and an archive, chunks per worker that may be running or waiting
+# for an earlier chunk before no more are started
+ARCHIVE_REORDER_WINDOW = 4
+
+# pypdf is most of the CLI's startup time, so these names are bound by
+# _import_pypdf() when a PDF is first read or written, not at import
+PageObject = PdfReader = PdfWriter = None
+ArrayObject = DictionaryObject = IndirectObject = NameObject = StreamObject = None
+
+class SplitError(Exception):
+    """Base class of the errors raised for a split that cannot be done."""
+
+class PdfReadError(SplitError):
+    """The input could not be read as a PDF."""
+
+class EncryptedPdfError(PdfReadError):
+    """The input is encrypted with a password other than the empty one."""
+
+class PageRangeError(SplitError, ValueError):
+    """A page range is malformed or outside the document."""
+
+class OptionError(SplitError, ValueError):
+    """An option has a value it does not accept, or options that cannot be combined were given."""
+
+class ChunkError(SplitError):
+    """One chunk could not be written; chunk_index and page_range say which."""
+
+    def __init__(self, message, chunk_index=None, page_range=None):
+        super().__init__(message)
+        self.chunk_index = chunk_index
+        self.page_range = page_range
+
+def _import_pypdf():
+    """Import pypdf and bind the names above; called by every entry point that handles PDF objects."""
+    global PageObject, PdfReader, PdfWriter, ArrayObject, DictionaryObject, IndirectObject, NameObject, StreamObject
+    # StreamObject is bound last, so other threads never see a partial import
+    if StreamObject is not None:
+        return
+    from pypdf import PageObject, PdfReader, PdfWriter
+    from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject, StreamObject
+
+@functools.lru_cache(maxsize=None)
 def check_external_tool(tool_name):
-    """Check if an external tool is available in the system PATH."""
+    """Check if an external tool is available in the system PATH (looked up once per process)."""
+    import shutil
     return shutil.which(tool_name) is not None
 
-def split_with_pdftk(input_pdf_path, pages_per_chunk, output_folder, input_basename, show_progress=True):
-    """Split PDF using pdftk as fallback method."""
-    click.echo("🔧 Attempting to split using pdftk...")
+def _run_pdftk_chunk(input_pdf_path, start_page, end_page, output_filename):
+    """Write pages start_page..end_page (1-based, inclusive) of the input with pdftk cat."""
+    import subprocess
+    result = subprocess.run([
+        'pdftk', input_pdf_path, 'cat', f'{start_page}-{end_page}', 'output', output_filename
+    ], capture_output=True, text=True)
+    return result.returncode, result.stderr
+
+def _report_chunk_warnings(tool_name, chunk_stderr):
+    """Echo what tool_name printed for each chunk number, in chunk order."""
+    for chunk_number, stderr in sorted(chunk_stderr.items()):
+        if stderr.strip():
+            click.echo(f"⚠️  {tool_name} warnings on chunk {chunk_number}: {stderr.strip()}", err=True)
+
+def split_with_pdftk(input_pdf_path, pages_per_chunk, output_folder, input_basename, show_progress=True, jobs=1):
+    """
+    Split PDF using pdftk as fallback method.
+
+    Each chunk is cut straight from the input with 'pdftk input cat a-b', so
+    no burst into per-page files is needed. Up to jobs pdftk processes run at
+    the same time; the first failing chunk stops the split with its stderr,
+    and what pdftk printed for the other chunks is reported as warnings.
+    """
+    import subprocess
+    click.echo("🔧 Attempting to split using pdftk...")
+
+    if not check_external_tool('pdftk'):
+        raise Exception("pdftk is not installed. Install with: brew install pdftk-java (macOS) or sudo apt install pdftk (Linux)")
+
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    try:
+        # Read the page count so chunks can be cut as page ranges
+        result = subprocess.run(['pdftk', input_pdf_path, 'dump_data'],
+                                capture_output=True, text=True, check=True)
+    except subprocess.CalledProcessError as e:
+        raise Exception(f"pdftk failed: {e.stderr}")
+
+    match = re.search(r'^NumberOfPages:\s*(\d+)', result.stdout, re.MULTILINE)
+    if match is None:
+        raise Exception("pdftk failed: could not determine the number of pages")
+    total_pages = int(match.group(1))
+    total_chunks = (total_pages + pages_per_chunk - 1) // pages_per_chunk
+    click.echo(f"📄 Splitting {total_pages} pages into {total_chunks} chunks with pdftk ({jobs} at a time)...")
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {}
+        for chunk_number, i in enumerate(range(0, total_pages, pages_per_chunk), start=1):
+            end_page = min(i + pages_per_chunk, total_pages)
+            output_filename = os.path.join(output_folder, f"{input_basename}_{chunk_number}.pdf")
+            future = executor.submit(_run_pdftk_chunk, input_pdf_path, i + 1, end_page, output_filename)
+            futures[future] = (chunk_number, end_page - i, output_filename)
+
+        chunk_stderr = {}
+
+        def check(future):
+            chunk_number, page_count, output_filename = futures[future]
+            returncode, stderr = future.result()
+            if returncode != 0:
+                # Stop scheduling further chunks; running ones finish on their own
+                for pending in futures:
+                    pending.cancel()
+                _report_chunk_warnings("pdftk", chunk_stderr)
+                raise Exception(f"pdftk failed on chunk {chunk_number}: {stderr.strip() or f'exit status {returncode}'}")
+            chunk_stderr[chunk_number] = stderr
+            if not show_progress:
+                click.echo(f"✅ Created: {output_filename} ({page_count} pages)")
+
+        if show_progress:
+            with click.progressbar(length=total_chunks,
+                                 label='Creating PDF files with pdftk',
+                                 show_eta=True,
+                                 show_percent=True) as progress_bar:
+                for future in as_completed(futures):
+                    check(future)
+                    progress_bar.update(1)
+        else:
+            for future in as_completed(futures):
+                check(future)
+
+    _report_chunk_warnings("pdftk", chunk_stderr)
+    click.echo(f"✅ Successfully created {total_chunks} chunks using pdftk")
+
+def split_with_qpdf(input_pdf_path, pages_per_chunk, output_folder, input_basename, show_progress=True):
+    """
+    Split PDF using qpdf as fallback method.
+
+    qpdf writes each chunk directly with --split-pages=N into a staging
+    directory inside output_folder; the chunks are then renamed into place.
+    No per-page intermediate files are created and nothing goes to /tmp.
+    qpdf writes every chunk in one run, so what it prints is reported as
+    warnings of the whole run, not of a particular chunk.
+    """
+    import glob
+    import shutil
+    import subprocess
+    import tempfile
+    click.echo("🔧 Attempting to split using qpdf...")
+
+    if not check_external_tool('qpdf'):
+        raise Exception("qpdf is not installed. Install with: brew install qpdf (macOS) or sudo apt install qpdf (Linux)")
+
+    # Page count lets the progress bar track chunks while qpdf writes them
+    total_chunks = None
+    npages = subprocess.run(['qpdf', '--show-npages', input_pdf_path], capture_output=True, text=True)
+    if npages.returncode in (0, 3) and npages.stdout.strip().isdigit():
+        total_pages = int(npages.stdout.strip())
+        total_chunks = (total_pages + pages_per_chunk - 1) // pages_per_chunk
+        click.echo(f"📄 Splitting {total_pages} pages into {total_chunks} chunks with qpdf...")
+    else:
+        click.echo("📄 Splitting into chunks with qpdf...")
+
+    # Stage on the output filesystem so renaming into place is cheap
+    staging_dir = tempfile.mkdtemp(prefix=".qpdf-", dir=output_folder)
+    # Warnings go to a file so a chatty qpdf cannot block on a full pipe while we poll
+    stderr_file = tempfile.TemporaryFile(mode="w+")
+    try:
+        process = subprocess.Popen([
+            'qpdf', f'--split-pages={pages_per_chunk}', input_pdf_path,
+            os.path.join(staging_dir, 'chunk-%d.pdf')
+        ], stdout=subprocess.DEVNULL, stderr=stderr_file, text=True)
+
+        if show_progress and total_chunks:
+            with click.progressbar(length=total_chunks,
+                                 label='Creating PDF files with qpdf',
+                                 show_eta=True,
+                                 show_percent=True) as progress_bar:
+                reported = 0
+                while process.poll() is None:
+                    # A chunk is complete once qpdf has started the next one
+                    written = max(len(os.listdir(staging_dir)) - 1, 0)
+                    progress_bar.update(written - reported)
+                    reported = written
+                    with contextlib.suppress(subprocess.TimeoutExpired):
+                        process.wait(timeout=0.2)
+                progress_bar.update(total_chunks - reported)
+        else:
+            process.wait()
+        stderr_file.seek(0)
+        stderr = stderr_file.read().strip()
+        written = len(glob.glob(os.path.join(staging_dir, 'chunk-*.pdf')))
+
+        # qpdf exits with 3 when it succeeded with warnings (common for corrupted files)
+        if process.returncode not in (0, 3):
+            raise Exception(f"qpdf failed (exit status {process.returncode}, {written} chunks started)"
+                            + (f": {stderr}" if stderr else ""))
+
+        if stderr:
+            click.echo(f"⚠️  qpdf warnings for the whole run: {stderr}", err=True)
+
+        # qpdf names chunks by page range (chunk-01-05.pdf); order by first page
+        chunk_files = sorted(
+            glob.glob(os.path.join(staging_dir, 'chunk-*.pdf')),
+            key=lambda path: int(re.search(r'chunk-(\d+)', os.path.basename(path)).group(1)),
+        )
+        for chunk_number, chunk_file in enumerate(chunk_files, start=1):
+            output_filename = os.path.join(output_folder, f"{input_basename}_{chunk_number}.pdf")
+            os.replace(chunk_file, output_filename)
+            if not show_progress:
+                click.echo(f"✅ Created: {output_filename}")
+
+        click.echo(f"✅ Successfully created {len(chunk_files)} chunks using qpdf")
+
+    finally:
+        stderr_file.close()
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+def split_with_pikepdf(input_pdf_path, pages_per_chunk, output_folder, input_basename, show_progress=True):
+    """
+    Split PDF using pikepdf, the Python binding of the qpdf library.
+
+    Works like the qpdf path without starting a process: the input is opened
+    once and each chunk is saved from a new document holding its pages.
+    """
+    try:
+        import pikepdf
+    except ImportError:
+        raise Exception("pikepdf is not installed. Install with: pip install pikepdf")
+    click.echo("🔧 Attempting to split using pikepdf...")
+
+    try:
+        pdf = pikepdf.open(input_pdf_path)
+    except pikepdf.PdfError as e:
+        raise Exception(f"pikepdf failed: {e}")
+
+    with pdf:
+        total_pages = len(pdf.pages)
+        chunk_ranges = [(i, min(i + pages_per_chunk, total_pages)) for i in range(0, total_pages, pages_per_chunk)]
+        click.echo(f"📄 Splitting {total_pages} pages into {len(chunk_ranges)} chunks with pikepdf...")
+
+        def write(chunk_number, start_page, end_page):
+            output_filename = os.path.join(output_folder, f"{input_basename}_{chunk_number}.pdf")
+            try:
+                with pikepdf.new() as chunk:
+                    chunk.pages.extend(pdf.pages[start_page:end_page])
+                    chunk.save(output_filename)
+            except pikepdf.PdfError as e:
+                raise Exception(f"pikepdf failed on chunk {chunk_number}: {e}")
+            return output_filename
+
+        if show_progress:
+            with click.progressbar(enumerate(chunk_ranges, start=1),
+                                 length=len(chunk_ranges),
+                                 label='Creating PDF files with pikepdf',
+                                 show_eta=True,
+                                 show_percent=True) as progress_bar:
+                for chunk_number, (start_page, end_page) in progress_bar:
+                    write(chunk_number, start_page, end_page)
+        else:
+            for chunk_number, (start_page, end_page) in enumerate(chunk_ranges, start=1):
+                output_filename = write(chunk_number, start_page, end_page)
+                click.echo(f"✅ Created: {output_filename} ({end_page - start_page} pages)")
+
+    click.echo(f"✅ Successfully created {len(chunk_ranges)} chunks using pikepdf")
+
+class SplitBackend:
+    """
+    A way of splitting a PDF into chunks of pages_per_chunk pages.
+
+    Every backend writes "{input_basename}_{n}.pdf" files to output_folder
+    through split(), and can write a single page range through write_pages(),
+    which select_backend() times to compare backends on the actual input.
+    Subclasses set name and, for external programs, tool.
+    """
+    name = None
+    tool = None
+
+    def available(self):
+        return self.tool is None or check_external_tool(self.tool)
+
+    def page_count(self, input_pdf_path):
+        raise NotImplementedError
+
+    def write_pages(self, input_pdf_path, start_page, end_page, output_filename):
+        """Write pages start_page..end_page (1-based, inclusive) of the input to output_filename."""
+        raise NotImplementedError
+
+    def split(self, input_pdf_path, pages_per_chunk, output_folder, input_basename, show_progress=True, jobs=1):
+        raise NotImplementedError
+
+    def calibrate(self, input_pdf_path, sample_pages, scratch_dir):
+        """
+        Return the (fixed, per-page) seconds this backend takes, from writing
+        the first page and the first sample_pages pages of the input.
+        """
+        timings = []
+        for last_page in sorted({1, sample_pages}):
+            start = time.perf_counter()
+            self.write_pages(input_pdf_path, 1, last_page, os.path.join(scratch_dir, f"{self.name}-{last_page}.pdf"))
+            timings.append(time.perf_counter() - start)
+        per_page = max(timings[-1] - timings[0], 0.0) / max(sample_pages - 1, 1)
+        return max(timings[0] - per_page, 0.0), per_page
+
+    def estimate_seconds(self, fixed, per_page, total_pages, pages_per_chunk, jobs):
+        """Estimated split time from the fixed and per-page costs measured by calibrate()."""
+        # One process opens the input once and writes every page
+        return fixed + per_page * total_pages
+
+class PypdfBackend(SplitBackend):
+    """
+    The built-in path: split_pdf_by_chunks() with pypdf.
+
+    The input is probed once for calibration, and split_pdf_by_chunks()
+    takes that probe over (see take_probe) when pypdf is chosen, so the
+    file is not parsed again.
+    """
+    name = "pypdf"
+
+    def __init__(self):
+        # (input path, probe_pdf() result, seconds it took) of the last probe
+        self._probed = None
+
+    def _probe(self, input_pdf_path):
+        if self._probed is None or self._probed[0] != input_pdf_path:
+            # Opened the way split_pdf_by_chunks() opens it, so the probe pays the same fixed cost
+            use_mmap = os.path.getsize(input_pdf_path) / (1024 * 1024) > LARGE_FILE_MB
+            start = time.perf_counter()
+            probed = probe_pdf(input_pdf_path, use_mmap)
+            self._probed = (input_pdf_path, probed, time.perf_counter() - start)
+        return self._probed
+
+    def take_probe(self, input_pdf_path):
+        """Return and forget the probe_pdf() result of a calibration of input_pdf_path, or None."""
+        probed, self._probed = self._probed, None
+        return probed[1] if probed is not None and probed[0] == input_pdf_path else None
+
+    def page_count(self, input_pdf_path):
+        reader, _, _, page_index = self._probe(input_pdf_path)[1]
+        return len(page_index) if page_index is not None else len(reader.pages)
+
+    def write_pages(self, input_pdf_path, start_page, end_page, output_filename):
+        reader, _, _, page_index = self._probe(input_pdf_path)[1]
+        write_chunk(reader, start_page - 1, end_page, output_filename, page_index)
+
+    def calibrate(self, input_pdf_path, sample_pages, scratch_dir):
+        # One probe; its time is the fixed cost, and the sample writes reuse its reader
+        open_seconds = self._probe(input_pdf_path)[2]
+        fixed, per_page = super().calibrate(input_pdf_path, sample_pages, scratch_dir)
+        return open_seconds + fixed, per_page
+
+    def split(self, input_pdf_path, pages_per_chunk, output_folder, input_basename, show_progress=True, jobs=1):
+        split_pdf_by_chunks(input_pdf_path, pages_per_chunk, output_folder, show_progress, jobs,
+                            output_basename=input_basename, backend=self.name)
+
+    def estimate_seconds(self, fixed, per_page, total_pages, pages_per_chunk, jobs):
+        # With jobs > 1, worker processes share the pages
+        return fixed + per_page * total_pages / jobs
+
+class PdftkBackend(SplitBackend):
+    name = tool = "pdftk"
+
+    def page_count(self, input_pdf_path):
+        import subprocess
+        result = subprocess.run(['pdftk', input_pdf_path, 'dump_data'], capture_output=True, text=True)
+        match = re.search(r'^NumberOfPages:\s*(\d+)', result.stdout, re.MULTILINE)
+        if result.returncode != 0 or match is None:
+            raise Exception(f"pdftk failed: {result.stderr.strip()}")
+        return int(match.group(1))
+
+    def write_pages(self, input_pdf_path, start_page, end_page, output_filename):
+        returncode, stderr = _run_pdftk_chunk(input_pdf_path, start_page, end_page, output_filename)
+        if returncode != 0:
+            raise Exception(f"pdftk failed: {stderr.strip()}")
+
+    def split(self, input_pdf_path, pages_per_chunk, output_folder, input_basename, show_progress=True, jobs=1):
+        split_with_pdftk(input_pdf_path, pages_per_chunk, output_folder, input_basename, show_progress, jobs)
+
+    def estimate_seconds(self, fixed, per_page, total_pages, pages_per_chunk, jobs):
+        # Every chunk is a separate pdftk process that opens the input again
+        total_chunks = (total_pages + pages_per_chunk - 1) // pages_per_chunk
+        return (fixed * total_chunks + per_page * total_pages) / jobs
+
+class QpdfBackend(SplitBackend):
+    name = tool = "qpdf"
+
+    def page_count(self, input_pdf_path):
+        import subprocess
+        result = subprocess.run(['qpdf', '--show-npages', input_pdf_path], capture_output=True, text=True)
+        if result.returncode not in (0, 3) or not result.stdout.strip().isdigit():
+            raise Exception(f"qpdf failed: {result.stderr.strip()}")
+        return int(result.stdout.strip())
+
+    def write_pages(self, input_pdf_path, start_page, end_page, output_filename):
+        import subprocess
+        result = subprocess.run([
+            'qpdf', '--empty', '--pages', input_pdf_path, f'{start_page}-{end_page}', '--', output_filename
+        ], capture_output=True, text=True)
+        if result.returncode not in (0, 3):
+            raise Exception(f"qpdf failed: {result.stderr.strip()}")
+
+    def split(self, input_pdf_path, pages_per_chunk, output_folder, input_basename, show_progress=True, jobs=1):
+        split_with_qpdf(input_pdf_path, pages_per_chunk, output_folder, input_basename, show_progress)
+
+class PikepdfBackend(SplitBackend):
+    name = "pikepdf"
+
+    def available(self):
+        import importlib.util
+        return importlib.util.find_spec("pikepdf") is not None
+
+    def page_count(self, input_pdf_path):
+        import pikepdf
+        with pikepdf.open(input_pdf_path) as pdf:
+            return len(pdf.pages)
+
+    def write_pages(self, input_pdf_path, start_page, end_page, output_filename):
+        import pikepdf
+        with pikepdf.open(input_pdf_path) as pdf, pikepdf.new() as chunk:
+            chunk.pages.extend(pdf.pages[start_page - 1:end_page])
+            chunk.save(output_filename)
+
+    def split(self, input_pdf_path, pages_per_chunk, output_folder, input_basename, show_progress=True, jobs=1):
+        split_with_pikepdf(input_pdf_path, pages_per_chunk, output_folder, input_basename, show_progress)
+
+BACKENDS = {backend.name: backend for backend in (PypdfBackend(), QpdfBackend(), PdftkBackend(), PikepdfBackend())}
+SPLIT_BACKENDS = ("auto",) + tuple(BACKENDS)
+
+# External backends tried, in order, when pypdf cannot read the input
+FALLBACK_BACKENDS = ("pdftk", "qpdf", "pikepdf")
+
+# Damage found by inspect_pdf_bytes that sends a split to REPAIR_BACKENDS
+# before pypdf: qpdf (also behind pikepdf) rebuilds the xref of such files,
+# while pypdf would scan the whole file for objects first
+REPAIR_FIRST_ISSUES = ("truncated", "broken xref")
+REPAIR_BACKENDS = ("qpdf", "pikepdf", "pdftk")
+
+# With --backend auto, smaller inputs always use pypdf: starting another
+# program or library costs more than it can save on them
+AUTO_BACKEND_MIN_MB = 10
+
+# Largest page range written per backend by the calibration probe
+CALIBRATION_PAGES = 16
+
+def select_backend(input_pdf_path, pages_per_chunk, jobs=1, metrics=None):
+    """
+    Pick the backend expected to split the input fastest.
+
+    Inputs below AUTO_BACKEND_MIN_MB use pypdf. Otherwise every available
+    backend writes the first page and the first CALIBRATION_PAGES pages to a
+    scratch directory; the difference gives its cost per page, the rest its
+    fixed cost (startup and opening the input). These are scaled to the page
+    count and chunk layout with estimate_seconds(), and the cheapest wins.
+    A backend that fails the probe is not considered.
+    """
+    import shutil
+    import tempfile
+
+    file_size_mb = os.path.getsize(input_pdf_path) / (1024 * 1024)
+    candidates = [backend for backend in BACKENDS.values() if backend.available()]
+    if file_size_mb < AUTO_BACKEND_MIN_MB or len(candidates) == 1:
+        return "pypdf"
+
+    with _stage(metrics, "calibrate"):
+        # External tools count pages without building pypdf's object tree
+        total_pages = None
+        for backend in sorted(candidates, key=lambda backend: backend.name == "pypdf"):
+            try:
+                total_pages = backend.page_count(input_pdf_path)
+                break
+            except Exception:
+                continue
+        if not total_pages:
+            return "pypdf"
+
+        sample_pages = min(CALIBRATION_PAGES, total_pages)
+        estimates = {}
+        scratch_dir = tempfile.mkdtemp(prefix="pdf-splitter-calibrate-")
+        try:
+            for backend in candidates:
+                try:
+                    fixed, per_page = backend.calibrate(input_pdf_path, sample_pages, scratch_dir)
+                except Exception:
+                    continue
+                estimates[backend.name] = backend.estimate_seconds(fixed, per_page, total_pages,
+                                                                   pages_per_chunk, jobs)
+        finally:
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    if not estimates:
+        return "pypdf"
+    chosen = min(estimates, key=estimates.get)
+    summary = ", ".join(f"{name} ~{seconds:.1f}s" for name, seconds in sorted(estimates.items(), key=lambda item: item[1]))
+    click.echo(f"⏱️  Backend estimates for {total_pages} pages: {summary}")
+    return chosen
+
+def _split_with_backend(backend, input_pdf_path, pages_per_chunk, output_folder, input_basename,
+                        show_progress=True, jobs=1, archive=None, metrics=None):
+    """
+    Split with an external backend, recording its chunks in metrics.
+
+    External backends write files; for an archive they are staged in a
+    temporary folder and then added to it.
+    """
+    import shutil
+    import tempfile
+
+    folder = output_folder if archive is None else tempfile.mkdtemp(prefix="pdf-splitter-")
+    try:
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        with _stage(metrics, backend.name):
+            backend.split(input_pdf_path, pages_per_chunk, folder, input_basename, show_progress, jobs)
+        _record_folder_chunks(metrics, backend.name, folder, input_basename)
+        if archive is not None:
+            archive.add_folder_chunks(folder, input_basename)
+    finally:
+        if archive is not None:
+            shutil.rmtree(folder, ignore_errors=True)
+
+def current_rss_mb():
+    """
+    Return the resident set size of this process in MB, or None if unavailable.
+
+    Uses /proc on Linux. Elsewhere falls back to the peak RSS reported by
+    getrusage, which only ever grows.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+class SplitMetrics:
+    """
+    Record where a split spends its time and what it produced.
+
+    Stages are timed with stage() and accumulated as total seconds and
+    number of calls: "open" (reading and indexing the input), "plan"
+    (sizing chunks or reading the outline), "page_access", "add_page",
+    "write", "fsync" (manifest checkpoints) and "gc". The shared, raw and
+    cache engines look pages up as part of "add_page".
+
+    Hooks are callables taking one event dict. Each chunk written emits a
+    "chunk" event; a split run inside record() emits a "summary" event with
+    the stage totals and the path that produced the chunks ("pypdf",
+    "cache", "pdftk" or "qpdf") when it ends, whether it succeeded or not.
+    """
+
+    def __init__(self, hooks=()):
+        self.hooks = list(hooks)
+        self._start(None)
+
+    def _start(self, input_pdf_path):
+        self.input = input_pdf_path
+        self.path = None
+        self.stages = {}
+        self.chunks = 0
+        self.pages = 0
+        self.bytes = 0
+        self._started = time.perf_counter()
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    def emit(self, event):
+        """Pass an event to every hook."""
+        for hook in self.hooks:
+            hook(event)
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Time the enclosed block as one call of stage name."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(name, time.perf_counter() - started)
+
+    def add_stage(self, name, seconds, calls=1):
+        totals = self.stages.setdefault(name, [0.0, 0])
+        totals[0] += seconds
+        totals[1] += calls
+
+    def take_stages(self):
+        """Return the stage totals recorded so far and start again from zero."""
+        stages, self.stages = self.stages, {}
+        return stages
+
+    def merge_stages(self, stages):
+        """Add stage totals taken from another SplitMetrics (e.g. in a worker process)."""
+        for name, (seconds, calls) in stages.items():
+            self.add_stage(name, seconds, calls)
+
+    def chunk(self, chunk_number, name, start_page, end_page, pages, size, seconds):
+        """Record one written chunk; pages is None when an external tool wrote it."""
+        self.chunks += 1
+        self.pages += pages or 0
+        self.bytes += size
+        self.emit({"event": "chunk", "input": self.input, "chunk": chunk_number, "name": name,
+                   "first_page": start_page + 1 if start_page is not None else None,
+                   "last_page": end_page, "pages": pages, "bytes": size, "seconds": round(seconds, 6)})
+
+    @contextlib.contextmanager
+    def record(self, input_pdf_path):
+        """Record the split of input_pdf_path run in the block and emit its summary."""
+        self._start(input_pdf_path)
+        status, error = "ok", None
+        try:
+            yield self
+        except BaseException as e:
+            status, error = "failed", str(e)
+            raise
+        finally:
+            self.emit(self.summary(status, error))
+
+    def summary(self, status="ok", error=None):
+        """Return the "summary" event for the split recorded so far."""
+        event = {
+            "event": "summary",
+            "input": self.input,
+            "status": status,
+            "path": self.path,
+            "seconds": round(time.perf_counter() - self._started, 6),
+            "chunks": self.chunks,
+            "pages": self.pages,
+            "bytes": self.bytes,
+            "stages": {name: {"seconds": round(seconds, 6), "calls": calls}
+                       for name, (seconds, calls) in sorted(self.stages.items())},
+        }
+        if error is not None:
+            event["error"] = error
+        return event
+
+def _stage(metrics, name):
+    """Time a block as stage name of metrics, or do nothing when metrics is None."""
+    return metrics.stage(name) if metrics is not None else contextlib.nullcontext()
+
+class JsonLinesMetricsSink:
+    """SplitMetrics hook writing each event as one JSON line to a file ('-' is stderr)."""
+
+    def __init__(self, target="-"):
+        self._file = open(target, "a") if target != "-" else None
+
+    def __call__(self, event):
+        stream = self._file if self._file is not None else sys.stderr
+        stream.write(json.dumps(event) + "\n")
+        stream.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+class PrometheusTextfileSink:
+    """
+    SplitMetrics hook that keeps the totals of every summary event and
+    writes them in the Prometheus text format on close().
+
+    The file is replaced atomically, as the node_exporter textfile
+    collector expects, and describes the last run of pdf-splitter.
+    """
+
+    PREFIX = "pdf_splitter"
+
+    def __init__(self, target):
+        self.target = target
+        self._summaries = []
+
+    def __call__(self, event):
+        if event["event"] == "summary":
+            self._summaries.append(event)
+
+    @staticmethod
+    def _labels(**labels):
+        return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+    def render(self):
+        """Return the text exposition of the summaries seen so far."""
+        stages = {}
+        runs = {}
+        for summary in self._summaries:
+            for name, totals in summary["stages"].items():
+                seconds, calls = stages.get(name, (0.0, 0))
+                stages[name] = (seconds + totals["seconds"], calls + totals["calls"])
+            key = (summary["path"] or "none", summary["status"])
+            runs[key] = runs.get(key, 0) + 1
+
+        lines = []
+        def metric(name, help_text, samples):
+            lines.append(f"# HELP {self.PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {self.PREFIX}_{name} gauge")
+            for labels, value in samples:
+                lines.append(f"{self.PREFIX}_{name}{labels} {round(value, 6)}")
+
+        metric("stage_seconds", "Time spent in each split stage.",
+               [(self._labels(stage=name), seconds) for name, (seconds, _) in sorted(stages.items())])
+        metric("stage_calls", "Number of times each split stage ran.",
+               [(self._labels(stage=name), calls) for name, (_, calls) in sorted(stages.items())])
+        metric("files", "Input files split, by path used and status.",
+               [(self._labels(path=path, status=status), count) for (path, status), count in sorted(runs.items())])
+        metric("duration_seconds", "Wall-clock time of the splits.",
+               [("", sum(summary["seconds"] for summary in self._summaries))])
+        for name, help_text in (("chunks", "Chunks written."), ("pages", "Pages written."),
+                                ("output_bytes", "Bytes written.")):
+            field = "bytes" if name == "output_bytes" else name
+            metric(name, help_text, [("", sum(summary[field] for summary in self._summaries))])
+        metric("last_run_timestamp_seconds", "Time the metrics were written.", [("", int(time.time()))])
+        return "\n".join(lines) + "\n"
+
+    def close(self):
+        import tempfile
+
+        directory = os.path.dirname(os.path.abspath(self.target))
+        with tempfile.NamedTemporaryFile("w", dir=directory, prefix=".pdf-splitter-", suffix=".prom",
+                                         delete=False) as staging:
+            staging.write(self.render())
+        # NamedTemporaryFile creates the file 0600; the collector may run as another user
+        os.chmod(staging.name, 0o644)
+        os.replace(staging.name, self.target)
+
+# Output formats selectable with --metrics
+METRICS_FORMATS = ("json", "prometheus")
+
+class MemoryGuard:
+    """
+    Keep memory bounded between chunks without a full collection every time.
+
+    After each chunk the reader's cache of parsed objects is dropped, so memory
+    follows the size of the current chunk rather than everything read so far.
+    A full gc.collect() only runs when RSS exceeds rss_limit_mb, or when the
+    number of allocated blocks has grown by alloc_blocks since the last
+    collection. Either limit may be None to disable it; alloc_blocks=0
+    collects after every chunk. Collections are timed as the "gc" stage of
+    metrics (a SplitMetrics), if given.
+    """
+
+    def __init__(self, rss_limit_mb=None, alloc_blocks=DEFAULT_GC_ALLOC_BLOCKS, metrics=None):
+        self.rss_limit_mb = rss_limit_mb
+        self.alloc_blocks = alloc_blocks
+        self.metrics = metrics
+        self.collections = 0
+        self._baseline_blocks = sys.getallocatedblocks()
+
+    def release(self, reader):
+        """Drop cached objects held by reader (if any) and collect if a threshold is crossed."""
+        if reader is not None:
+            # Pages are re-resolved on demand from the xref table
+            reader.resolved_objects.clear()
+
+            # Let the kernel drop mapped input pages; they are re-read on demand
+            if isinstance(reader.stream, mmap.mmap) and hasattr(mmap, "MADV_DONTNEED"):
+                reader.stream.madvise(mmap.MADV_DONTNEED)
+
+        if self._should_collect():
+            with _stage(self.metrics, "gc"):
+                gc.collect()
+            self.collections += 1
+            self._baseline_blocks = sys.getallocatedblocks()
+
+    def _should_collect(self):
+        if self.alloc_blocks is not None:
+            if sys.getallocatedblocks() - self._baseline_blocks >= self.alloc_blocks:
+                return True
+        if self.rss_limit_mb is not None:
+            rss_mb = current_rss_mb()
+            if rss_mb is not None and rss_mb >= self.rss_limit_mb:
+                return True
+        return False
+
+def open_reader(input_pdf_path, use_mmap=False, **reader_kwargs):
+    """
+    Open a PdfReader on input_pdf_path.
+
+    pypdf reads a file given by path fully into memory. With use_mmap the
+    reader is given a read-only memory map instead, so objects are resolved
+    lazily from mapped pages and the input is never loaded as a whole.
+    """
+    _import_pypdf()
+    if not use_mmap:
+        return PdfReader(input_pdf_path, **reader_kwargs)
+    with open(input_pdf_path, "rb") as source:
+        mapped = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+    return PdfReader(mapped, **reader_kwargs)
+
+@contextlib.contextmanager
+def stdin_pdf_path():
+    """
+    Yield a file path holding the PDF read from stdin.
+
+    PDFs are read from the end (the xref table) and then randomly, so they
+    cannot be split from a pipe directly. When stdin is a redirected regular
+    file it is used in place; only a pipe or socket is spooled to a
+    temporary file, which is removed afterwards.
+    """
+    import shutil
+    import tempfile
+    stdin = sys.stdin.buffer
+    try:
+        fd = stdin.fileno()
+        stdin_stat = os.fstat(fd)
+    except (OSError, ValueError, io.UnsupportedOperation):
+        stdin_stat = None
+
+    if stdin_stat is not None and stat.S_ISREG(stdin_stat.st_mode):
+        for fd_path in (f"/proc/self/fd/{fd}", f"/dev/fd/{fd}"):
+            real_path = os.path.realpath(fd_path)
+            # Worker processes cannot use /dev/fd paths, so only accept the real file
+            if real_path != fd_path and os.path.isfile(real_path) \
+                    and os.path.samestat(os.stat(real_path), stdin_stat):
+                yield real_path
+                return
+
+    with tempfile.TemporaryDirectory(prefix="pdf-splitter-") as spool_dir:
+        spool_path = os.path.join(spool_dir, "stdin.pdf")
+        with open(spool_path, "wb") as spool:
+            shutil.copyfileobj(stdin, spool, 1024 * 1024)
+        yield spool_path
+
+def inspect_pdf_bytes(input_pdf_path):
+    """
+    Classify structural damage from the head and tail of a PDF without parsing it.
+
+    Returns a list of detected issues: "missing header", "truncated" (no
+    %%EOF marker anywhere) and "broken xref" (startxref missing before the
+    last %%EOF or not pointing at a cross-reference table or stream).
+    Junk after the last %%EOF, which readers ignore, is not damage; the file
+    is searched backwards for the marker, so only a truncated file is read
+    to its start.
+    """
+    issues = []
+    with open(input_pdf_path, "rb") as source:
+        head = source.read(1024)
+        size = source.seek(0, os.SEEK_END)
+
+        # Blocks overlap by the marker's length so it is found across a boundary
+        block_size = 64 * 1024
+        end = size
+        eof_end = None
+        while end > 0 and eof_end is None:
+            start = max(0, end - block_size)
+            source.seek(start)
+            found = source.read(end - start + 4).rfind(b"%%EOF")
+            if found != -1:
+                eof_end = start + found + 5
+            end = start
+        source.seek(max(0, (eof_end or size) - 2048))
+        tail = source.read((eof_end or size) - source.tell())
+
+        if b"%PDF-" not in head:
+            issues.append("missing header")
+        if eof_end is None:
+            issues.append("truncated")
+
+        startxref = re.findall(rb"startxref\s+(\d+)", tail)
+        if not startxref or int(startxref[-1]) >= size:
+            issues.append("broken xref")
+        else:
+            source.seek(int(startxref[-1]))
+            target = source.read(32).lstrip()
+            if not (target.startswith(b"xref") or re.match(rb"\d+\s+\d+\s+obj", target)):
+                issues.append("broken xref")
+    return issues
+
+class PageIndex:
+    """
+    Compact index of a document's pages, built by walking the page tree once.
+
+    Page j's object number and generation are kept in typed arrays, together
+    with the ancestor /Pages nodes that supply its inherited attributes.
+    Pages are then loaded directly by object number (pypdf seeks to them
+    through its own xref table), and pypdf never flattens the
+    tree into a list holding every page of the document. An index can be
+    saved as a sidecar file and is reused while the input is unchanged.
+    """
+
+    # Version 2 dropped the unused byte offset column
+    MAGIC = b"PDFSPLITIDX2"
+    INHERITABLE_ATTRIBUTES = ("/Resources", "/MediaBox", "/CropBox", "/Rotate")
+    ARRAY_TYPECODE = "q"
+
+    def __init__(self, fingerprint, idnums, generations, sources, source_table):
+        self.fingerprint = fingerprint
+        self.idnums = idnums
+        self.generations = generations
+        # Index into source_table: tuples of (attribute, idnum, generation)
+        self.sources = sources
+        self.source_table = source_table
+
+    def __len__(self):
+        return len(self.idnums)
+
+    @staticmethod
+    def _root_ref(reader):
+        _import_pypdf()
+        root_ref = reader.trailer["/Root"].get_object().raw_get("/Pages")
+        if not isinstance(root_ref, IndirectObject):
+            raise Exception("Page tree root is not an indirect object")
+        return root_ref
+
+    @staticmethod
+    def _node_type(node):
+        return node["/Type"] if "/Type" in node else "/Pages" if "/Kids" in node else "/Page"
+
+    @classmethod
+    def _inherit(cls, inherited, node, key):
+        """Return the inherited attribute sources below /Pages node key."""
+        return tuple(source for source in inherited if source[0] not in node) + tuple(
+            (attr,) + key for attr in cls.INHERITABLE_ATTRIBUTES if attr in node)
+
+    @staticmethod
+    def _kids(node):
+        kids = node.get("/Kids", ArrayObject())
+        kids = kids if isinstance(kids, ArrayObject) else ()
+        if any(not isinstance(kid, IndirectObject) for kid in kids):
+            raise Exception("Page tree has inline /Kids entries")
+        return kids
+
+    @classmethod
+    def _collect(cls, reader, fingerprint, pages):
+        """Build an index from (page reference, page dictionary, inherited sources) tuples."""
+        idnums, generations, sources = (array.array(cls.ARRAY_TYPECODE) for _ in range(3))
+        source_ids = {(): 0}
+        for count, (ref, node, inherited) in enumerate(pages, start=1):
+            idnums.append(ref.idnum)
+            generations.append(ref.generation)
+            # A page's own value overrides the inherited one
+            page_sources = tuple(source for source in inherited if source[0] not in node)
+            sources.append(source_ids.setdefault(page_sources, len(source_ids)))
+            if count % 4096 == 0:
+                reader.resolved_objects.clear()
+        reader.resolved_objects.clear()
+        return cls(fingerprint, idnums, generations, sources, list(source_ids))
+
+    @classmethod
+    def build(cls, reader, fingerprint):
+        """
+        Walk reader's page tree and index its pages.
+
+        Raises an Exception for trees the index cannot describe (cycles,
+        inline /Kids dictionaries); callers then fall back to reader.pages.
+        """
+        def walk():
+            visited = set()
+            stack = [(cls._root_ref(reader), ())]
+            while stack:
+                ref, inherited = stack.pop()
+                node = ref.get_object()
+                # Damaged files may have invalid or empty entries in /Kids
+                if not isinstance(node, DictionaryObject) or not node:
+                    continue
+                key = (ref.idnum, ref.generation)
+                node_type = cls._node_type(node)
+
+                if node_type == "/Pages":
+                    if key in visited:
+                        raise Exception("Detected cyclic page references")
+                    visited.add(key)
+                    inherited = cls._inherit(inherited, node, key)
+                    stack.extend((kid, inherited) for kid in reversed(cls._kids(node)))
+                elif node_type == "/Page":
+                    yield ref, node, inherited
+
+        return cls._collect(reader, fingerprint, walk())
+
+    @classmethod
+    def page_count(cls, reader):
+        """Return the page count the root of the page tree declares."""
+        count = cls._root_ref(reader).get_object().get("/Count")
+        if not isinstance(count, int) or count < 0:
+            raise Exception("Page tree root has no valid /Count")
+        return count
+
+    @classmethod
+    def locate(cls, reader, page_numbers, fingerprint):
+        """
+        Index only the given 0-based pages, in the order given.
+
+        Each page is found by descending from the root and skipping whole
+        subtrees by their /Count, so only the nodes on the way to a page
+        (and their direct kids) are read. Raises an Exception if the tree
+        does not match its counts.
+        """
+        def descend():
+            root_ref = cls._root_ref(reader)
+            for page_number in page_numbers:
+                ref, inherited, remaining, visited = root_ref, (), page_number, set()
+                while True:
+                    key = (ref.idnum, ref.generation)
+                    if key in visited:
+                        raise Exception("Detected cyclic page references")
+                    visited.add(key)
+                    node = ref.get_object()
+                    inherited = cls._inherit(inherited, node, key)
+                    for kid in cls._kids(node):
+                        kid_node = kid.get_object()
+                        if not isinstance(kid_node, DictionaryObject) or not kid_node:
+                            continue
+                        kid_type = cls._node_type(kid_node)
+                        if kid_type == "/Page":
+                            count = 1
+                        elif kid_type == "/Pages":
+                            count = kid_node.get("/Count")
+                            if not isinstance(count, int) or count < 0:
+                                raise Exception("Page tree node has no valid /Count")
+                        else:
+                            continue
+                        if remaining < count:
+                            break
+                        remaining -= count
+                    else:
+                        raise Exception(f"Page {page_number + 1} is not in the page tree")
+                    if kid_type == "/Page":
+                        yield kid, kid_node, inherited
+                        break
+                    ref = kid
+
+        return cls._collect(reader, fingerprint, descend())
+
+    def subset(self, page_numbers):
+        """Return an index of the given 0-based pages of this one, in the order given."""
+        columns = [array.array(self.ARRAY_TYPECODE, (values[j] for j in page_numbers))
+                   for values in (self.idnums, self.generations, self.sources)]
+        return PageIndex(self.fingerprint, *columns, self.source_table)
+
+    def page(self, reader, j):
+        """Load page j from reader with its inherited attributes, as reader.pages[j] would."""
+        _import_pypdf()
+        page = PageObject(reader, IndirectObject(self.idnums[j], self.generations[j], reader))
+        for attr, idnum, generation in self.source_table[self.sources[j]]:
+            if attr not in page:
+                page[NameObject(attr)] = reader.get_object(IndirectObject(idnum, generation, reader))[attr]
+        return page
+
+    def page_keys(self):
+        """Return the set of (idnum, generation) of all pages."""
+        return set(zip(self.idnums, self.generations))
+
+    def save(self, path):
+        """Write the index to path atomically."""
+        meta = json.dumps({"fingerprint": self.fingerprint, "pages": len(self),
+                           "sources": self.source_table}).encode()
+        temporary_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temporary_path, "wb") as index_file:
+            index_file.write(self.MAGIC + struct.pack("<I", len(meta)) + meta)
+            for values in (self.idnums, self.generations, self.sources):
+                if sys.byteorder == "big":
+                    values = array.array(self.ARRAY_TYPECODE, values)
+                    values.byteswap()
+                values.tofile(index_file)
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def load(cls, path, fingerprint):
+        """Read an index saved by save(); None if it is missing, damaged or for another input."""
+        try:
+            with open(path, "rb") as index_file:
+                if index_file.read(len(cls.MAGIC)) != cls.MAGIC:
+                    return None
+                meta_length, = struct.unpack("<I", index_file.read(4))
+                meta = json.loads(index_file.read(meta_length))
+                if meta["fingerprint"] != fingerprint:
+                    return None
+                columns = []
+                for _ in range(3):
+                    values = array.array(cls.ARRAY_TYPECODE)
+                    values.fromfile(index_file, meta["pages"])
+                    if sys.byteorder == "big":
+                        values.byteswap()
+                    columns.append(values)
+        except (OSError, EOFError, ValueError, KeyError, struct.error):
+            return None
+        source_table = [tuple(tuple(source) for source in sources) for sources in meta["sources"]]
+        return cls(fingerprint, *columns, source_table)
+
+def load_page_index(input_pdf_path, reader, sidecar_path=None):
+    """
+    Return a PageIndex for reader, or None if its page tree cannot be indexed.
+
+    With sidecar_path, an index saved there for the same input is reused,
+    and a newly built one is saved there. When no index can be built the
+    tree is flattened by pypdf instead, so a damaged tree still raises here.
+    """
+    fingerprint = input_fingerprint(input_pdf_path)
+    if sidecar_path is not None:
+        page_index = PageIndex.load(sidecar_path, fingerprint)
+        if page_index is not None:
+            return page_index
+
+    try:
+        page_index = PageIndex.build(reader, fingerprint)
+    except Exception:
+        len(reader.pages)
+        return None
+
+    if sidecar_path is not None:
+        try:
+            page_index.save(sidecar_path)
+        except OSError as e:
+            click.echo(f"⚠️  Could not save page index to '{sidecar_path}': {str(e)}", err=True)
+    return page_index
+
+def get_page(reader, j, page_index=None):
+    """Return page j of reader, through page_index when one is given."""
+    return page_index.page(reader, j) if page_index is not None else reader.pages[j]
+
+def probe_pdf(input_pdf_path, use_mmap=False, page_index_path=None, index_pages=True):
+    """
+    Open input_pdf_path with a single parse and classify it.
+
+    The file's head and tail are inspected first (see inspect_pdf_bytes),
+    then one permissive PdfReader is built; pypdf rebuilds a broken xref
+    table itself in that mode, and encrypted files are decrypted with the
+    empty password on the same reader rather than by parsing again.
+
+    The page tree is indexed with load_page_index (reusing or saving the
+    sidecar at page_index_path, if given) unless index_pages is False.
+
+    Returns (reader, reader_kwargs, issues, page_index), where reader_kwargs
+    reopens the file the same way (used by worker processes), issues lists
+    what was detected, including "encrypted", and page_index is a PageIndex
+    or None. Raises a PdfReadError (EncryptedPdfError when a password is
+    needed) naming the detected issues if the file cannot be read.
+    """
+    issues = inspect_pdf_bytes(input_pdf_path)
+    reader_kwargs = {"strict": False}
+    try:
+        reader = open_reader(input_pdf_path, use_mmap, **reader_kwargs)
+        if reader.is_encrypted:
+            issues.append("encrypted")
+            # pypdf already tried the empty password; check it was accepted
+            if not reader.decrypt(""):
+                raise EncryptedPdfError("PDF is encrypted and requires a password")
+            reader_kwargs = {"strict": False, "password": ""}
+        # Resolve the page tree now so a damaged one is reported here
+        page_index = load_page_index(input_pdf_path, reader, page_index_path) if index_pages else None
+    except Exception as e:
+        detected = f" (detected: {', '.join(issues)})" if issues else ""
+        error_type = type(e) if isinstance(e, PdfReadError) else PdfReadError
+        raise error_type(f"{str(e)}{detected}") from e
+    return reader, reader_kwargs, issues, page_index
+
+def _open_output(output):
+    """Open output for writing if it is a path; file objects are used as they are."""
+    if isinstance(output, (str, os.PathLike)):
+        return open(output, "wb")
+    return contextlib.nullcontext(output)
+
+def write_chunk(reader, start_page, end_page, output, page_index=None, metrics=None):
+    """
+    Write pages [start_page, end_page) of an open reader to output, which is
+    a file path or a writable, seekable binary file object. Pages are looked
+    up through page_index when one is given. Page lookups, add_page and the
+    final write are timed as stages of metrics (a SplitMetrics), if given.
+
+    Pages that fail to load are skipped and reported in the returned warnings.
+    Nothing is written when no page could be processed.
+
+    Returns a (pages_added, warnings) tuple.
+    """
+    _import_pypdf()
+    # Create a new writer for each chunk to minimize memory usage
+    writer = PdfWriter()
+    pages_added = 0
+    warnings = []
+
+    # Add pages to the writer with individual error handling
+    for j in range(start_page, end_page):
+        try:
+            # Access page directly without storing reference to minimize memory usage
+            with _stage(metrics, "page_access"):
+                page = get_page(reader, j, page_index)
+            with _stage(metrics, "add_page"):
+                writer.add_page(page)
+            pages_added += 1
+        except Exception as e:
+            warnings.append(f"⚠️  Warning: Failed to process page {j + 1}: {str(e)}")
+            continue
+
+    if pages_added == 0:
+        return pages_added, warnings
+
+    # Write the PDF with error handling
+    try:
+        with _stage(metrics, "write"), _open_output(output) as output_pdf:
+            writer.write(output_pdf)
+    except Exception as e:
+        raise Exception(f"Failed to write to '{output}': {str(e)}")
+
+    return pages_added, warnings
+
+class SharedResourceWriter:
+    """
+    Chunk writer that serializes each indirect object of the input once.
+
+    Objects keep their original numbers in every chunk, so an object's
+    serialized bytes are the same wherever it appears and can be spliced
+    into each chunk that references it. Serialized objects are cached by
+    object ID the first time they are written, so shared fonts, images and
+    resource dictionaries are serialized once per input, which makes
+    splitting scale with the input size rather than with input size times
+    chunk count. The cache holds at most CACHE_BUDGET_MB of bodies; past
+    that the oldest entries are dropped, which only costs re-serializing
+    them if they are used again. Only page dictionaries, the page tree and
+    the catalog are generated per chunk.
+    """
+
+    # Page keys that point back into the document structure outside the chunk
+    EXCLUDED_PAGE_KEYS = ("/Parent", "/B")
+    # Document-structure objects never copied into a chunk by reference
+    STRUCTURE_TYPES = ("/Page", "/Pages", "/Catalog")
+    # Serialized bodies kept for reuse; older entries are dropped beyond this
+    CACHE_BUDGET_MB = 256
+
+    def __init__(self, reader, page_index=None):
+        _import_pypdf()
+        self.reader = reader
+        self.page_index = page_index
+        self.header = reader.pdf_header.encode("latin-1")
+        self._page_ids = None
+        # (idnum, generation) -> (serialized body, referenced keys, is structure node);
+        # a body is bytes or a tuple of buffers written one after another
+        self._cache = {}
+        self._cache_bytes = 0
+        # Set to a PageIndexBuilder to record every page for a SplitCache
+        self.index_builder = None
+        # Set to a SplitMetrics to time page collection and writing
+        self.metrics = None
+
+    def _page_keys(self):
+        if self._page_ids is None and self.page_index is not None:
+            self._page_ids = self.page_index.page_keys()
+        elif self._page_ids is None:
+            self._page_ids = {
+                (page.indirect_reference.idnum, page.indirect_reference.generation)
+                for page in self.reader.pages
+                if page.indirect_reference is not None
+            }
+        return self._page_ids
+
+    @staticmethod
+    def _collect_refs(obj, refs, skip_keys=()):
+        """Append the (idnum, generation) of every indirect reference held directly by obj."""
+        stack = [obj]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, IndirectObject):
+                refs.append((item.idnum, item.generation))
+            elif isinstance(item, DictionaryObject):
+                for key, value in item.items():
+                    if item is obj and key in skip_keys:
+                        continue
+                    stack.append(value)
+            elif isinstance(item, ArrayObject):
+                stack.extend(item)
+
+    def _serialize(self, key):
+        """Return (body bytes, refs, is_structure) for an indirect object, using the cache."""
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        obj = self.reader.get_object(IndirectObject(key[0], key[1], self.reader))
+        if obj is None:
+            entry = (b"null", (), False)
+        else:
+            is_structure = isinstance(obj, DictionaryObject) and obj.get("/Type") in self.STRUCTURE_TYPES
+            buffer = io.BytesIO()
+            obj.write_to_stream(buffer)
+            refs = []
+            self._collect_refs(obj, refs, ("/Length",) if isinstance(obj, StreamObject) else ())
+            entry = (buffer.getvalue(), tuple(refs), is_structure)
+
+        self._cache[key] = entry
+        self._cache_bytes += len(entry[0])
+        # Dicts keep insertion order, so the first entries are the oldest
+        while self._cache_bytes > self.CACHE_BUDGET_MB * 1024 * 1024 and len(self._cache) > 1:
+            body = self._cache.pop(next(iter(self._cache)))[0]
+            if isinstance(body, bytes):
+                self._cache_bytes -= len(body)
+        return entry
+
+    def _serialize_page(self, page, pages_ref):
+        """Serialize a page dictionary re-parented under this chunk's page tree."""
+        page_dict = DictionaryObject(
+            (key, value) for key, value in page.items() if key not in self.EXCLUDED_PAGE_KEYS
+        )
+        page_dict[NameObject("/Parent")] = pages_ref
+        buffer = io.BytesIO()
+        page_dict.write_to_stream(buffer)
+        refs = []
+        self._collect_refs(page_dict, refs, ("/Parent",))
+        return buffer.getvalue(), refs
+
+    def _page_entry(self, j, parent_ref, known):
+        """
+        Return (page key, page body, {key: body}) for page j and the objects it needs.
+
+        Objects already in known (collected for an earlier page of the same
+        chunk) are left out. While an index is being built each page's complete
+        object set is recorded first.
+        """
+        page = get_page(self.reader, j, self.page_index)
+        ref = page.indirect_reference
+        page_key = (ref.idnum, ref.generation)
+        page_body, pending = self._serialize_page(page, parent_ref)
+        page_keys = self._page_keys()
+        skip = known if self.index_builder is None else {}
+        page_objects = {}
+        while pending:
+            key = pending.pop()
+            if key in skip or key in page_objects or key in page_keys:
+                continue
+            body, refs, is_structure = self._serialize(key)
+            if is_structure:
+                continue
+            page_objects[key] = body
+            pending.extend(refs)
+
+        if self.index_builder is not None:
+            self.index_builder.add_page(j, page_key, page_body, page_objects)
+            page_objects = {key: body for key, body in page_objects.items() if key not in known}
+        return page_key, page_body, page_objects
+
+    def write_chunk(self, start_page, end_page, output):
+        """
+        Write pages [start_page, end_page) to output (a path or binary file object).
+
+        Same contract as write_chunk(): returns (pages_added, warnings) and
+        writes nothing when no page could be processed.
+        """
+        warnings = []
+        # The page tree object number is only known once all objects are collected,
+        # so pages are parented to a placeholder and patched afterwards
+        placeholder = IndirectObject(0, 0, None)
+        chunk_pages = []
+        bodies = {}
+
+        for j in range(start_page, end_page):
+            try:
+                with _stage(self.metrics, "add_page"):
+                    page_key, page_body, page_objects = self._page_entry(j, placeholder, bodies)
+            except Exception as e:
+                warnings.append(f"⚠️  Warning: Failed to process page {j + 1}: {str(e)}")
+                continue
+            chunk_pages.append((page_key, page_body))
+            bodies.update(page_objects)
+
+        if not chunk_pages:
+            return 0, warnings
+
+        next_id = max(key[0] for key in list(bodies) + [k for k, _ in chunk_pages]) + 1
+        pages_id, catalog_id = next_id, next_id + 1
+        parent_ref = f"/Parent {pages_id} 0 R".encode()
+        for page_key, page_body in chunk_pages:
+            head, _, tail = page_body.rpartition(b"/Parent 0 0 R")
+            bodies[page_key] = head + parent_ref + tail
+        kids = " ".join(f"{key[0]} {key[1]} R" for key, _ in chunk_pages)
+        bodies[(pages_id, 0)] = f"<<\n/Type /Pages\n/Count {len(chunk_pages)}\n/Kids [ {kids} ]\n>>".encode()
+        bodies[(catalog_id, 0)] = f"<<\n/Type /Catalog\n/Pages {pages_id} 0 R\n>>".encode()
+
+        try:
+            with _stage(self.metrics, "write"), _open_output(output) as output_pdf:
+                self._write_file(output_pdf, bodies, catalog_id)
+        except Exception as e:
+            raise Exception(f"Failed to write to '{output}': {str(e)}")
+
+        return len(chunk_pages), warnings
+
+    def _write_file(self, output_pdf, bodies, catalog_id):
+        """Write a complete PDF made of the given object bodies."""
+        preamble = self.header + b"\n%\xe2\xe3\xcf\xd3\n"
+        output_pdf.write(preamble)
+        offset = len(preamble)
+        offsets = []
+        for key in sorted(bodies):
+            offsets.append((key, offset))
+            prefix = f"{key[0]} {key[1]} obj\n".encode()
+            output_pdf.write(prefix)
+            offset += len(prefix)
+            body = bodies[key]
+            for part in (body if isinstance(body, tuple) else (body,)):
+                output_pdf.write(part)
+                offset += len(part)
+            output_pdf.write(b"\nendobj\n")
+            offset += 8
+
+        # Objects keep their original sparse numbers, so the xref table lists
+        # one subsection per run of consecutive object numbers
+        xref = [b"xref\n"]
+        run = [((0, 65535), None)]
+        for key, key_offset in offsets:
+            if key[0] != (run[-1][0][0] + 1):
+                xref.append(self._xref_subsection(run))
+                run = []
+            run.append((key, key_offset))
+        xref.append(self._xref_subsection(run))
+        output_pdf.write(b"".join(xref))
+        size = offsets[-1][0][0] + 1
+        output_pdf.write(f"trailer\n<<\n/Size {size}\n/Root {catalog_id} 0 R\n>>\n"
+                         f"startxref\n{offset}\n%%EOF\n".encode())
+
+    @staticmethod
+    def _xref_subsection(run):
+        lines = [f"{run[0][0][0]} {len(run)}\n"]
+        for (idnum, generation), key_offset in run:
+            if key_offset is None:
+                lines.append(f"0000000000 {generation:05d} f\r\n")
+            else:
+                lines.append(f"{key_offset:010d} {generation:05d} n\r\n")
+        return "".join(lines).encode()
+
+class RawStreamWriter(SharedResourceWriter):
+    """
+    SharedResourceWriter that copies stream objects byte-for-byte from the input.
+
+    The input is memory-mapped and each stream's dictionary and body are
+    written as memoryview slices of the map, keeping the original filters:
+    stream data is never parsed, decoded or copied into Python bytes. Only
+    the small stream dictionary is parsed to find /Length and the objects it
+    references. Streams that cannot be located exactly (objects inside object
+    streams, bad /Length, encrypted files) go through pypdf as in the shared
+    engine.
+    """
+
+    _OBJECT_HEADER = re.compile(rb"\s*(\d+)\s+(\d+)\s+obj\s*")
+    _WHITESPACE = b" \t\r\n\f\x00"
+
+    def __init__(self, reader, input_pdf_path, page_index=None):
+        super().__init__(reader, page_index)
+        self._raw_enabled = not reader.is_encrypted
+        if isinstance(reader.stream, mmap.mmap):
+            # Share the reader's map when the input was opened with --mmap
+            self._map = reader.stream
+        else:
+            with open(input_pdf_path, "rb") as source:
+                self._map = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+
+    def _serialize(self, key):
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        entry = self._raw_stream_entry(key) if self._raw_enabled else None
+        if entry is None:
+            return super()._serialize(key)
+        # Raw entries only reference the map, so they are always worth caching
+        self._cache[key] = entry
+        return entry
+
+    def _raw_stream_entry(self, key):
+        """Return a cache entry slicing a stream object out of the map, or None."""
+        offset = self.reader.xref.get(key[1], {}).get(key[0])
+        if offset is None:
+            return None
+        header = self._OBJECT_HEADER.match(self._map, offset)
+        if header is None or (int(header.group(1)), int(header.group(2))) != key:
+            return None
+
+        dict_start = header.end()
+        dict_end = self._find_dictionary_end(dict_start)
+        if dict_end is None:
+            return None
+        keyword = dict_end
+        while keyword < len(self._map) and self._map[keyword] in self._WHITESPACE:
+            keyword += 1
+        if self._map[keyword:keyword + 6] != b"stream":
+            return None
+        data_start = keyword + 6
+        if self._map[data_start:data_start + 2] == b"\r\n":
+            data_start += 2
+        elif self._map[data_start:data_start + 1] in (b"\n", b"\r"):
+            data_start += 1
+
+        stream_dict = DictionaryObject.read_from_stream(
+            io.BytesIO(bytes(self._view[dict_start:dict_end]) + b" "), self.reader)
+        if stream_dict.get("/Type") in self.STRUCTURE_TYPES:
+            return None
+        length = stream_dict.get("/Length")
+        if isinstance(length, IndirectObject):
+            length = self.reader.get_object(length)
+        if not isinstance(length, int) or length < 0:
+            return None
+        data_end = data_start + length
+        trailer = data_end
+        while trailer < len(self._map) and self._map[trailer] in self._WHITESPACE:
+            trailer += 1
+        if self._map[trailer:trailer + 9] != b"endstream":
+            return None
+
+        refs = []
+        self._collect_refs(stream_dict, refs)
+        body = (self._view[dict_start:dict_end], b"\nstream\n",
+                self._view[data_start:data_end], b"\nendstream")
+        return body, tuple(refs), False
+
+    def _find_dictionary_end(self, start):
+        """Return the offset just past the dictionary starting at start, or None."""
+        data = self._map
+        if data[start:start + 2] != b"<<":
+            return None
+        depth = 0
+        position = start
+        size = len(data)
+        while position < size:
+            pair = data[position:position + 2]
+            char = pair[:1]
+            if pair == b"<<":
+                depth += 1
+                position += 2
+            elif pair == b">>":
+                depth -= 1
+                position += 2
+                if depth == 0:
+                    return position
+            elif char == b"(":
+                # Literal string: balanced parentheses with backslash escapes
+                nesting = 0
+                while position < size:
+                    char = data[position:position + 1]
+                    if char == b"\\":
+                        position += 2
+                        continue
+                    if char == b"(":
+                        nesting += 1
+                    elif char == b")":
+                        nesting -= 1
+                        if nesting == 0:
+                            break
+                    position += 1
+                position += 1
+            elif char == b"<":
+                # Hex string
+                position = data.find(b">", position)
+                if position < 0:
+                    return None
+                position += 1
+            elif char == b"%":
+                # Comment up to end of line
+                while position < size and data[position:position + 1] not in (b"\r", b"\n"):
+                    position += 1
+            else:
+                position += 1
+        return None
+
+# Chunk-writing engines selectable with --engine
+CHUNK_ENGINES = ("pypdf", "shared", "raw")
+
+def make_chunk_writer(reader, engine="pypdf", input_pdf_path=None, index_builder=None, page_index=None,
+                      metrics=None):
+    """
+    Return a function(start_page, end_page, output) writing one chunk to a
+    path or binary file object.
+
+    "pypdf" copies pages through a fresh PdfWriter per chunk; "shared" uses
+    SharedResourceWriter to reuse serialized objects across chunks; "raw"
+    uses RawStreamWriter, which also copies stream bytes straight from a
+    memory map of input_pdf_path.
+
+    With an index_builder every page written is also recorded in it; this
+    needs serialized objects, so "pypdf" is replaced by "shared". Pages are
+    looked up through page_index (a PageIndex) when one is given. Stages
+    are timed in metrics (a SplitMetrics) when one is given.
+    """
+    if engine == "raw":
+        writer = RawStreamWriter(reader, input_pdf_path, page_index)
+    elif engine == "shared" or index_builder is not None:
+        writer = SharedResourceWriter(reader, page_index)
+    else:
+        return functools.partial(write_chunk, reader, page_index=page_index, metrics=metrics)
+    writer.index_builder = index_builder
+    writer.metrics = metrics
+    return writer.write_chunk
+
+def copy_cached_chunk(cached_path, start_page, end_page, output):
+    """Chunk writer that copies a complete chunk previously stored in a SplitCache."""
+    import shutil
+    with open(cached_path, "rb") as source, _open_output(output) as output_pdf:
+        shutil.copyfileobj(source, output_pdf)
+    return end_page - start_page, []
+
+class PageSizeEstimator:
+    """
+    Estimates how many bytes each page adds to a chunk, without writing it.
+
+    A page costs its own dictionary plus every object it references; a
+    font or image used by several pages is stored once per chunk by the
+    chunk writers, so plan_size_chunks counts it once per chunk.
+    Dictionaries are measured by serializing them and streams by their
+    dictionary plus the length of their stored (still encoded) data, so
+    stream data is never decoded. Sizes and
+    references are kept per object, so resources shared across the
+    document are measured only once.
+    """
+
+    # "N G obj"/"endobj" framing and the xref entry of each object
+    OBJECT_OVERHEAD = 40
+    # Header, catalog, page tree and trailer of each chunk
+    CHUNK_OVERHEAD = 1024
+    # "stream"/"endstream" keywords around stream data
+    STREAM_OVERHEAD = 17
+
+    def __init__(self, reader, page_index=None):
+        _import_pypdf()
+        self.reader = reader
+        self.page_index = page_index
+        # (idnum, generation) -> (bytes, referenced keys, is structure node)
+        self._objects = {}
+
+    def _measure(self, key):
+        entry = self._objects.get(key)
+        if entry is not None:
+            return entry
+        obj = self.reader.get_object(IndirectObject(key[0], key[1], self.reader))
+        if not isinstance(obj, DictionaryObject):
+            buffer = io.BytesIO()
+            if obj is not None:
+                obj.write_to_stream(buffer)
+            refs = []
+            SharedResourceWriter._collect_refs(obj, refs)
+            entry = (len(buffer.getvalue()) + self.OBJECT_OVERHEAD, tuple(refs), False)
+        elif obj.get("/Type") in SharedResourceWriter.STRUCTURE_TYPES:
+            entry = (0, (), True)
+        else:
+            buffer = io.BytesIO()
+            DictionaryObject.write_to_stream(obj, buffer)
+            size = len(buffer.getvalue()) + self.OBJECT_OVERHEAD
+            skip_keys = ()
+            if isinstance(obj, StreamObject):
+                # pypdf drops /Length when parsing; _data holds the stream as stored in the file
+                size += len(obj._data) + self.STREAM_OVERHEAD
+                skip_keys = ("/Length",)
+            refs = []
+            SharedResourceWriter._collect_refs(obj, refs, skip_keys)
+            entry = (size, tuple(refs), False)
+        self._objects[key] = entry
+        return entry
+
+    def page_cost(self, j):
+        """Return (page bytes, {key: bytes}) for page j and every object it references."""
+        page = get_page(self.reader, j, self.page_index)
+        page_dict = DictionaryObject(
+            (key, value) for key, value in page.items() if key not in SharedResourceWriter.EXCLUDED_PAGE_KEYS
+        )
+        buffer = io.BytesIO()
+        page_dict.write_to_stream(buffer)
+        pending = []
+        SharedResourceWriter._collect_refs(page_dict, pending)
+        objects = {}
+        while pending:
+            key = pending.pop()
+            if key in objects:
+                continue
+            size, refs, is_structure = self._measure(key)
+            if is_structure:
+                continue
+            objects[key] = size
+            pending.extend(refs)
+        return len(buffer.getvalue()) + self.OBJECT_OVERHEAD, objects
+
+def plan_size_chunks(page_cost, total_pages, max_bytes, release=None):
+    """
+    Pack consecutive pages into chunks whose estimated size is at most max_bytes.
+
+    page_cost(j) returns (page bytes, {object key: bytes}) as
+    PageSizeEstimator.page_cost does; objects already in the chunk add
+    nothing. release, if given, is called after each page to drop parsed
+    objects.
+
+    Returns (chunk_ranges, oversized): the (start_page, end_page) of each
+    chunk and the pages that exceed max_bytes on their own.
+    """
+    chunk_ranges = []
+    oversized = []
+    start_page = 0
+    size = PageSizeEstimator.CHUNK_OVERHEAD
+    held = set()
+    for j in range(total_pages):
+        try:
+            page_bytes, objects = page_cost(j)
+        except Exception:
+            # The page is reported when its chunk is written
+            page_bytes, objects = 0, {}
+        added = page_bytes + sum(object_bytes for key, object_bytes in objects.items() if key not in held)
+        if j > start_page and size + added > max_bytes:
+            chunk_ranges.append((start_page, j))
+            start_page = j
+            size = PageSizeEstimator.CHUNK_OVERHEAD
+            held = set()
+            added = page_bytes + sum(objects.values())
+        size += added
+        held.update(objects)
+        if j == start_page and size > max_bytes:
+            oversized.append(j)
+        if release is not None:
+            release()
+    if total_pages:
+        chunk_ranges.append((start_page, total_pages))
+    return chunk_ranges, oversized
+
+class _HashingFile:
+    """Write-only file wrapper that counts and hashes everything written through it."""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.size = 0
+        self.sha256 = hashlib.sha256()
+
+    def write(self, data):
+        self.raw.write(data)
+        self.sha256.update(data)
+        self.size += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.size
+
+    def flush(self):
+        self.raw.flush()
+
+def write_checkpointed_chunk(chunk_writer, start_page, end_page, output_filename, keep=None):
+    """
+    Write a chunk through chunk_writer so it can be recorded in a ChunkManifest.
+
+    The chunk is written to a .part file, hashed while it is written, and
+    renamed into place only once complete, so an interrupted run never
+    leaves a truncated chunk under its final name. The .part name is unique
+    to this call, so two workers writing the same chunk never share a file.
+    With keep, the written chunk is only renamed into place if keep() is
+    still true; otherwise it is removed.
+
+    Returns (pages_added, warnings, size, sha256_hex); size and hash are None
+    when no page could be processed or the chunk was not kept.
+    """
+    part_filename = f"{output_filename}.{os.getpid()}-{uuid.uuid4().hex[:8]}.part"
+    try:
+        with open(part_filename, "wb") as part_file:
+            hashing_file = _HashingFile(part_file)
+            pages_added, warnings = chunk_writer(start_page, end_page, hashing_file)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(part_filename)
+        raise
+    if pages_added == 0 or (keep is not None and not keep()):
+        os.remove(part_filename)
+        return pages_added, warnings, None, None
+    os.replace(part_filename, output_filename)
+    return pages_added, warnings, hashing_file.size, hashing_file.sha256.hexdigest()
+
+def file_sha256(path, block_size=1024 * 1024):
+    """Return the SHA-256 hex digest of a file, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as source:
+        for block in iter(lambda: source.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def input_fingerprint(input_pdf_path, sample_size=64 * 1024):
+    """
+    Identify an input cheaply: its size plus a hash of its first and last bytes.
+
+    Good enough to tell whether a checkpoint belongs to the same file
+    without reading a multi-GB input in full.
+    """
+    digest = hashlib.sha256()
+    with open(input_pdf_path, "rb") as source:
+        size = source.seek(0, os.SEEK_END)
+        source.seek(0)
+        digest.update(source.read(sample_size))
+        source.seek(max(0, size - sample_size))
+        digest.update(source.read(sample_size))
+    return f"{size}:{digest.hexdigest()}"
+
+class ChunkManifest:
+    """
+    Checkpoint of completed chunks, kept as JSON lines next to the chunks.
+
+    The first line describes the split (input fingerprint, page count and
+    chunk size); each following line records one completed chunk with its
+    page range, size and SHA-256. Lines are flushed and fsynced as chunks
+    complete, so the manifest survives the process being killed.
+    """
+
+    SUFFIX = ".manifest.jsonl"
+
+    def __init__(self, output_folder, input_basename, header):
+        self.output_folder = output_folder
+        self.path = os.path.join(output_folder, f"{input_basename}{self.SUFFIX}")
+        self.header = dict(header, type="header")
+        self.completed = {}
+        self._file = None
+
+    def load(self):
+        """
+        Read an existing manifest and return the chunk numbers whose files are intact.
+
+        Raises an Exception if the manifest was written for a different input
+        or chunk size. Entries whose file is missing or whose size or hash no
+        longer match are dropped so those chunks are written again.
+        """
+        if not os.path.exists(self.path):
+            return set()
+
+        entries = {}
+        with open(self.path) as manifest_file:
+            lines = [json.loads(line) for line in manifest_file if line.strip()]
+        if not lines or lines[0].get("type") != "header":
+            raise Exception(f"Checkpoint manifest '{self.path}' is not valid")
+        if lines[0] != self.header:
+            raise Exception(f"Checkpoint manifest '{self.path}' was written for a different input or "
+                            f"chunk size; remove it or the output folder to start over")
+        for entry in lines[1:]:
+            entries[entry["chunk"]] = entry
+
+        for chunk_number, entry in entries.items():
+            chunk_path = os.path.join(self.output_folder, entry["file"])
+            if (os.path.isfile(chunk_path) and os.path.getsize(chunk_path) == entry["size"]
+                    and file_sha256(chunk_path) == entry["sha256"]):
+                self.completed[chunk_number] = entry
+        return set(self.completed)
+
+    def start(self):
+        """Rewrite the manifest with only verified entries and open it for appending."""
+        temporary_path = self.path + ".tmp"
+        with open(temporary_path, "w") as manifest_file:
+            manifest_file.write(json.dumps(self.header) + "\n")
+            for chunk_number in sorted(self.completed):
+                manifest_file.write(json.dumps(self.completed[chunk_number]) + "\n")
+        os.replace(temporary_path, self.path)
+        self._file = open(self.path, "a")
+
+    def record(self, chunk_number, chunk_name, start_page, end_page, size, sha256):
+        """Durably record a completed chunk."""
+        entry = {"chunk": chunk_number, "file": chunk_name, "pages": [start_page + 1, end_page],
+                 "size": size, "sha256": sha256}
+        self.completed[chunk_number] = entry
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+class PageIndexBuilder:
+    """
+    Records serialized pages and objects while chunks are written, and saves
+    them as the page index of a SplitCache entry.
+
+    Bodies are appended to an objects file as they are first seen, so memory
+    holds only their offsets. The index is saved only if every page was
+    recorded.
+    """
+
+    def __init__(self, entry_dir, header, total_pages):
+        self.entry_dir = entry_dir
+        self.header = header
+        self.objects_file = f"objects-{uuid.uuid4().hex}.bin"
+        self._objects_path = os.path.join(entry_dir, self.objects_file)
+        self._file = open(self._objects_path + ".tmp", "wb")
+        self._offset = 0
+        self._objects = {}
+        self._pages = [None] * total_pages
+
+    def _append(self, body):
+        start = self._offset
+        for part in (body if isinstance(body, tuple) else (body,)):
+            self._file.write(part)
+            self._offset += len(part)
+        return start, self._offset - start
+
+    def add_page(self, j, page_key, page_body, page_objects):
+        for key, body in page_objects.items():
+            if key not in self._objects:
+                self._objects[key] = self._append(body)
+        offset, length = self._append(page_body)
+        self._pages[j] = [page_key[0], page_key[1], offset, length, [list(key) for key in page_objects]]
+
+    def save(self):
+        """Publish the index if it is complete; returns whether it was saved."""
+        self._file.close()
+        if any(page is None for page in self._pages):
+            os.remove(self._objects_path + ".tmp")
+            return False
+
+        os.replace(self._objects_path + ".tmp", self._objects_path)
+        index_path = os.path.join(self.entry_dir, "index.json")
+        try:
+            with open(index_path) as index_file:
+                replaced = json.load(index_file).get("objects_file")
+        except (OSError, ValueError):
+            replaced = None
+        index = {
+            "version": SplitCache.INDEX_VERSION,
+            "header": self.header,
+            "objects_file": self.objects_file,
+            "objects": [[key[0], key[1], offset, length] for key, (offset, length) in self._objects.items()],
+            "pages": self._pages,
+        }
+        # A unique temporary name, so concurrent runs on the same entry cannot mix their writes
+        import tempfile
+        index_fd, temporary_path = tempfile.mkstemp(prefix="index-", suffix=".tmp", dir=self.entry_dir)
+        with os.fdopen(index_fd, "w") as index_file:
+            json.dump(index, index_file)
+        os.replace(temporary_path, index_path)
+
+        # Only the objects file of the index this one replaced; another run's may still be in use
+        if replaced and replaced != self.objects_file:
+            try:
+                os.remove(os.path.join(self.entry_dir, os.path.basename(replaced)))
+            except FileNotFoundError:
+                pass
+        return True
+
+class CachedIndexWriter(SharedResourceWriter):
+    """
+    SharedResourceWriter that assembles chunks from a SplitCache page index.
+
+    Page dictionaries and the objects each page needs were serialized when
+    the input was first split, so chunks are built from slices of the
+    memory-mapped objects file without opening the PDF at all.
+    """
+
+    def __init__(self, entry_dir):
+        _import_pypdf()
+        with open(os.path.join(entry_dir, "index.json")) as index_file:
+            index = json.load(index_file)
+        self.reader = None
+        self.page_index = None
+        self.index_builder = None
+        self.metrics = None
+        self.header = index["header"].encode("latin-1")
+        self._pages = index["pages"]
+        self._objects = {(idnum, generation): (offset, length)
+                         for idnum, generation, offset, length in index["objects"]}
+        with open(os.path.join(entry_dir, index["objects_file"]), "rb") as objects_file:
+            self._map = mmap.mmap(objects_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        # Slices past the end of a truncated file would silently come back short
+        end = max([offset + length for offset, length in self._objects.values()]
+                  + [page[2] + page[3] for page in self._pages], default=0)
+        if end > len(self._map):
+            raise Exception(f"objects file is truncated ({len(self._map)} of {end} bytes)")
+
+    @property
+    def total_pages(self):
+        return len(self._pages)
+
+    def page_cost(self, j):
+        """Return (page bytes, {key: bytes}) from the index, as PageSizeEstimator.page_cost does."""
+        _, _, _, length, object_keys = self._pages[j]
+        overhead = PageSizeEstimator.OBJECT_OVERHEAD
+        return length + overhead, {tuple(key): self._objects[tuple(key)][1] + overhead for key in object_keys}
+
+    def _page_entry(self, j, parent_ref, known):
+        # Pages were serialized with the same placeholder parent reference
+        idnum, generation, offset, length, object_keys = self._pages[j]
+        page_objects = {}
+        for key in map(tuple, object_keys):
+            if key not in known:
+                object_offset, object_length = self._objects[key]
+                page_objects[key] = self._view[object_offset:object_offset + object_length]
+        return (idnum, generation), bytes(self._view[offset:offset + length]), page_objects
+
+def default_cache_dir():
+    """Return the split cache directory under XDG_CACHE_HOME (~/.cache by default)."""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "pdf-splitter")
+
+class SplitCache:
+    """
+    On-disk cache of split inputs, keyed by the SHA-256 of the input's content.
+
+    Each input has an entry directory with a page index (see PageIndexBuilder)
+    and copies of the complete chunks written from it, named by page range.
+    A repeat split of the same content, with any chunk size, assembles chunks
+    from the index instead of parsing the PDF and copies chunks whose page
+    range was written before. After each run the least recently used entries
+    are evicted until the cache is no larger than max_mb.
+    """
+
+    INDEX_VERSION = 1
+
+    def __init__(self, cache_dir, input_pdf_path, max_mb=DEFAULT_CACHE_MAX_MB):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_mb * 1024 * 1024
+        self.key = file_sha256(input_pdf_path)
+        self.entry_dir = os.path.join(cache_dir, self.key)
+        os.makedirs(os.path.join(self.entry_dir, "chunks"), exist_ok=True)
+        # The entry's modification time orders eviction
+        os.utime(self.entry_dir)
+        self._index_writer = None
+
+    @property
+    def has_index(self):
+        index_path = os.path.join(self.entry_dir, "index.json")
+        if not os.path.exists(index_path):
+            return False
+        try:
+            with open(index_path) as index_file:
+                return json.load(index_file).get("version") == self.INDEX_VERSION
+        except ValueError:
+            return False
+
+    def index_writer(self):
+        """Return the CachedIndexWriter for this entry's index."""
+        if self._index_writer is None:
+            self._index_writer = CachedIndexWriter(self.entry_dir)
+        return self._index_writer
+
+    def discard(self):
+        """Remove this entry's index and chunks, e.g. after finding them damaged."""
+        import shutil
+        self._index_writer = None
+        shutil.rmtree(self.entry_dir, ignore_errors=True)
+        os.makedirs(os.path.join(self.entry_dir, "chunks"), exist_ok=True)
+
+    def index_builder(self, header, total_pages):
+        return PageIndexBuilder(self.entry_dir, header, total_pages)
+
+    def _chunk_file(self, start_page, end_page):
+        return os.path.join(self.entry_dir, "chunks", f"{start_page + 1}-{end_page}.pdf")
+
+    def chunk_path(self, start_page, end_page):
+        """Return the cached chunk for pages [start_page, end_page), or None."""
+        path = self._chunk_file(start_page, end_page)
+        return path if os.path.exists(path) else None
+
+    def store_chunk(self, start_page, end_page, source):
+        """Store a complete chunk given as a file path or bytes-like object."""
+        import shutil
+        path = self._chunk_file(start_page, end_page)
+        temporary_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        if isinstance(source, str):
+            shutil.copyfile(source, temporary_path)
+        else:
+            with open(temporary_path, "wb") as cached_file:
+                cached_file.write(source)
+        os.replace(temporary_path, path)
+
+    def evict(self):
+        """Remove least recently used entries (never this one) until under max_bytes."""
+        import shutil
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            entry_dir = os.path.join(self.cache_dir, name)
+            if not os.path.isdir(entry_dir):
+                continue
+            size = sum(os.path.getsize(os.path.join(folder, file_name))
+                       for folder, _, file_names in os.walk(entry_dir) for file_name in file_names)
+            entries.append((os.path.getmtime(entry_dir), entry_dir, size))
+
+        total = sum(size for _, _, size in entries)
+        for _, entry_dir, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if entry_dir != self.entry_dir:
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                total -= size
+
+class WriteBehind:
+    """
+    Writes finished chunks to disk from a background thread.
+
+    Chunks are serialized into memory and handed to submit(), which returns
+    as soon as the buffer is queued, so the next chunk is built while this
+    one is still being written. At most max_pending buffers wait in the
+    queue; submit() blocks beyond that, which bounds the memory held to
+    max_pending chunks. max_pending=0 writes in the calling thread instead.
+
+    With fsync_every, written files are kept open and fsynced (with their
+    directory) every fsync_every files and at close(), so a batch of chunks
+    costs one round of syncs rather than one per file. A batch ends early
+    once MAX_OPEN_FILES files are waiting, so a large fsync_every cannot
+    run the process out of file descriptors.
+    """
+
+    # Written files held open for the next sync, at most
+    MAX_OPEN_FILES = 64
+
+    def __init__(self, max_pending=2, fsync_every=0):
+        self.max_pending = max_pending
+        self.fsync_every = fsync_every
+        self.failures = []
+        # Seconds and calls of the "disk_write" and "fsync" stages, for SplitMetrics
+        self.stages = {}
+        self._unsynced = []
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        if max_pending > 0:
+            import queue
+            self._queue = queue.Queue(maxsize=max_pending)
+            self._thread = threading.Thread(target=self._run, name="pdf-splitter-write-behind", daemon=True)
+            self._thread.start()
+
+    def submit(self, path, data):
+        """Queue data (bytes or a buffer) to be written to path."""
+        if self._queue is None:
+            self._write(path, data)
+        else:
+            self._queue.put((path, data))
+
+    def take_failures(self):
+        """Return the (path, error message) of writes that failed since the last call."""
+        with self._lock:
+            failures, self.failures = self.failures, []
+        return failures
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            self._write(*item)
+
+    def _add_stage(self, name, started):
+        with self._lock:
+            totals = self.stages.setdefault(name, [0.0, 0])
+            totals[0] += time.perf_counter() - started
+            totals[1] += 1
+
+    def _write(self, path, data):
+        started = time.perf_counter()
+        try:
+            output_file = open(path, "wb")
+            try:
+                output_file.write(data)
+            except BaseException:
+                output_file.close()
+                os.remove(path)
+                raise
+        except Exception as e:
+            with self._lock:
+                self.failures.append((path, f"Failed to write to '{path}': {str(e)}"))
+            return
+        self._add_stage("disk_write", started)
+
+        if not self.fsync_every:
+            output_file.close()
+            return
+        self._unsynced.append(output_file)
+        if len(self._unsynced) >= min(self.fsync_every, self.MAX_OPEN_FILES):
+            self._sync()
+
+    def _sync(self):
+        started = time.perf_counter()
+        directories = set()
+        for output_file in self._unsynced:
+            try:
+                output_file.flush()
+                os.fsync(output_file.fileno())
+                directories.add(os.path.dirname(os.path.abspath(output_file.name)))
+            except OSError as e:
+                with self._lock:
+                    self.failures.append((output_file.name, f"Failed to sync '{output_file.name}': {str(e)}"))
+            finally:
+                output_file.close()
+        self._unsynced = []
+        # New directory entries are only durable once the directory is synced
+        for directory in directories:
+            with contextlib.suppress(OSError):
+                directory_fd = os.open(directory, os.O_RDONLY)
+                try:
+                    os.fsync(directory_fd)
+                finally:
+                    os.close(directory_fd)
+        self._add_stage("fsync", started)
+
+    def close(self):
+        """Wait for queued writes, sync what is left and return the remaining failures."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        if self._unsynced:
+            self._sync()
+        return self.take_failures()
+
+class ArchiveSink:
+    """
+    Collects chunks as members of a single zip or tar archive, or of a stream.
+
+    The archive is streamed to target, a path or "-" for stdout, as chunks are
+    added; each chunk is taken from memory, so no temporary files are written.
+    The format is "zip", "tar" or "tar.gz", guessed from the target's
+    extension when not given (tar for stdout), or one of two pipeline stream
+    formats:
+
+    - "length-prefixed": per chunk, a big-endian uint32 name length, the UTF-8
+      name, a big-endian uint64 data length and the PDF bytes
+    - "multipart": a MIME multipart/mixed message, one application/pdf part
+      per chunk with a Content-Length header
+    """
+
+    FORMATS = ("zip", "tar", "tar.gz", "length-prefixed", "multipart")
+
+    def __init__(self, target, archive_format=None):
+        self.target = target
+        self.format = archive_format or self.guess_format(target)
+        if target == "-":
+            self._file = sys.stdout.buffer
+            self._owns_file = False
+        else:
+            self._file = open(target, "wb")
+            self._owns_file = True
+        self._archive = None
+        if self.format == "zip":
+            import zipfile
+            # PDFs are already compressed; storing them keeps this I/O-bound
+            self._archive = zipfile.ZipFile(self._file, "w", compression=zipfile.ZIP_STORED)
+        elif self.format in ("tar", "tar.gz"):
+            import tarfile
+            mode = "w|gz" if self.format == "tar.gz" else "w|"
+            self._archive = tarfile.open(fileobj=self._file, mode=mode)
+        elif self.format == "multipart":
+            self._boundary = f"pdf-splitter-{uuid.uuid4().hex}"
+            self._file.write(f"MIME-Version: 1.0\r\nContent-Type: multipart/mixed; "
+                             f"boundary=\"{self._boundary}\"\r\n\r\n".encode())
+        self.members = 0
+
+    @staticmethod
+    def guess_format(target):
+        name = target.lower()
+        if name.endswith(".zip"):
+            return "zip"
+        if name.endswith((".tar.gz", ".tgz")):
+            return "tar.gz"
+        return "tar"
+
+    def add(self, name, data):
+        """Add one member holding data (bytes or a buffer)."""
+        if self.format == "length-prefixed":
+            encoded_name = name.encode("utf-8")
+            self._file.write(struct.pack(">I", len(encoded_name)) + encoded_name + struct.pack(">Q", len(data)))
+            self._file.write(data)
+        elif self.format == "multipart":
+            self._file.write(f"--{self._boundary}\r\nContent-Type: application/pdf\r\n"
+                             f"Content-Disposition: attachment; filename=\"{name}\"\r\n"
+                             f"Content-Length: {len(data)}\r\n\r\n".encode())
+            self._file.write(data)
+            self._file.write(b"\r\n")
+        elif self.format == "zip":
+            import zipfile
+            info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+            self._archive.writestr(info, bytes(data) if not isinstance(data, bytes) else data)
+        else:
+            import tarfile
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = int(time.time())
+            self._archive.addfile(info, io.BytesIO(data))
+        self.members += 1
+
+    def add_folder_chunks(self, folder, input_basename):
+        """Add the {input_basename}_{n}.pdf files of folder in chunk order."""
+        pattern = re.compile(rf"^{re.escape(input_basename)}_(\d+)\.pdf$")
+        names = sorted((int(match.group(1)), name) for name in os.listdir(folder)
+                       for match in [pattern.match(name)] if match)
+        for _, name in names:
+            with open(os.path.join(folder, name), "rb") as chunk_file:
+                self.add(name, chunk_file.read())
+
+    def close(self):
+        if self._archive is not None:
+            self._archive.close()
+        elif self.format == "multipart":
+            self._file.write(f"--{self._boundary}--\r\n".encode())
+        if self._owns_file:
+            self._file.close()
+        else:
+            self._file.flush()
+
+# Per-process reader and memory guard used by the --jobs worker pool,
+# set up once by _init_chunk_worker
+_worker_reader = None
+_worker_guard = None
+_worker_chunk_writer = None
+_worker_metrics = None
+
+def _init_chunk_worker(input_pdf_path, reader_kwargs, gc_rss_mb, gc_alloc_blocks, engine, use_mmap,
+                       index_dir=None, page_index=None, collect_metrics=False):
+    """Open the input PDF (or a SplitCache index in index_dir) once in each worker process."""
+    global _worker_reader, _worker_guard, _worker_chunk_writer, _worker_metrics
+    _worker_metrics = SplitMetrics() if collect_metrics else None
+    _worker_guard = MemoryGuard(gc_rss_mb, gc_alloc_blocks, _worker_metrics)
+    if index_dir is not None:
+        _worker_reader = None
+        cached_writer = CachedIndexWriter(index_dir)
+        cached_writer.metrics = _worker_metrics
+        _worker_chunk_writer = cached_writer.write_chunk
+        return
+    _worker_reader = open_reader(input_pdf_path, use_mmap, **reader_kwargs)
+    _worker_chunk_writer = make_chunk_writer(_worker_reader, engine, input_pdf_path, page_index=page_index,
+                                             metrics=_worker_metrics)
+
+def _write_chunk_in_worker(chunk_number, start_page, end_page, output_filename, checkpoint=False,
+                           cached_path=None):
+    """
+    Write one chunk using the worker's own reader.
+
+    With output_filename None the chunk is returned as bytes (for archives).
+    With checkpoint, the chunk's (size, sha256) is returned for the manifest.
+    With cached_path, the chunk is copied from a SplitCache instead.
+    When the worker collects metrics, the chunk's (seconds, stage totals)
+    are returned as well.
+    """
+    started = time.perf_counter()
+    output = output_filename if output_filename is not None else io.BytesIO()
+    checksum = None
+    chunk_writer = _worker_chunk_writer if cached_path is None else functools.partial(copy_cached_chunk, cached_path)
+    try:
+        if checkpoint:
+            pages_added, warnings, size, sha256 = write_checkpointed_chunk(
+                chunk_writer, start_page, end_page, output_filename)
+            checksum = (size, sha256)
+        else:
+            pages_added, warnings = chunk_writer(start_page, end_page, output)
+    finally:
+        _worker_guard.release(_worker_reader)
+    data = output.getvalue() if output_filename is None and pages_added else None
+    timing = None
+    if _worker_metrics is not None:
+        timing = (time.perf_counter() - started, _worker_metrics.take_stages())
+    return chunk_number, pages_added, warnings, data, checksum, timing
+
+def _split_chunks_parallel(input_pdf_path, reader_kwargs, chunk_ranges,
+                           output_folder, input_basename, jobs, show_progress=True,
+                           gc_rss_mb=None, gc_alloc_blocks=DEFAULT_GC_ALLOC_BLOCKS, engine="pypdf",
+                           use_mmap=False, archive=None, manifest=None, cache=None, page_index=None,
+                           chunk_names=None, metrics=None):
+    """
+    Write chunks, given as (start_page, end_page) ranges, concurrently using
+    a pool of worker processes.
+
+    Each worker opens its own PdfReader on the input (and is handed the
+    parent's PageIndex, so it does not walk the page tree) and writes disjoint chunks
+    through the same chunk writer used by the serial path, so the output files
+    are identical. Progress is reported as chunks complete, in any order.
+    With an ArchiveSink, workers return chunk bytes and they are added to the
+    archive in chunk order; chunks that finish early are held in memory, and
+    no more than ARCHIVE_REORDER_WINDOW chunks per worker are submitted past
+    the oldest one not yet added, which bounds what is held. With a ChunkManifest, chunks it already lists as
+    complete are skipped and new ones are recorded as they finish.
+
+    With a SplitCache, workers build chunks from its page index when it has
+    one, chunks it holds are copied, and new complete chunks are stored in it.
+    chunk_names, if given, names each chunk instead of "<basename>_<n>.pdf".
+    With metrics (a SplitMetrics), workers time their stages and the totals
+    are added to it as each chunk is reported.
+    """
+    import collections
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+    total_chunks = len(chunk_ranges)
+    completed = set(manifest.completed) if manifest is not None else set()
+    workers = max(1, min(jobs, total_chunks - len(completed)))
+    click.echo(f"⚙️  Writing {total_chunks - len(completed)} chunks with {workers} worker processes...")
+    index_dir = cache.entry_dir if cache is not None and cache.has_index else None
+
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=_init_chunk_worker,
+                             initargs=(input_pdf_path, reader_kwargs, gc_rss_mb, gc_alloc_blocks,
+                                       engine, use_mmap, index_dir, page_index,
+                                       metrics is not None)) as executor:
+        futures = {}
+
+        def submit(chunk_number):
+            i, end_page = chunk_ranges[chunk_number - 1]
+            chunk_name = chunk_names[chunk_number - 1] if chunk_names else f"{input_basename}_{chunk_number}.pdf"
+            output_filename = os.path.join(output_folder, chunk_name) if archive is None else None
+            cached_path = cache.chunk_path(i, end_page) if cache is not None else None
+            future = executor.submit(_write_chunk_in_worker, chunk_number, i, end_page, output_filename,
+                                     manifest is not None, cached_path)
+            futures[future] = (chunk_number, chunk_name, output_filename, i, end_page, cached_path)
+            return future
+
+        to_submit = collections.deque(chunk_number for chunk_number in range(1, total_chunks + 1)
+                                      if chunk_number not in completed)
+        # Chunks finish in any order; they are added to the archive in chunk
+        # order, holding early arrivals, so its members are the same every run
+        archive_order = collections.deque(to_submit)
+        held = {}
+        window = workers * ARCHIVE_REORDER_WINDOW if archive is not None else len(to_submit)
+
+        def finished():
+            """Yield futures as they complete, submitting chunks while fewer than window are running or held."""
+            running = set()
+            while True:
+                while to_submit and len(running) + len(held) < window:
+                    running.add(submit(to_submit.popleft()))
+                if not running:
+                    return
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                yield from done
+
+        def add_in_order(chunk_number, chunk_name, data):
+            held[chunk_number] = (chunk_name, data)
+            while archive_order and archive_order[0] in held:
+                chunk_name, data = held.pop(archive_order.popleft())
+                if data is not None:
+                    archive.add(chunk_name, data)
+
+        def report(future):
+            # Dropping the future releases the chunk bytes it returned
+            chunk_number, chunk_name, output_filename, start_page, end_page, cached_path = futures.pop(future)
+            try:
+                _, pages_added, warnings, data, checksum, timing = future.result()
+                if archive is not None:
+                    add_in_order(chunk_number, chunk_name, data)
+                if manifest is not None and pages_added:
+                    with _stage(metrics, "fsync"):
+                        manifest.record(chunk_number, chunk_name, start_page, end_page, *checksum)
+                if metrics is not None:
+                    seconds, stages = timing
+                    metrics.merge_stages(stages)
+                    if pages_added:
+                        size = len(data) if data is not None else os.path.getsize(output_filename)
+                        metrics.chunk(chunk_number, chunk_name, start_page, end_page, pages_added, size, seconds)
+                if (cache is not None and cached_path is None and not warnings
+                        and pages_added == end_page - start_page):
+                    cache.store_chunk(start_page, end_page, data if data is not None else output_filename)
+            except Exception as e:
+                if archive is not None and chunk_number in archive_order and chunk_number not in held:
+                    add_in_order(chunk_number, chunk_name, None)
+                click.echo(f"❌ Error processing chunk {chunk_number}: {str(e)}", err=True)
+                return
+            for warning in warnings:
+                click.echo(warning, err=True)
+            if pages_added == 0:
+                click.echo(f"❌ Skipping chunk {chunk_number}: No pages could be processed", err=True)
+            elif not show_progress:
+                click.echo(f"✅ Created: {output_filename or chunk_name} ({pages_added} pages)")
+
+        if show_progress:
+            with click.progressbar(length=total_chunks,
+                                 label=f'Creating PDF files ({workers} jobs)',
+                                 show_eta=True,
+                                 show_percent=True) as progress_bar:
+                progress_bar.update(len(completed))
+                for future in finished():
+                    report(future)
+                    progress_bar.update(1)
+        else:
+            for future in finished():
+                report(future)
+
+    click.echo(f"✅ Successfully created {total_chunks} chunks")
+
+def split_pdf_by_chunks(input_pdf_path, pages_per_chunk=5, output_folder="output_chunks", show_progress=True, jobs=1,
+                        gc_rss_mb=None, gc_alloc_blocks=DEFAULT_GC_ALLOC_BLOCKS, engine="pypdf",
+                        use_mmap=None, archive=None, output_basename=None, resume=False,
+                        cache_dir=None, cache_max_mb=DEFAULT_CACHE_MAX_MB, save_page_index=False,
+                        max_size_mb=None, outline_level=None, metrics=None, write_behind=0, fsync_every=0,
+                        backend="pypdf"):
+    """
+    Splits a PDF file into multiple PDF files, each containing a specified number of pages.
+    Optimized for large PDF files by using memory-efficient processing.
+
+    With jobs > 1, chunks are written concurrently by that many worker processes,
+    each with its own reader on the input file. Output is the same as the serial path.
+    The pdftk fallback also runs up to jobs pdftk processes at a time.
+
+    Memory is bounded by a MemoryGuard: parsed objects are released after every
+    chunk, and a full garbage collection only runs once gc_rss_mb or
+    gc_alloc_blocks is exceeded.
+
+    engine selects how chunks are built (see make_chunk_writer): "pypdf",
+    "shared", which serializes objects shared between chunks only once, or
+    "raw", which additionally copies stream bytes directly from the input.
+
+    use_mmap reads the input through a memory map (see open_reader) so that
+    memory use follows the chunk being written rather than the input size.
+    None enables it for inputs larger than LARGE_FILE_MB.
+
+    With archive (an ArchiveSink), chunks are added to the archive from memory
+    instead of being written to output_folder.
+
+    output_basename overrides the input's basename in chunk names (used for stdin).
+
+    With resume, a ChunkManifest in output_folder records each completed chunk
+    with its size and SHA-256; if one already exists, it is verified and only
+    chunks that are missing or damaged are written again.
+
+    With cache_dir, a SplitCache keyed by the input's content hash is used:
+    the first split records a page index (chunks are then written with the
+    "shared" engine unless "raw" is selected), later splits of the same
+    content skip parsing and copy chunks with the same page range. The
+    cache is trimmed to cache_max_mb afterwards.
+
+    Pages are accessed through a PageIndex built from one walk of the page
+    tree; with save_page_index it is also saved next to the input as
+    "<input>.pageindex" and reused by later runs while the input is unchanged.
+
+    With max_size_mb, pages_per_chunk is ignored and consecutive pages are
+    packed into chunks whose estimated size stays within max_size_mb (see
+    PageSizeEstimator); a single page larger than that gets a chunk of its own.
+
+    With outline_level, pages_per_chunk is ignored and a chunk starts at each
+    outline (bookmark) entry nested at most outline_level deep (see
+    outline_sections); chunks are named after the entries' titles.
+
+    With metrics (a SplitMetrics), stage timings, a "chunk" event per chunk
+    written and the path used (pypdf, the cache or an external tool) are
+    recorded in it; run the split inside metrics.record() for a summary.
+
+    With write_behind, up to that many serialized chunks are queued for a
+    background thread to write while the next chunk is built (see
+    WriteBehind); with fsync_every, chunk files and the output folder are
+    fsynced in batches of that many files (at most WriteBehind.MAX_OPEN_FILES).
+    Both apply to the serial path writing to output_folder.
+
+    backend selects what splits the file (see BACKENDS): "pypdf" is the
+    path described above, "qpdf", "pdftk" and "pikepdf" hand the whole split
+    to that tool and only support splitting by pages_per_chunk. "auto" uses
+    select_backend() unless an option only pypdf supports is given. When
+    another backend fails, the split is retried with pypdf; when pypdf cannot
+    read the file, the FALLBACK_BACKENDS that are available are tried.
+    With "auto", files that inspect_pdf_bytes finds truncated or without a
+    usable xref go to the REPAIR_BACKENDS first, unless an option needs
+    pypdf; a backend given explicitly, "pypdf" by default, is always tried
+    first.
+
+    For example:
+    - Input: "your_document.pdf" -> Output: "your_document_1.pdf", "your_document_2.pdf", etc.
+    - Input: "report.pdf" -> Output: "report_1.pdf", "report_2.pdf", etc.
+    """
+    try:
+        # Check file size and warn if very large
+        file_size = os.path.getsize(input_pdf_path)
+        file_size_mb = file_size / (1024 * 1024)
+
+        if file_size_mb > LARGE_FILE_MB:  # Warn for files larger than 100MB
+            click.echo(f"⚠️  Large file detected: {file_size_mb:.1f}MB. Processing may take some time...")
+
+        pypdf_only = (resume or cache_dir is not None or save_page_index or max_size_mb is not None
+                      or outline_level is not None or engine != "pypdf" or use_mmap or write_behind or fsync_every)
+        requested_backend = backend
+        if backend == "auto":
+            backend = "pypdf" if pypdf_only else select_backend(input_pdf_path, pages_per_chunk, jobs, metrics)
+        elif backend != "pypdf" and pypdf_only:
+            raise OptionError(f"The {backend} backend only splits by page count; the options given need pypdf")
+        # Calibration opens the file the way the pypdf path below does; reuse that parse
+        probed = BACKENDS["pypdf"].take_probe(input_pdf_path)
+        failed_backends = set()
+        if backend != "pypdf":
+            click.echo(f"🔧 Using the {backend} backend")
+            try:
+                _split_with_backend(BACKENDS[backend], input_pdf_path, pages_per_chunk, output_folder,
+                                    output_basename or os.path.splitext(os.path.basename(input_pdf_path))[0],
+                                    show_progress, jobs, archive, metrics)
+                return
+            except Exception as backend_error:
+                click.echo(f"⚠️  {backend} failed: {str(backend_error)}")
+                click.echo("↩️  Splitting with pypdf instead...")
+                failed_backends.add(backend)
+
+        if use_mmap is None:
+            use_mmap = file_size_mb > LARGE_FILE_MB
+        if use_mmap:
+            click.echo("🗺️  Reading input through a memory map")
+
+        cache = SplitCache(cache_dir, input_pdf_path, cache_max_mb) if cache_dir is not None else None
+
+        # With auto, a truncated file or one without a usable xref is handed to a
+        # tool that reconstructs it first, rather than to pypdf; options only pypdf
+        # supports, and a cached index (the same content was parsed before), keep
+        # pypdf first
+        damage = []
+        if requested_backend == "auto" and not pypdf_only and cache is None:
+            damage = [issue for issue in inspect_pdf_bytes(input_pdf_path) if issue in REPAIR_FIRST_ISSUES]
+        if damage:
+            repairers = [BACKENDS[name] for name in REPAIR_BACKENDS
+                         if name not in failed_backends and BACKENDS[name].available()]
+            if repairers:
+                click.echo(f"🩹 Detected {', '.join(damage)}; trying tools that repair the file while reading it")
+            for repairer in repairers:
+                try:
+                    _split_with_backend(repairer, input_pdf_path, pages_per_chunk, output_folder,
+                                        output_basename or os.path.splitext(os.path.basename(input_pdf_path))[0],
+                                        show_progress, jobs, archive, metrics)
+                    return
+                except Exception as repair_error:
+                    click.echo(f"⚠️  {repairer.name} failed: {str(repair_error)}")
+                    failed_backends.add(repairer.name)
+
+        # Parse the file once and classify it before choosing a strategy
+        click.echo("📖 Reading PDF file...")
+        reader = None
+        reader_kwargs = {}
+        page_index = None
+
+        # The outline is read from the document itself
+        cached_writer = None
+        if cache is not None and cache.has_index and outline_level is None:
+            try:
+                with _stage(metrics, "open"):
+                    cached_writer = cache.index_writer()
+            except Exception as cache_error:
+                # A damaged cache entry says nothing about the input; parse it instead
+                click.echo(f"⚠️  Split cache entry is damaged ({str(cache_error)}); removing it and parsing the PDF")
+                cache.discard()
+
+        try:
+            if cached_writer is not None:
+                total_pages = cached_writer.total_pages
+                if metrics is not None:
+                    metrics.path = "cache"
+                click.echo(f"♻️  Using cached page index for {total_pages} pages (parsing skipped)")
+            else:
+                page_index_path = input_pdf_path + ".pageindex" if save_page_index else None
+                with _stage(metrics, "open"):
+                    reader, reader_kwargs, issues, page_index = probed or probe_pdf(input_pdf_path, use_mmap, page_index_path)
+                if metrics is not None:
+                    metrics.path = "pypdf"
+                total_pages = len(page_index) if page_index is not None else len(reader.pages)
+                detected = f"; detected: {', '.join(issues)}" if issues else ""
+                click.echo(f"✅ Successfully read PDF with {total_pages} pages (permissive mode{detected})")
+        except Exception as probe_error:
+            # pypdf cannot read the file, try external tools
+            click.echo(f"⚠️  pypdf failed: {str(probe_error)}")
+            click.echo("❌ pypdf could not read the file. Trying external tools...")
+
+            # Extract the base filename for external tools
+            input_basename = output_basename or os.path.splitext(os.path.basename(input_pdf_path))[0]
+
+            # pdftk first (most reliable for corrupted PDFs), then qpdf and pikepdf
+            fallbacks = [BACKENDS[name] for name in FALLBACK_BACKENDS
+                         if name not in failed_backends and BACKENDS[name].available()]
+            if fallbacks and (max_size_mb is not None or outline_level is not None):
+                click.echo(f"⚠️  External tools can only split by page count; using {pages_per_chunk} "
+                           f"pages per chunk instead")
+
+            for fallback in fallbacks:
+                try:
+                    _split_with_backend(fallback, input_pdf_path, pages_per_chunk, output_folder, input_basename,
+                                        show_progress, jobs, archive, metrics)
+                    return  # Success! Exit the function
+                except Exception as fallback_error:
+                    click.echo(f"⚠️  {fallback.name} failed: {str(fallback_error)}")
+
+            # All methods failed
+            error_msg = f"""Failed to read PDF file '{input_pdf_path}' using all available methods:
+
+PyPDF (permissive mode, empty password for encrypted files):
+{str(probe_error)}
+
+External tools:
+- pdftk: {'Available' if check_external_tool('pdftk') else 'Not installed'}
+- qpdf: {'Available' if check_external_tool('qpdf') else 'Not installed'}
+- pikepdf: {'Available' if BACKENDS['pikepdf'].available() else 'Not installed (optional, pip install pikepdf)'}
+
+This PDF file appears to be severely corrupted or uses an unsupported format.
+
+Install external tools for better corruption handling:
+- macOS: brew install pdftk-java qpdf
+- Ubuntu/Debian: sudo apt install pdftk qpdf
+- CentOS/RHEL: sudo yum install pdftk qpdf
+
+Manual alternatives:
+- Online tools: SmallPDF, ILovePDF split tools
+- PDF repair tools before splitting
+- Convert to images and back to PDF"""
+            raise PdfReadError(error_msg)
+
+    except SplitError:
+        # Bad options and our own read errors are passed on as they are
+        raise
+    except Exception as e:
+        if "Failed to read PDF file" in str(e):
+            raise e  # Re-raise our detailed error message
+        else:
+            raise PdfReadError(f"Failed to read PDF file '{input_pdf_path}': {str(e)}")
+
+    # Extract the base filename without extension from the input path
+    input_basename = output_basename or os.path.splitext(os.path.basename(input_pdf_path))[0]
+
+    if archive is None and not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+
+    chunk_names = None
+    page_cost = None
+    if max_size_mb is not None and outline_level is None:
+        click.echo(f"📏 Estimating page sizes for chunks of at most {max_size_mb:g}MB...")
+        if reader is None:
+            page_cost = cache.index_writer().page_cost
+    release = MemoryGuard(gc_rss_mb, gc_alloc_blocks, metrics).release
+    chunk_ranges, titles, oversized = plan_chunk_ranges(reader, page_index, total_pages, pages_per_chunk,
+                                                        max_size_mb, outline_level, page_cost,
+                                                        lambda: release(reader), metrics)
+    if titles is not None:
+        click.echo(f"🔖 Found {len(titles)} outline sections at level {outline_level} or above")
+        chunk_names = [f"{input_basename}_{n}_{outline_slug(title)}.pdf" for n, title in enumerate(titles, start=1)]
+    for j in oversized:
+        click.echo(f"⚠️  Warning: Page {j + 1} alone is estimated above {max_size_mb:g}MB", err=True)
+    total_chunks = len(chunk_ranges)
+
+    manifest = None
+    completed = set()
+    if resume:
+        if archive is not None:
+            raise OptionError("Resuming is not supported when writing to an archive")
+        header = {
+            "input": input_fingerprint(input_pdf_path),
+            "total_pages": total_pages,
+            "pages_per_chunk": pages_per_chunk,
+        }
+        if outline_level is not None:
+            header.update(pages_per_chunk=None, outline_level=outline_level)
+        elif max_size_mb is not None:
+            header.update(pages_per_chunk=None, max_size_mb=max_size_mb)
+        manifest = ChunkManifest(output_folder, input_basename, header)
+        completed = manifest.load()
+        if completed:
+            click.echo(f"♻️  Resuming: {len(completed)} of {total_chunks} chunks already complete and verified")
+        manifest.start()
+
+    try:
+        if jobs > 1 and total_chunks - len(completed) > 1:
+            _split_chunks_parallel(input_pdf_path, reader_kwargs, chunk_ranges,
+                                   output_folder, input_basename, jobs, show_progress,
+                                   gc_rss_mb, gc_alloc_blocks, engine, use_mmap, archive, manifest, cache,
+                                   page_index, chunk_names, metrics)
+            return
+
+        _split_chunks_serial(reader, input_pdf_path, total_pages, chunk_ranges, output_folder,
+                             input_basename, show_progress, gc_rss_mb, gc_alloc_blocks, engine,
+                             archive, manifest, cache, page_index, chunk_names, metrics,
+                             write_behind, fsync_every)
+    finally:
+        if manifest is not None:
+            manifest.close()
+        if cache is not None:
+            cache.evict()
+
+def plan_chunk_ranges(reader, page_index, total_pages, pages_per_chunk, max_size_mb=None, outline_level=None,
+                      page_cost=None, release=None, metrics=None):
+    """
+    Divide total_pages into the (start_page, end_page) ranges of the chunks to write.
+
+    Ranges hold pages_per_chunk pages, or follow the outline (see
+    outline_sections) with outline_level, or are packed to max_size_mb (see
+    plan_size_chunks) using page_cost, a PageSizeEstimator's by default.
+    release is called between estimated pages. Outline and size planning
+    are timed as the "plan" stage of metrics, if given.
+
+    Returns (chunk_ranges, titles, oversized): titles are the outline
+    entries' titles (None unless outline_level is given) and oversized the
+    pages estimated above max_size_mb on their own.
+    """
+    if outline_level is not None:
+        with _stage(metrics, "plan"):
+            sections = outline_sections(reader, page_index, total_pages, outline_level)
+        return [(start_page, end_page) for start_page, end_page, _ in sections], [title for _, _, title in sections], []
+    if max_size_mb is not None:
+        if page_cost is None:
+            page_cost = PageSizeEstimator(reader, page_index).page_cost
+        with _stage(metrics, "plan"):
+            chunk_ranges, oversized = plan_size_chunks(page_cost, total_pages, int(max_size_mb * 1024 * 1024), release)
+        return chunk_ranges, None, oversized
+    return [(i, min(i + pages_per_chunk, total_pages)) for i in range(0, total_pages, pages_per_chunk)], None, []
+
+def outline_sections(reader, page_index, total_pages, level=1):
+    """
+    Return (start_page, end_page, title) sections, one per outline entry
+    nested at most level deep (1 = top-level entries only).
+
+    The outline is read once and its destinations resolved through a single
+    page-reference-to-index map, instead of searching the pages for each
+    entry. Entries are ordered by page; a later entry pointing to the same
+    page as an earlier one is dropped. Pages before the first entry form a
+    "front_matter" section. Raises an Exception if no entry qualifies.
+    """
+    _import_pypdf()
+    if page_index is not None:
+        page_numbers = {key: j for j, key in enumerate(zip(page_index.idnums, page_index.generations))}
+    else:
+        page_numbers = {(page.indirect_reference.idnum, page.indirect_reference.generation): j
+                        for j, page in enumerate(reader.pages) if page.indirect_reference is not None}
+
+    try:
+        outline = reader.outline
+    except Exception as e:
+        raise Exception(f"Could not read the outline: {str(e)}")
+
+    starts = {}
+    # Nested lists hold the children of the entry before them
+    stack = [(iter(outline), 1)]
+    while stack:
+        items, depth = stack[-1]
+        item = next(items, None)
+        if item is None:
+            stack.pop()
+        elif isinstance(item, list):
+            if depth < level:
+                stack.append((iter(item), depth + 1))
+        else:
+            page = item.get("/Page")
+            if isinstance(page, IndirectObject):
+                j = page_numbers.get((page.idnum, page.generation))
+            else:
+                j = int(page) if isinstance(page, int) and 0 <= page < total_pages else None
+            if j is not None:
+                starts.setdefault(j, str(item.get("/Title", "")))
+
+    if not starts:
+        raise Exception(f"No outline entries pointing to pages at level {level} or above")
+
+    boundaries = sorted(starts)
+    sections = [(0, boundaries[0], "front_matter")] if boundaries[0] > 0 else []
+    for start_page, end_page in zip(boundaries, boundaries[1:] + [total_pages]):
+        sections.append((start_page, end_page, starts[start_page]))
+    return sections
+
+def outline_slug(title, max_length=60):
+    """Turn an outline title into a file-name-safe slug."""
+    slug = re.sub(r"[^\w\-]+", "_", title).strip("_")[:max_length].rstrip("_")
+    return slug or "section"
+
+def _record_folder_chunks(metrics, path, output_folder, input_basename):
+    """Record the chunks an external tool wrote to output_folder in metrics, if given."""
+    if metrics is None:
+        return
+    metrics.path = path
+    prefix = f"{input_basename}_"
+    numbered = []
+    for name in os.listdir(output_folder):
+        number = name[len(prefix):-len(".pdf")]
+        if name.startswith(prefix) and name.endswith(".pdf") and number.isdigit():
+            numbered.append((int(number), name))
+    for chunk_number, name in sorted(numbered):
+        size = os.path.getsize(os.path.join(output_folder, name))
+        metrics.chunk(chunk_number, name, None, None, None, size, 0.0)
+
+def _split_chunks_serial(reader, input_pdf_path, total_pages, chunk_ranges, output_folder,
+                         input_basename, show_progress=True, gc_rss_mb=None,
+                         gc_alloc_blocks=DEFAULT_GC_ALLOC_BLOCKS, engine="pypdf",
+                         archive=None, manifest=None, cache=None, page_index=None, chunk_names=None,
+                         metrics=None, write_behind=0, fsync_every=0):
+    """
+    Write chunks, given as (start_page, end_page) ranges, one after another
+    from an open reader (the default path). chunk_names, if given, names
+    each chunk instead of "<basename>_<n>.pdf". Stages and chunks are
+    recorded in metrics (a SplitMetrics), if given.
+
+    With write_behind or fsync_every, chunk files are written through a
+    WriteBehind: each chunk is serialized into memory and written by a
+    background thread while the next one is built, with up to write_behind
+    chunks waiting. Checkpointed chunks (with a manifest) are still written
+    directly.
+
+    With a SplitCache and no reader, chunks come from the cache's page index
+    or are copied from it; with a reader, the index is built while writing.
+    """
+    total_chunks = len(chunk_ranges)
+    completed = set(manifest.completed) if manifest is not None else set()
+    memory_guard = MemoryGuard(gc_rss_mb, gc_alloc_blocks, metrics)
+    index_builder = None
+    if cache is not None and reader is None:
+        cached_writer = cache.index_writer()
+        cached_writer.metrics = metrics
+        chunk_writer = cached_writer.write_chunk
+    else:
+        if cache is not None:
+            index_builder = cache.index_builder(reader.pdf_header, total_pages)
+        chunk_writer = make_chunk_writer(reader, engine, input_pdf_path, index_builder, page_index, metrics)
+    background = None
+    if (write_behind or fsync_every) and archive is None and manifest is None:
+        background = WriteBehind(write_behind, fsync_every)
+
+    def report_write_failures(failures):
+        for _, message in failures:
+            click.echo(f"❌ {message}", err=True)
+
+    def write_one(chunk_number, start_page, end_page):
+        """Write one chunk to its file, the archive or through the manifest, and report it."""
+        started = time.perf_counter()
+        # Generate output filename using original basename and sequential number
+        chunk_name = chunk_names[chunk_number - 1] if chunk_names else f"{input_basename}_{chunk_number}.pdf"
+        # While the index is built every page has to pass through the writer
+        cached_chunk = cache.chunk_path(start_page, end_page) if cache is not None and index_builder is None else None
+        writer = chunk_writer if cached_chunk is None else functools.partial(copy_cached_chunk, cached_chunk)
+        buffer = None
+        if archive is not None:
+            output = io.BytesIO()
+            pages_added, warnings = writer(start_page, end_page, output)
+            buffer = output.getbuffer()
+            if pages_added:
+                archive.add(chunk_name, buffer)
+            created = chunk_name
+            size = len(buffer)
+        elif manifest is not None:
+            created = os.path.join(output_folder, chunk_name)
+            pages_added, warnings, size, sha256 = write_checkpointed_chunk(
+                writer, start_page, end_page, created)
+            if pages_added:
+                with _stage(metrics, "fsync"):
+                    manifest.record(chunk_number, chunk_name, start_page, end_page, size, sha256)
+        elif background is not None:
+            created = os.path.join(output_folder, chunk_name)
+            output = io.BytesIO()
+            pages_added, warnings = writer(start_page, end_page, output)
+            buffer = output.getbuffer()
+            size = len(buffer)
+            if pages_added:
+                background.submit(created, buffer)
+            report_write_failures(background.take_failures())
+        else:
+            created = os.path.join(output_folder, chunk_name)
+            pages_added, warnings = writer(start_page, end_page, created)
+            size = os.path.getsize(created) if pages_added and metrics is not None else None
+        if metrics is not None and pages_added:
+            metrics.chunk(chunk_number, chunk_name, start_page, end_page, pages_added, size,
+                          time.perf_counter() - started)
+
+        if cache is not None and cached_chunk is None and not warnings and pages_added == end_page - start_page:
+            cache.store_chunk(start_page, end_page, buffer if buffer is not None else created)
+
+        for warning in warnings:
+            click.echo(warning, err=True)
+        if pages_added == 0:
+            click.echo(f"❌ Skipping chunk {chunk_number}: No pages could be processed", err=True)
+        elif not show_progress:
+            click.echo(f"✅ Created: {created} ({pages_added} pages)")
+
+    chunk_number = 1
+
+    # Process chunks with or without progress bar
+    if show_progress:
+        # Create progress bar that tracks each output file being created
+        with click.progressbar(length=total_chunks,
+                             label='Creating PDF files',
+                             show_eta=True,
+                             show_percent=True) as progress_bar:
+
+            for start_page, end_page in chunk_ranges:
+                if chunk_number in completed:
+                    # Already written and verified by a previous run
+                    progress_bar.update(1)
+                    chunk_number += 1
+                    continue
+
+                try:
+                    write_one(chunk_number, start_page, end_page)
+
+                    # Update progress bar after each file is successfully created (or skipped)
+                    progress_bar.update(1)
+
+                except Exception as e:
+                    click.echo(f"❌ Error processing chunk {chunk_number}: {str(e)}", err=True)
+                    # Update progress bar even for failed chunks to keep it moving
+                    progress_bar.update(1)
+
+                finally:
+                    # Release parsed objects; collect only past the memory thresholds
+                    memory_guard.release(reader)
+
+                chunk_number += 1
+    else:
+        # Process without progress bar - show traditional text messages
+        for start_page, end_page in chunk_ranges:
+            if chunk_number in completed:
+                # Already written and verified by a previous run
+                chunk_number += 1
+                continue
+
+            try:
+                click.echo(f"📄 Processing chunk {chunk_number}/{total_chunks} (pages {start_page + 1}-{end_page})...")
+
+                write_one(chunk_number, start_page, end_page)
+
+            except Exception as e:
+                click.echo(f"❌ Error processing chunk {chunk_number}: {str(e)}", err=True)
+                # Continue with next chunk instead of failing completely
+
+            finally:
+                # Release parsed objects; collect only past the memory thresholds
+                memory_guard.release(reader)
+
+            chunk_number += 1
+
+    if background is not None:
+        report_write_failures(background.close())
+        if metrics is not None:
+            metrics.merge_stages(background.stages)
+    if index_builder is not None and index_builder.save():
+        click.echo("💾 Saved page index to the split cache")
+    click.echo(f"✅ Successfully created {chunk_number - 1} chunks")
+
+PAGE_RANGE_PATTERN = re.compile(r"(\d+)(?:-(\d+|last))?|last(?:-(\d+))?")
+
+def parse_page_ranges(spec, name=None):
+    """
+    Parse a comma-separated list of page ranges such as "1-10,4000-4010,last-5".
+
+    Pages are numbered from 1 and ranges are inclusive: "N" is one page,
+    "A-B" pages A to B, "N-last" page N to the end, "last" the final page
+    and "last-K" the final K pages. Negative numbers in the result count
+    from the end of the document (-1 is the last page).
+
+    Returns a list of (first, last, name) tuples; raises PageRangeError (a
+    ValueError) on bad syntax.
+    """
+    ranges = []
+    for item in spec.split(","):
+        item = item.strip()
+        match = PAGE_RANGE_PATTERN.fullmatch(item)
+        if match is None:
+            raise PageRangeError(f"Invalid page range '{item}'")
+        first, last, tail = match.groups()
+        if first is not None:
+            first = int(first)
+            last = first if last is None else -1 if last == "last" else int(last)
+            if first < 1 or (last > 0 and last < first):
+                raise PageRangeError(f"Invalid page range '{item}'")
+        else:
+            count = int(tail) if tail is not None else 1
+            if count < 1:
+                raise PageRangeError(f"Invalid page range '{item}'")
+            first, last = -count, -1
+        ranges.append((first, last, name))
+    return ranges
+
+def read_ranges_file(path):
+    """
+    Read page ranges from a file, one "RANGE [NAME]" per line.
+
+    RANGE uses the parse_page_ranges syntax and NAME, if given, names the
+    output file. Blank lines and lines starting with # are ignored.
+    """
+    ranges = []
+    with open(path) if path != "-" else contextlib.nullcontext(sys.stdin) as ranges_file:
+        for line_number, line in enumerate(ranges_file, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            spec, _, name = line.partition(" ")
+            try:
+                ranges.extend(parse_page_ranges(spec, name.strip() or None))
+            except ValueError as e:
+                raise PageRangeError(f"{path}, line {line_number}: {e}")
+    return ranges
+
+def resolve_page_ranges(ranges, total_pages):
+    """Turn parsed ranges into 0-based (start_page, end_page, name) with end exclusive."""
+    resolved = []
+    for first, last, name in ranges:
+        start = first - 1 if first > 0 else total_pages + first
+        end = last if last > 0 else total_pages + last + 1
+        if start < 0 or end > total_pages or start >= end:
+            if first < 0:
+                label = "last" if first == -1 else f"last-{-first}"
+            else:
+                label = str(first) if last == first else f"{first}-{'last' if last == -1 else last}"
+            raise PageRangeError(f"Page range '{label}' is outside the document's {total_pages} pages")
+        resolved.append((start, end, name))
+    return resolved
+
+def extract_page_ranges(input_pdf_path, ranges, output_folder="output_chunks", show_progress=True,
+                        gc_rss_mb=None, gc_alloc_blocks=DEFAULT_GC_ALLOC_BLOCKS, engine="pypdf",
+                        use_mmap=None, archive=None, output_basename=None, metrics=None):
+    """
+    Write one PDF per page range (see parse_page_ranges) of input_pdf_path.
+
+    Only the pages the ranges select are located: the page tree is descended
+    by the /Count of its nodes (PageIndex.locate), so extracting a few pages
+    of a huge document reads only those pages, their path through the tree
+    and the objects they reference. Trees whose counts are inconsistent are
+    indexed in full instead.
+
+    Outputs are named "<basename>_<first>-<last>.pdf", or "<name>.pdf" when
+    the range was given a name. Stages and outputs are recorded in metrics
+    (a SplitMetrics), if given, as split_pdf_by_chunks does.
+    """
+    file_size_mb = os.path.getsize(input_pdf_path) / (1024 * 1024)
+    if use_mmap is None:
+        use_mmap = file_size_mb > LARGE_FILE_MB
+
+    click.echo("📖 Reading PDF file...")
+    with _stage(metrics, "open"):
+        reader, _, issues, _ = probe_pdf(input_pdf_path, use_mmap, index_pages=False)
+    if metrics is not None:
+        metrics.path = "pypdf"
+    fingerprint = input_fingerprint(input_pdf_path)
+    located = False
+    try:
+        total_pages = PageIndex.page_count(reader)
+    except Exception:
+        total_pages = None
+    if total_pages is not None:
+        # Ranges outside the declared page count fail here, without indexing the document
+        resolved = resolve_page_ranges(ranges, total_pages)
+        page_numbers = [j for start, end, _ in resolved for j in range(start, end)]
+        try:
+            page_index = PageIndex.locate(reader, page_numbers, fingerprint)
+            located = True
+        except Exception:
+            pass
+    if not located:
+        # Counts in the tree cannot be trusted; index every page instead
+        full_index = load_page_index(input_pdf_path, reader)
+        total_pages = len(full_index) if full_index is not None else len(reader.pages)
+        resolved = resolve_page_ranges(ranges, total_pages)
+        page_numbers = [j for start, end, _ in resolved for j in range(start, end)]
+        page_index = full_index.subset(page_numbers) if full_index is not None else None
+
+    detected = f"; detected: {', '.join(issues)}" if issues else ""
+    click.echo(f"✅ Located {len(page_numbers)} of {total_pages} pages in {len(resolved)} ranges (permissive mode{detected})")
+
+    input_basename = output_basename or os.path.splitext(os.path.basename(input_pdf_path))[0]
+    if archive is None and not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+
+    memory_guard = MemoryGuard(gc_rss_mb, gc_alloc_blocks, metrics)
+    chunk_writer = make_chunk_writer(reader, engine, input_pdf_path, page_index=page_index, metrics=metrics)
+
+    def write_range(number, position, start_page, end_page, name):
+        started = time.perf_counter()
+        if name:
+            output_name = name if name.lower().endswith(".pdf") else f"{name}.pdf"
+        else:
+            output_name = f"{input_basename}_{start_page + 1}-{end_page}.pdf"
+        output = os.path.join(output_folder, output_name) if archive is None else io.BytesIO()
+        # The located pages are numbered by their position in the index
+        first = position if page_index is not None else start_page
+        pages_added, warnings = chunk_writer(first, first + end_page - start_page, output)
+        for warning in warnings:
+            click.echo(warning, err=True)
+        if archive is not None and pages_added:
+            archive.add(output_name, output.getbuffer())
+        if metrics is not None and pages_added:
+            size = output.tell() if archive is not None else os.path.getsize(output)
+            metrics.chunk(number, output_name, start_page, end_page, pages_added, size,
+                          time.perf_counter() - started)
+        if pages_added == 0:
+            click.echo(f"❌ Skipping range {start_page + 1}-{end_page}: No pages could be processed", err=True)
+        elif not show_progress:
+            click.echo(f"✅ Created: {output_name if archive is not None else output} ({pages_added} pages)")
+
+    position = 0
+    with click.progressbar(length=len(resolved), label='Creating PDF files', show_eta=True,
+                           show_percent=True) if show_progress else contextlib.nullcontext() as progress_bar:
+        for number, (start_page, end_page, name) in enumerate(resolved, start=1):
+            try:
+                write_range(number, position, start_page, end_page, name)
+            except Exception as e:
+                click.echo(f"❌ Error processing range {start_page + 1}-{end_page}: {str(e)}", err=True)
+            finally:
+                memory_guard.release(reader)
+            position += end_page - start_page
+            if progress_bar is not None:
+                progress_bar.update(1)
+
+    click.echo(f"✅ Successfully created {len(resolved)} files")
+
+def _open_source(source):
+    """
+    Open source for iter_chunks(): a file path, the bytes of a PDF or a
+    readable binary file object. Returns (reader, page_index, input_pdf_path),
+    where input_pdf_path is None unless source is a path.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        input_pdf_path = os.fspath(source)
+        if not os.path.isfile(input_pdf_path):
+            raise PdfReadError(f"Input file '{input_pdf_path}' does not exist")
+        use_mmap = os.path.getsize(input_pdf_path) / (1024 * 1024) > LARGE_FILE_MB
+        reader, _, _, page_index = probe_pdf(input_pdf_path, use_mmap)
+        return reader, page_index, input_pdf_path
+
+    _import_pypdf()
+    stream = io.BytesIO(source) if isinstance(source, (bytes, bytearray, memoryview)) else source
+    try:
+        reader = PdfReader(stream, strict=False)
+        if reader.is_encrypted and not reader.decrypt(""):
+            raise EncryptedPdfError("PDF is encrypted and requires a password")
+    except PdfReadError:
+        raise
+    except Exception as e:
+        raise PdfReadError(str(e)) from e
+    try:
+        # Without a path there is no sidecar to save, so no fingerprint is needed
+        page_index = PageIndex.build(reader, None)
+    except Exception:
+        page_index = None
+    return reader, page_index, None
+
+def iter_chunks(source, pages_per_chunk=5, ranges=None, max_size_mb=None, outline_level=None, engine="pypdf",
+                output=None, progress=None, on_warning=None, gc_rss_mb=None,
+                gc_alloc_blocks=DEFAULT_GC_ALLOC_BLOCKS):
+    """
+    Split a PDF in this process, yielding (chunk_index, page_range, data) per chunk.
+
+    The library counterpart of split_pdf_by_chunks(): nothing is printed and
+    nothing is written to disk. source is a file path, the bytes of a PDF or
+    a readable binary file object. Chunks are built lazily, one per next(),
+    so only the chunk being consumed is held in memory.
+
+    chunk_index counts from 1 and page_range is the (first, last) pages of
+    the chunk, 1-based and inclusive. data is the chunk's bytes; with output,
+    a callable output(chunk_index, page_range) returning a writable binary
+    file object, each chunk is written there instead and that object is
+    yielded as data.
+
+    Chunks hold pages_per_chunk pages, unless ranges (a parse_page_ranges()
+    spec such as "1-10,last-5", or its result), max_size_mb or outline_level
+    is given; these work as in the CLI. progress(chunk_index, total_chunks)
+    is called after each chunk is written, and on_warning(message) for each
+    page that could not be copied; a chunk in which no page could be copied
+    is reported there and skipped.
+
+    Raises PdfReadError (EncryptedPdfError for a password-protected input),
+    PageRangeError for ranges that are invalid or outside the document,
+    OptionError for an unknown engine, a non-positive pages_per_chunk or
+    the raw engine without a path, and ChunkError, carrying chunk_index and page_range, when a chunk
+    cannot be written.
+    """
+    if engine not in CHUNK_ENGINES:
+        raise OptionError(f"Unknown engine '{engine}'; choose one of {', '.join(CHUNK_ENGINES)}")
+    if pages_per_chunk <= 0:
+        raise OptionError(f"Pages per chunk must be a positive integer, got {pages_per_chunk}")
+    if engine == "raw" and not isinstance(source, (str, os.PathLike)):
+        raise OptionError("The raw engine maps the input file, so source must be a path")
+
+    reader, page_index, input_pdf_path = _open_source(source)
+    total_pages = len(page_index) if page_index is not None else len(reader.pages)
+    memory_guard = MemoryGuard(gc_rss_mb, gc_alloc_blocks)
+
+    if ranges is not None:
+        parsed = parse_page_ranges(ranges) if isinstance(ranges, str) else ranges
+        chunk_ranges = [(start_page, end_page) for start_page, end_page, _ in resolve_page_ranges(parsed, total_pages)]
+    else:
+        chunk_ranges, _, oversized = plan_chunk_ranges(reader, page_index, total_pages, pages_per_chunk,
+                                                       max_size_mb, outline_level,
+                                                       release=lambda: memory_guard.release(reader))
+        if on_warning is not None:
+            for j in oversized:
+                on_warning(f"Page {j + 1} alone is estimated above {max_size_mb:g}MB")
+
+    chunk_writer = make_chunk_writer(reader, engine, input_pdf_path, page_index=page_index)
+    for chunk_index, (start_page, end_page) in enumerate(chunk_ranges, start=1):
+        page_range = (start_page + 1, end_page)
+        try:
+            target = output(chunk_index, page_range) if output is not None else io.BytesIO()
+            pages_added, warnings = chunk_writer(start_page, end_page, target)
+        except Exception as e:
+            raise ChunkError(f"Failed to write chunk {chunk_index} (pages {start_page + 1}-{end_page}): {str(e)}",
+                             chunk_index, page_range) from e
+        finally:
+            memory_guard.release(reader)
+        if on_warning is not None:
+            for warning in warnings:
+                on_warning(warning)
+            if pages_added == 0:
+                on_warning(f"Skipping chunk {chunk_index}: No pages could be processed")
+        if progress is not None:
+            progress(chunk_index, len(chunk_ranges))
+        if pages_added:
+            yield chunk_index, page_range, target if output is not None else target.getvalue()
+
+def collect_input_pdfs(inputs, files_from=None):
+    """
+    Expand CLI inputs into a sorted list of PDF paths.
+
+    Each input may be a PDF file, a directory (searched recursively for
+    *.pdf) or a glob pattern. files_from names a file with one path per
+    line ('-' reads the list from stdin). Inputs that match nothing are
+    returned separately so they can be reported.
 
-    if not check_external_tool('pdftk'):
-        raise Exception("pdftk is not installed. Install with: brew install pdftk-java (macOS) or sudo apt install pdftk (Linux)")
+    Returns a (pdf_paths, unmatched_inputs) tuple.
+    """
+    import glob
+    candidates = list(inputs)
+    if files_from is not None:
+        with click.open_file(files_from, 'r') as listing:
+            candidates.extend(line.strip() for line in listing if line.strip())
+
+    found = []
+    unmatched = []
+    for candidate in candidates:
+        if os.path.isdir(candidate):
+            matches = [
+                os.path.join(root, name)
+                for root, _, names in os.walk(candidate)
+                for name in names if name.lower().endswith('.pdf')
+            ]
+        elif os.path.isfile(candidate):
+            matches = [candidate] if candidate.lower().endswith('.pdf') else []
+        elif glob.has_magic(candidate):
+            matches = [path for path in glob.glob(candidate, recursive=True)
+                       if os.path.isfile(path) and path.lower().endswith('.pdf')]
+        else:
+            matches = []
+        if not matches:
+            unmatched.append(candidate)
+        found.extend(matches)
+
+    # Drop duplicates reached through several inputs, keeping a stable order
+    unique = sorted({os.path.normpath(path) for path in found})
+    return unique, unmatched
+
+def _batch_output_folders(input_pdfs, output_folder):
+    """
+    Assign each input its own subfolder of output_folder, named after its
+    path relative to the working directory without the extension
+    (docs/report.pdf -> output_folder/docs/report).
 
-    # Create temporary directory for individual pages
-    with tempfile.TemporaryDirectory() as temp_dir:
+    A folder's name depends only on its own input, so adding or removing
+    inputs never renames the others. Inputs outside the working directory,
+    or whose relative name is taken (report.pdf and report.PDF), get
+    "<basename>_<hash>" instead, with a short hash of their absolute path.
+    """
+    folders = {}
+    used = set()
+    for input_pdf_path in input_pdfs:
+        absolute_path = os.path.abspath(input_pdf_path)
         try:
-            # Use pdftk to burst into individual pages
-            click.echo("📄 Splitting into individual pages with pdftk...")
-            result = subprocess.run([
-                'pdftk', input_pdf_path, 'burst', 'output',
-                os.path.join(temp_dir, 'page_%04d.pdf')
-            ], capture_output=True, text=True, check=True)
-
-            # Get list of created page files
-            page_files = sorted(glob.glob(os.path.join(temp_dir, 'page_*.pdf')))
-            total_pages = len(page_files)
-            click.echo(f"✅ Successfully split into {total_pages} individual pages")
-
-            # Group pages into chunks
-            chunk_number = 1
-            total_chunks = (total_pages + pages_per_chunk - 1) // pages_per_chunk
-
-            # Create progress bar for chunk creation (if enabled)
-            if show_progress:
-                with click.progressbar(length=total_chunks,
-                                     label='Creating PDF files with pdftk',
-                                     show_eta=True,
-                                     show_percent=True) as progress_bar:
-
-                    for i in range(0, total_pages, pages_per_chunk):
-                        chunk_files = page_files[i:i + pages_per_chunk]
-                        output_filename = os.path.join(output_folder, f"{input_basename}_{chunk_number}.pdf")
-
-                        # Use pdftk to combine pages into chunk
-                        cmd = ['pdftk'] + chunk_files + ['cat', 'output', output_filename]
-                        subprocess.run(cmd, capture_output=True, text=True, check=True)
-
-                        chunk_number += 1
-                        progress_bar.update(1)  # Update progress after each file is created
-            else:
-                for i in range(0, total_pages, pages_per_chunk):
-                    chunk_files = page_files[i:i + pages_per_chunk]
-                    output_filename = os.path.join(output_folder, f"{input_basename}_{chunk_number}.pdf")
+            relative_path = os.path.relpath(absolute_path)
+        except ValueError:
+            # On another drive than the working directory (Windows)
+            relative_path = os.pardir
+        name = os.path.splitext(relative_path)[0]
+        if name.split(os.sep)[0] == os.pardir or name in used:
+            digest = hashlib.sha256(absolute_path.encode()).hexdigest()[:8]
+            name = f"{os.path.splitext(os.path.basename(input_pdf_path))[0]}_{digest}"
+        used.add(name)
+        folders[input_pdf_path] = os.path.join(output_folder, name)
+    return folders
 
-                    click.echo(f"📄 Creating chunk {chunk_number}/{total_chunks} ({len(chunk_files)} pages)...")
+def _split_file_in_worker(input_pdf_path, pages_per_chunk, output_folder, split_options, collect_metrics=False):
+    """
+    Split one file of a batch, capturing its console output instead of printing it.
 
-                    # Use pdftk to combine pages into chunk
-                    cmd = ['pdftk'] + chunk_files + ['cat', 'output', output_filename]
-                    subprocess.run(cmd, capture_output=True, text=True, check=True)
+    With collect_metrics, the SplitMetrics events of the split are returned
+    under "events" so the parent can pass them to its own hooks.
+    """
+    import glob
+    start = time.perf_counter()
+    log = io.StringIO()
+    result = {"input": input_pdf_path, "output_folder": output_folder}
+    events = []
+    metrics = SplitMetrics([events.append]) if collect_metrics else None
+    try:
+        with contextlib.redirect_stdout(log), contextlib.redirect_stderr(log), \
+                metrics.record(input_pdf_path) if metrics is not None else contextlib.nullcontext():
+            split_pdf_by_chunks(input_pdf_path, pages_per_chunk, output_folder,
+                                show_progress=False, jobs=1, metrics=metrics, **split_options)
+        result["status"] = "ok"
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = str(e)
+    basename = os.path.splitext(os.path.basename(input_pdf_path))[0]
+    result["chunks"] = len(glob.glob(os.path.join(glob.escape(output_folder), f"{glob.escape(basename)}_*.pdf")))
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    result["log"] = log.getvalue()
+    if collect_metrics:
+        result["events"] = events
+    return result
 
-                    click.echo(f"✅ Created: {output_filename}")
-                    chunk_number += 1
+def split_batch(input_pdfs, pages_per_chunk=5, output_folder="output_chunks", show_progress=True, jobs=1,
+                report_path=None, metrics=None, **split_options):
+    """
+    Split many PDF files in one process, sharing a pool of worker processes.
 
-            click.echo(f"✅ Successfully created {total_chunks} chunks using pdftk")
+    Each file is split serially by one worker into its own subfolder of
+    output_folder, so jobs files are processed at the same time and the
+    interpreter and imports are paid for once per worker instead of once
+    per file. split_options are passed to split_pdf_by_chunks.
 
-        except subprocess.CalledProcessError as e:
-            raise Exception(f"pdftk failed: {e.stderr}")
+    Prints a summary, optionally writes it to report_path as JSON, and
+    returns the list of per-file results. With metrics (a SplitMetrics),
+    the events recorded for each file are passed to its hooks as the file
+    completes.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
 
-def split_with_qpdf(input_pdf_path, pages_per_chunk, output_folder, input_basename, show_progress=True):
-    """Split PDF using qpdf as fallback method."""
-    click.echo("🔧 Attempting to split using qpdf...")
+    folders = _batch_output_folders(input_pdfs, output_folder)
+    workers = max(1, min(jobs, len(input_pdfs)))
+    click.echo(f"📚 Splitting {len(input_pdfs)} files with {workers} worker processes...")
 
-    if not check_external_tool('qpdf'):
-        raise Exception("qpdf is not installed. Install with: brew install qpdf (macOS) or sudo apt install qpdf (Linux)")
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_split_file_in_worker, path, pages_per_chunk, folders[path], split_options,
+                            metrics is not None)
+            for path in input_pdfs
+        ]
 
-    # Create temporary directory for individual pages
-    with tempfile.TemporaryDirectory() as temp_dir:
-        try:
-            # Use qpdf to split into individual pages
-            click.echo("📄 Splitting into individual pages with qpdf...")
-            result = subprocess.run([
-                'qpdf', '--split-pages', input_pdf_path,
-                os.path.join(temp_dir, 'page-%d.pdf')
-            ], capture_output=True, text=True)
-
-            # qpdf may succeed with warnings for corrupted files
-            if result.returncode != 0:
-                raise subprocess.CalledProcessError(result.returncode, 'qpdf', result.stderr)
-
-            # Show warnings if any
-            if result.stderr:
-                click.echo(f"⚠️  qpdf warnings: {result.stderr.strip()}", err=True)
-
-            # Get list of created page files
-            page_files = sorted(glob.glob(os.path.join(temp_dir, 'page-*.pdf')))
-            total_pages = len(page_files)
-            click.echo(f"✅ Successfully split into {total_pages} individual pages")
-
-            # Group pages into chunks using pypdf (since individual pages should work)
-            chunk_number = 1
-            total_chunks = (total_pages + pages_per_chunk - 1) // pages_per_chunk
-
-            # Create progress bar for chunk creation (if enabled)
-            if show_progress:
-                with click.progressbar(length=total_chunks,
-                                     label='Creating PDF files with qpdf+pypdf',
-                                     show_eta=True,
-                                     show_percent=True) as progress_bar:
-
-                    for i in range(0, total_pages, pages_per_chunk):
-                        chunk_files = page_files[i:i + pages_per_chunk]
-                        output_filename = os.path.join(output_folder, f"{input_basename}_{chunk_number}.pdf")
-
-                        # Combine individual pages using pypdf
-                        writer = PdfWriter()
-                        for page_file in chunk_files:
-                            reader = PdfReader(page_file)
-                            writer.add_page(reader.pages[0])
-
-                        with open(output_filename, "wb") as output_pdf:
-                            writer.write(output_pdf)
-
-                        chunk_number += 1
-                        progress_bar.update(1)  # Update progress after each file is created
-            else:
-                for i in range(0, total_pages, pages_per_chunk):
-                    chunk_files = page_files[i:i + pages_per_chunk]
-                    output_filename = os.path.join(output_folder, f"{input_basename}_{chunk_number}.pdf")
+        def report(result):
+            for event in result.pop("events", ()):
+                metrics.emit(event)
+            results.append(result)
+            if result["status"] != "ok":
+                # Full error text is kept in the report; show its first line here
+                click.echo(f"❌ {result['input']}: {result['error'].splitlines()[0]}", err=True)
+            elif not show_progress:
+                click.echo(f"✅ {result['input']} -> {result['output_folder']} ({result['chunks']} chunks)")
 
-                    click.echo(f"📄 Creating chunk {chunk_number}/{total_chunks} ({len(chunk_files)} pages)...")
+        if show_progress:
+            with click.progressbar(length=len(futures),
+                                 label='Splitting PDF files',
+                                 show_eta=True,
+                                 show_percent=True) as progress_bar:
+                for future in as_completed(futures):
+                    report(future.result())
+                    progress_bar.update(1)
+        else:
+            for future in as_completed(futures):
+                report(future.result())
 
-                    # Combine individual pages using pypdf
-                    writer = PdfWriter()
-                    for page_file in chunk_files:
-                        reader = PdfReader(page_file)
-                        writer.add_page(reader.pages[0])
+    results.sort(key=lambda result: result["input"])
+    failed = [result for result in results if result["status"] != "ok"]
+    summary = {
+        "files": len(results),
+        "succeeded": len(results) - len(failed),
+        "failed": len(failed),
+        "chunks": sum(result["chunks"] for result in results),
+        "seconds": round(time.perf_counter() - start, 3),
+        "results": results,
+    }
 
-                    with open(output_filename, "wb") as output_pdf:
-                        writer.write(output_pdf)
+    click.echo(f"📊 Batch summary: {summary['succeeded']}/{summary['files']} files split, "
+               f"{summary['chunks']} chunks written in {summary['seconds']:.1f}s")
+    for result in failed:
+        click.echo(f"   ❌ {result['input']}", err=True)
 
-                    click.echo(f"✅ Created: {output_filename}")
-                    chunk_number += 1
+    if report_path:
+        with open(report_path, "w") as report_file:
+            json.dump(summary, report_file, indent=2)
+        click.echo(f"📝 Report written to '{report_path}'")
+
+    return results
 
-            click.echo(f"✅ Successfully created {total_chunks} chunks using qpdf+pypdf")
+# Seconds after which a chunk claimed by a worker that never finished it
+# (because it crashed or lost its node) may be claimed by another worker
+DEFAULT_LEASE_SECONDS = 600
 
-        except subprocess.CalledProcessError as e:
-            raise Exception(f"qpdf failed: {e.stderr}")
+# Failed attempts at a chunk before a work queue gives up on it
+MAX_CHUNK_ATTEMPTS = 3
 
-def split_pdf_by_chunks(input_pdf_path, pages_per_chunk=5, output_folder="output_chunks", show_progress=True):
+class WorkQueue:
     """
-    Splits a PDF file into multiple PDF files, each containing a specified number of pages.
-    Optimized for large PDF files by using memory-efficient processing.
+    Shared list of the chunks of one split, claimed and written by --work processes.
 
-    For example:
-    - Input: "your_document.pdf" -> Output: "your_document_1.pdf", "your_document_2.pdf", etc.
-    - Input: "report.pdf" -> Output: "report_1.pdf", "report_2.pdf", etc.
+    The job (created once by coordinate()) describes the input, output
+    folder and engine, and lists every chunk as {"chunk", "file", "pages"}
+    entries like a ChunkManifest's. Workers repeatedly claim() a chunk,
+    write it, and complete() or fail() it, renew()ing the claim while the
+    chunk is written. A claim that is not renewed or resolved within the
+    lease is handed out again, so chunks of a crashed worker are not lost;
+    a chunk that failed MAX_CHUNK_ATTEMPTS times is left. complete() only
+    records a chunk for the worker still holding its claim.
     """
-    import gc  # For garbage collection to manage memory
 
-    try:
-        # Check file size and warn if very large
-        file_size = os.path.getsize(input_pdf_path)
-        file_size_mb = file_size / (1024 * 1024)
+    def __init__(self, path, worker_id=None):
+        import socket
+        self.path = path
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
 
-        if file_size_mb > 100:  # Warn for files larger than 100MB
-            click.echo(f"⚠️  Large file detected: {file_size_mb:.1f}MB. Processing may take some time...")
+    def exists(self):
+        return os.path.exists(self.path)
 
-        # Try multiple approaches to read problematic PDFs
-        click.echo("📖 Reading PDF file...")
-        reader = None
+    @property
+    def page_index_path(self):
+        """Where the coordinator saves the input's PageIndex for the workers."""
+        return self.path.rstrip(os.sep) + ".pageindex"
+
+class DirectoryWorkQueue(WorkQueue):
+    """
+    A WorkQueue kept as files in a directory, for workers on several machines
+    sharing a filesystem.
+
+    job.json holds the job. A chunk is claimed by creating claims/<n> with
+    O_CREAT | O_EXCL, which exactly one worker can do (also over NFS); a
+    stale claim is taken over by first renaming it away, which again only
+    one worker can do. The claim holds the worker's id, and renewing it
+    updates its modification time. Completed chunks are recorded in
+    done/<n> before the claim is removed, and each failed attempt adds a
+    line to failed/<n>.
+    """
+
+    def create(self, job):
+        os.makedirs(self.path)
+        for name in ("claims", "done", "failed"):
+            os.mkdir(os.path.join(self.path, name))
+        self._write_json(os.path.join(self.path, "job.json"), job)
+
+    def load_job(self):
+        try:
+            with open(os.path.join(self.path, "job.json")) as job_file:
+                return json.load(job_file)
+        except (OSError, ValueError) as e:
+            raise Exception(f"Work queue '{self.path}' cannot be read: {str(e)}")
+
+    def _write_json(self, path, value):
+        temporary_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temporary_path, "w") as temporary_file:
+            json.dump(value, temporary_file)
+        os.replace(temporary_path, path)
 
-        # Approach 1: Try with strict=False (most permissive)
+    def _entry(self, kind, chunk_number):
+        return os.path.join(self.path, kind, str(chunk_number))
+
+    def _attempts(self, chunk_number):
+        try:
+            with open(self._entry("failed", chunk_number)) as failed_file:
+                return sum(1 for line in failed_file if line.strip())
+        except FileNotFoundError:
+            return 0
+
+    def _take_over(self, claim_path, lease):
+        """Remove claim_path if it is older than lease; True if this worker removed it."""
         try:
-            reader = PdfReader(input_pdf_path, strict=False)
-            total_pages = len(reader.pages)
-            click.echo(f"✅ Successfully read PDF with {total_pages} pages (permissive mode)")
-        except Exception as e1:
-            click.echo(f"⚠️  Permissive mode failed: {str(e1)}")
+            if time.time() - os.stat(claim_path).st_mtime < lease:
+                return False
+            stale_path = f"{claim_path}.stale-{uuid.uuid4().hex}"
+            os.rename(claim_path, stale_path)
+        except FileNotFoundError:
+            # Completed, failed or taken over by another worker meanwhile
+            return False
+        os.remove(stale_path)
+        return True
 
-            # Approach 2: Try opening as binary and creating reader from stream
+    def claim(self, chunks, lease=DEFAULT_LEASE_SECONDS):
+        """Claim the first chunk nobody has done or holds; None when there is none."""
+        for chunk in chunks:
+            chunk_number = chunk["chunk"]
+            if os.path.exists(self._entry("done", chunk_number)) or self._attempts(chunk_number) >= MAX_CHUNK_ATTEMPTS:
+                continue
+            claim_path = self._entry("claims", chunk_number)
             try:
-                click.echo("� Trying alternative reading method...")
-                with open(input_pdf_path, 'rb') as file:
-                    reader = PdfReader(file, strict=False)
-                    total_pages = len(reader.pages)
-                    click.echo(f"✅ Successfully read PDF with {total_pages} pages (stream mode)")
-            except Exception as e2:
-                click.echo(f"⚠️  Stream mode failed: {str(e2)}")
-
-                # Approach 3: Try with password (empty password for encrypted PDFs)
+                claim_fd = os.open(claim_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+            except FileExistsError:
+                if not self._take_over(claim_path, lease):
+                    continue
                 try:
-                    click.echo("🔄 Trying with empty password (for encrypted PDFs)...")
-                    reader = PdfReader(input_pdf_path, strict=False, password="")
-                    total_pages = len(reader.pages)
-                    click.echo(f"✅ Successfully read PDF with {total_pages} pages (password mode)")
-                except Exception as e3:
-                    click.echo(f"⚠️  Password mode failed: {str(e3)}")
-
-                    # All pypdf approaches failed, try external tools
-                    click.echo("❌ All pypdf methods failed. Trying external tools...")
-
-                    # Extract the base filename for external tools
-                    input_basename = os.path.splitext(os.path.basename(input_pdf_path))[0]
-
-                    if not os.path.exists(output_folder):
-                        os.makedirs(output_folder)
-
-                    # Try pdftk first (most reliable for corrupted PDFs)
-                    if check_external_tool('pdftk'):
-                        try:
-                            split_with_pdftk(input_pdf_path, pages_per_chunk, output_folder, input_basename, show_progress)
-                            return  # Success! Exit the function
-                        except Exception as pdftk_error:
-                            click.echo(f"⚠️  pdftk failed: {str(pdftk_error)}")
-
-                    # Try qpdf as second option
-                    if check_external_tool('qpdf'):
-                        try:
-                            split_with_qpdf(input_pdf_path, pages_per_chunk, output_folder, input_basename, show_progress)
-                            return  # Success! Exit the function
-                        except Exception as qpdf_error:
-                            click.echo(f"⚠️  qpdf failed: {str(qpdf_error)}")
-
-                    # All methods failed
-                    error_msg = f"""Failed to read PDF file '{input_pdf_path}' using all available methods:
-
-PyPDF attempts:
-1. Permissive mode: {str(e1)}
-2. Stream mode: {str(e2)}
-3. Password mode: {str(e3)}
+                    claim_fd = os.open(claim_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+                except FileExistsError:
+                    continue
+            with os.fdopen(claim_fd, "w") as claim_file:
+                claim_file.write(self.worker_id)
+            # The chunk may have been completed between the check and the claim
+            if os.path.exists(self._entry("done", chunk_number)):
+                os.remove(claim_path)
+                continue
+            return chunk
+        return None
 
-External tools:
-- pdftk: {'Available' if check_external_tool('pdftk') else 'Not installed'}
-- qpdf: {'Available' if check_external_tool('qpdf') else 'Not installed'}
+    def holds(self, chunk_number):
+        """True while this worker holds the claim on the chunk."""
+        try:
+            with open(self._entry("claims", chunk_number)) as claim_file:
+                return claim_file.read() == self.worker_id
+        except FileNotFoundError:
+            return False
 
-This PDF file appears to be severely corrupted or uses an unsupported format.
+    def renew(self, chunk_number):
+        """Restart the lease of a chunk this worker holds; False if the claim was lost."""
+        if not self.holds(chunk_number):
+            return False
+        try:
+            os.utime(self._entry("claims", chunk_number))
+        except FileNotFoundError:
+            return False
+        return True
 
-Install external tools for better corruption handling:
-- macOS: brew install pdftk-java qpdf
-- Ubuntu/Debian: sudo apt install pdftk qpdf
-- CentOS/RHEL: sudo yum install pdftk qpdf
+    def complete(self, chunk_number, size, sha256):
+        """Record the chunk as done; False (and nothing recorded) if this worker lost the claim."""
+        if not self.holds(chunk_number):
+            return False
+        self._write_json(self._entry("done", chunk_number), {"worker": self.worker_id, "size": size, "sha256": sha256})
+        self._release(chunk_number)
+        return True
 
-Manual alternatives:
-- Online tools: SmallPDF, ILovePDF split tools
-- PDF repair tools before splitting
-- Convert to images and back to PDF"""
-                    raise Exception(error_msg)
+    def fail(self, chunk_number, error):
+        with open(self._entry("failed", chunk_number), "a") as failed_file:
+            failed_file.write(json.dumps({"worker": self.worker_id, "error": error}) + "\n")
+        self._release(chunk_number)
 
-    except Exception as e:
-        if "Failed to read PDF file" in str(e):
-            raise e  # Re-raise our detailed error message
-        else:
-            raise Exception(f"Failed to read PDF file '{input_pdf_path}': {str(e)}")
+    def _release(self, chunk_number):
+        if not self.holds(chunk_number):
+            # The lease ran out and another worker took the chunk over
+            return
+        try:
+            os.remove(self._entry("claims", chunk_number))
+        except FileNotFoundError:
+            # The lease ran out and another worker took the chunk over
+            pass
+
+    def status(self, chunks):
+        """Count the chunks that are done, claimed, failed for good and pending."""
+        counts = {"done": 0, "claimed": 0, "failed": 0, "pending": 0}
+        done = set(os.listdir(os.path.join(self.path, "done")))
+        claimed = set(os.listdir(os.path.join(self.path, "claims")))
+        for chunk in chunks:
+            name = str(chunk["chunk"])
+            if name in done:
+                counts["done"] += 1
+            elif name in claimed:
+                counts["claimed"] += 1
+            elif self._attempts(chunk["chunk"]) >= MAX_CHUNK_ATTEMPTS:
+                counts["failed"] += 1
+            else:
+                counts["pending"] += 1
+        return counts
+
+class SqliteWorkQueue(WorkQueue):
+    """
+    A WorkQueue in an SQLite database, for worker processes on one machine.
+
+    Claims are made in BEGIN IMMEDIATE transactions, so concurrent workers
+    never claim the same chunk. SQLite's locking is not reliable on network
+    filesystems; use a DirectoryWorkQueue to spread the work across machines.
+    """
+
+    SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+    def __init__(self, path, worker_id=None):
+        super().__init__(path, worker_id)
+        self._connection = None
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            import sqlite3
+            # Autocommit mode; claims open their own transactions
+            self._connection = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        return self._connection
+
+    def create(self, job):
+        if self.exists():
+            raise FileExistsError(f"'{self.path}' already exists")
+        with self._transaction() as connection:
+            connection.execute("CREATE TABLE job (description TEXT NOT NULL)")
+            connection.execute("CREATE TABLE chunks (chunk INTEGER PRIMARY KEY, state TEXT NOT NULL, "
+                               "worker TEXT, claimed REAL, attempts INTEGER NOT NULL DEFAULT 0, "
+                               "size INTEGER, sha256 TEXT, error TEXT)")
+            connection.execute("INSERT INTO job VALUES (?)", (json.dumps(job),))
+            connection.executemany("INSERT INTO chunks (chunk, state) VALUES (?, 'pending')",
+                                   [(chunk["chunk"],) for chunk in job["chunks"]])
+
+    def load_job(self):
+        if not self.exists():
+            raise Exception(f"Work queue '{self.path}' does not exist")
+        try:
+            return json.loads(self.connection.execute("SELECT description FROM job").fetchone()[0])
+        except Exception as e:
+            raise Exception(f"Work queue '{self.path}' cannot be read: {str(e)}")
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        connection = self.connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def claim(self, chunks, lease=DEFAULT_LEASE_SECONDS):
+        """Claim the first pending (or stale) chunk; None when there is none."""
+        now = time.time()
+        with self._transaction() as connection:
+            row = connection.execute(
+                "SELECT chunk FROM chunks WHERE state = 'pending' OR (state = 'claimed' AND claimed < ?) "
+                "ORDER BY chunk LIMIT 1", (now - lease,)).fetchone()
+            if row is None:
+                return None
+            connection.execute("UPDATE chunks SET state = 'claimed', worker = ?, claimed = ? WHERE chunk = ?",
+                               (self.worker_id, now, row[0]))
+        return next(chunk for chunk in chunks if chunk["chunk"] == row[0])
+
+    def holds(self, chunk_number):
+        """True while this worker holds the claim on the chunk."""
+        row = self.connection.execute("SELECT 1 FROM chunks WHERE chunk = ? AND state = 'claimed' AND worker = ?",
+                                      (chunk_number, self.worker_id)).fetchone()
+        return row is not None
+
+    def renew(self, chunk_number):
+        """Restart the lease of a chunk this worker holds; False if the claim was lost."""
+        with self._transaction() as connection:
+            cursor = connection.execute("UPDATE chunks SET claimed = ? WHERE chunk = ? AND state = 'claimed' "
+                                        "AND worker = ?", (time.time(), chunk_number, self.worker_id))
+        return cursor.rowcount > 0
+
+    def complete(self, chunk_number, size, sha256):
+        """Record the chunk as done; False (and nothing recorded) if this worker lost the claim."""
+        with self._transaction() as connection:
+            cursor = connection.execute("UPDATE chunks SET state = 'done', size = ?, sha256 = ? "
+                                        "WHERE chunk = ? AND state = 'claimed' AND worker = ?",
+                                        (size, sha256, chunk_number, self.worker_id))
+        return cursor.rowcount > 0
+
+    def fail(self, chunk_number, error):
+        with self._transaction() as connection:
+            connection.execute("UPDATE chunks SET attempts = attempts + 1, error = ?, "
+                               "state = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END "
+                               "WHERE chunk = ? AND state = 'claimed' AND worker = ?",
+                               (error, MAX_CHUNK_ATTEMPTS, chunk_number, self.worker_id))
+
+    def status(self, chunks):
+        """Count the chunks that are done, claimed, failed for good and pending."""
+        counts = {"done": 0, "claimed": 0, "failed": 0, "pending": 0}
+        for state, count in self.connection.execute("SELECT state, COUNT(*) FROM chunks GROUP BY state"):
+            counts[state] = count
+        return counts
+
+def open_work_queue(path, worker_id=None):
+    """Return the WorkQueue at path: an SqliteWorkQueue for .db/.sqlite files, otherwise a directory."""
+    if path.lower().endswith(SqliteWorkQueue.SUFFIXES):
+        return SqliteWorkQueue(path, worker_id)
+    return DirectoryWorkQueue(path, worker_id)
+
+class LeaseHeartbeat:
+    """
+    Renews a worker's claim on a chunk from a background thread while it is written.
+
+    The claim is renewed every third of the lease through its own WorkQueue
+    (an SQLite connection cannot be shared between threads), so a chunk that
+    takes longer than the lease is not handed to another worker meanwhile.
+    lost is set once the claim turns out to have been taken over.
+    """
+
+    def __init__(self, queue, chunk_number, lease):
+        self.queue = open_work_queue(queue.path, queue.worker_id)
+        self.chunk_number = chunk_number
+        self.interval = max(lease / 3, 0.1)
+        self.lost = False
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="pdf-splitter-lease", daemon=True)
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                if not self.queue.renew(self.chunk_number):
+                    self.lost = True
+                    return
+            except Exception:
+                # A transient error (a busy database, a slow share); try again next time
+                continue
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stopped.set()
+        self._thread.join()
+
+def coordinate(input_pdf_path, queue_path, pages_per_chunk=5, output_folder="output_chunks", engine="pypdf",
+               use_mmap=None, max_size_mb=None, outline_level=None, gc_rss_mb=None,
+               gc_alloc_blocks=DEFAULT_GC_ALLOC_BLOCKS):
+    """
+    Plan the split of input_pdf_path into a new work queue at queue_path
+    instead of writing it, for --work processes to carry out.
+
+    The input is read and planned once, exactly as split_pdf_by_chunks()
+    would (see plan_chunk_ranges), and its PageIndex is saved next to the
+    queue so workers neither walk the page tree nor re-plan. Paths are
+    stored absolute, so every worker must see the input, output folder and
+    queue at the same paths.
+
+    Returns the job written to the queue.
+    """
+    queue = open_work_queue(queue_path)
+    if queue.exists():
+        raise Exception(f"Work queue '{queue_path}' already exists; remove it to plan the split again")
+
+    if use_mmap is None:
+        use_mmap = os.path.getsize(input_pdf_path) / (1024 * 1024) > LARGE_FILE_MB
+    click.echo("📖 Reading PDF file...")
+    reader, _, issues, page_index = probe_pdf(input_pdf_path, use_mmap, queue.page_index_path)
+    total_pages = len(page_index) if page_index is not None else len(reader.pages)
+    detected = f"; detected: {', '.join(issues)}" if issues else ""
+    click.echo(f"✅ Successfully read PDF with {total_pages} pages (permissive mode{detected})")
 
-    # Extract the base filename without extension from the input path
     input_basename = os.path.splitext(os.path.basename(input_pdf_path))[0]
+    release = MemoryGuard(gc_rss_mb, gc_alloc_blocks).release
+    chunk_ranges, titles, oversized = plan_chunk_ranges(reader, page_index, total_pages, pages_per_chunk,
+                                                        max_size_mb, outline_level, release=lambda: release(reader))
+    for j in oversized:
+        click.echo(f"⚠️  Warning: Page {j + 1} alone is estimated above {max_size_mb:g}MB", err=True)
+
+    chunks = []
+    for chunk_number, (start_page, end_page) in enumerate(chunk_ranges, start=1):
+        if titles is not None:
+            chunk_name = f"{input_basename}_{chunk_number}_{outline_slug(titles[chunk_number - 1])}.pdf"
+        else:
+            chunk_name = f"{input_basename}_{chunk_number}.pdf"
+        chunks.append({"chunk": chunk_number, "file": chunk_name, "pages": [start_page + 1, end_page]})
 
     if not os.path.exists(output_folder):
         os.makedirs(output_folder)
+    job = {"input": os.path.abspath(input_pdf_path), "fingerprint": input_fingerprint(input_pdf_path),
+           "output_folder": os.path.abspath(output_folder), "engine": engine, "total_pages": total_pages,
+           "chunks": chunks}
+    queue.create(job)
+    click.echo(f"🗂️  Queued {len(chunks)} chunks in '{queue_path}'")
+    return job
 
-    chunk_number = 1
-    total_chunks = (total_pages + pages_per_chunk - 1) // pages_per_chunk
+def _run_work_queue(queue_path, use_mmap=None, gc_rss_mb=None, gc_alloc_blocks=DEFAULT_GC_ALLOC_BLOCKS,
+                    lease=DEFAULT_LEASE_SECONDS, on_chunk=None):
+    """
+    Claim and write chunks from the work queue at queue_path until none are left.
 
-    # Process chunks with or without progress bar
-    if show_progress:
-        # Create progress bar that tracks each output file being created
-        with click.progressbar(length=total_chunks,
-                             label='Creating PDF files',
-                             show_eta=True,
-                             show_percent=True) as progress_bar:
+    Chunks are written through the job's chunk engine and renamed into place
+    only when complete (see write_checkpointed_chunk); the size and SHA-256
+    of each are recorded in the queue. on_chunk(chunk, pages_added, error)
+    is called after each chunk. Returns (written, failed) counts.
+    """
+    queue = open_work_queue(queue_path)
+    job = queue.load_job()
+    if input_fingerprint(job["input"]) != job["fingerprint"]:
+        raise Exception(f"'{job['input']}' has changed since it was queued; plan the split again")
 
-            for i in range(0, total_pages, pages_per_chunk):
-                try:
-                    # Create a new writer for each chunk to minimize memory usage
-                    writer = PdfWriter()
-
-                    # Add pages to the writer with individual error handling
-                    start_page = i
-                    end_page = min(i + pages_per_chunk, total_pages)
-                    pages_added = 0
-
-                    # Process pages in this chunk
-                    for j in range(start_page, end_page):
-                        try:
-                            # Access page directly without storing reference to minimize memory usage
-                            page = reader.pages[j]
-                            writer.add_page(page)
-                            pages_added += 1
-                        except Exception as e:
-                            click.echo(f"⚠️  Warning: Failed to process page {j + 1}: {str(e)}", err=True)
-                            continue
+    if use_mmap is None:
+        use_mmap = os.path.getsize(job["input"]) / (1024 * 1024) > LARGE_FILE_MB
+    reader, _, _, page_index = probe_pdf(job["input"], use_mmap, queue.page_index_path)
+    chunk_writer = make_chunk_writer(reader, job["engine"], job["input"], page_index=page_index)
+    memory_guard = MemoryGuard(gc_rss_mb, gc_alloc_blocks)
 
-                    if pages_added == 0:
-                        click.echo(f"❌ Skipping chunk {chunk_number}: No pages could be processed", err=True)
-                        chunk_number += 1
-                        progress_bar.update(1)  # Update progress even for skipped chunks
-                        continue
+    written = failed = 0
+    while True:
+        chunk = queue.claim(job["chunks"], lease)
+        if chunk is None:
+            return written, failed
+        first_page, last_page = chunk["pages"]
+        output_filename = os.path.join(job["output_folder"], chunk["file"])
+        pages_added, error = 0, None
+        try:
+            with LeaseHeartbeat(queue, chunk["chunk"], lease):
+                pages_added, warnings, size, sha256 = write_checkpointed_chunk(
+                    chunk_writer, first_page - 1, last_page, output_filename,
+                    keep=functools.partial(queue.holds, chunk["chunk"]))
+            if pages_added == 0:
+                raise Exception("No pages could be processed")
+        except Exception as e:
+            error = str(e)
+            queue.fail(chunk["chunk"], error)
+            failed += 1
+        else:
+            # A worker that lost its claim leaves the chunk to the one that took it over
+            if size is not None and queue.complete(chunk["chunk"], size, sha256):
+                written += 1
+            else:
+                error = "the claim was taken over by another worker"
+        finally:
+            memory_guard.release(reader)
+        if on_chunk is not None:
+            on_chunk(chunk, pages_added, error)
 
-                    # Generate output filename using original basename and sequential number
-                    output_filename = os.path.join(output_folder, f"{input_basename}_{chunk_number}.pdf")
+def _work_in_process(queue_path, use_mmap, gc_rss_mb, gc_alloc_blocks, lease):
+    """Run one --work worker in a pool process, without console output."""
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        return _run_work_queue(queue_path, use_mmap, gc_rss_mb, gc_alloc_blocks, lease)
 
-                    # Write the PDF with error handling
-                    try:
-                        with open(output_filename, "wb") as output_pdf:
-                            writer.write(output_pdf)
-                    except Exception as e:
-                        raise Exception(f"Failed to write chunk {chunk_number} to '{output_filename}': {str(e)}")
+def work(queue_path, jobs=1, show_progress=True, use_mmap=None, gc_rss_mb=None,
+         gc_alloc_blocks=DEFAULT_GC_ALLOC_BLOCKS, lease=DEFAULT_LEASE_SECONDS):
+    """
+    Write chunks from a work queue made by coordinate() until none are left.
 
-                    # Update progress bar after each file is successfully created
-                    progress_bar.update(1)
+    Run it on as many machines as needed; with jobs > 1, that many worker
+    processes claim chunks from the queue here. Workers may start, stop and
+    crash at any time: a chunk a worker claimed but did not finish is
+    claimed again once lease seconds have passed, so rerunning --work after
+    the lease finishes any abandoned chunks.
+
+    Returns the queue's status counts (done, claimed, failed, pending) after
+    this machine's workers have finished.
+    """
+    queue = open_work_queue(queue_path)
+    job = queue.load_job()
+    chunks = job["chunks"]
+    status = queue.status(chunks)
+    click.echo(f"🗂️  Work queue '{queue_path}': {status['done']} of {len(chunks)} chunks done, "
+               f"{status['pending']} pending, {status['claimed']} claimed by workers")
 
+    if jobs > 1:
+        from concurrent.futures import ProcessPoolExecutor, wait
+
+        click.echo(f"⚙️  Starting {jobs} worker processes...")
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(_work_in_process, queue_path, use_mmap, gc_rss_mb, gc_alloc_blocks, lease)
+                       for _ in range(jobs)]
+            with click.progressbar(length=len(chunks), label='Creating PDF files', show_eta=True,
+                                   show_percent=True) if show_progress else contextlib.nullcontext() as progress_bar:
+                reported = status["done"]
+                if progress_bar is not None:
+                    progress_bar.update(reported)
+                while wait(futures, timeout=0.5).not_done:
+                    if progress_bar is not None:
+                        done = queue.status(chunks)["done"]
+                        progress_bar.update(done - reported)
+                        reported = done
+            for future in futures:
+                try:
+                    future.result()
                 except Exception as e:
-                    click.echo(f"❌ Error processing chunk {chunk_number}: {str(e)}", err=True)
-                    # Update progress bar even for failed chunks to keep it moving
+                    click.echo(f"❌ Worker failed: {str(e)}", err=True)
+    else:
+        def report(chunk, pages_added, error):
+            output_filename = os.path.join(job["output_folder"], chunk["file"])
+            if error is not None:
+                click.echo(f"❌ Error processing chunk {chunk['chunk']}: {error}", err=True)
+            elif not show_progress:
+                click.echo(f"✅ Created: {output_filename} ({pages_added} pages)")
+
+        with click.progressbar(length=status["pending"], label='Creating PDF files', show_eta=True,
+                               show_percent=True) if show_progress else contextlib.nullcontext() as progress_bar:
+            def on_chunk(chunk, pages_added, error):
+                report(chunk, pages_added, error)
+                if progress_bar is not None:
                     progress_bar.update(1)
 
-                finally:
-                    # Force garbage collection after each chunk to free memory
-                    gc.collect()
+            _run_work_queue(queue_path, use_mmap, gc_rss_mb, gc_alloc_blocks, lease, on_chunk)
 
-                chunk_number += 1
-    else:
-        # Process without progress bar - show traditional text messages
-        for i in range(0, total_pages, pages_per_chunk):
-            try:
-                click.echo(f"📄 Processing chunk {chunk_number}/{total_chunks} (pages {i+1}-{min(i + pages_per_chunk, total_pages)})...")
-
-                # Create a new writer for each chunk to minimize memory usage
-                writer = PdfWriter()
-
-                # Add pages to the writer with individual error handling
-                start_page = i
-                end_page = min(i + pages_per_chunk, total_pages)
-                pages_added = 0
-
-                # Process pages in this chunk
-                for j in range(start_page, end_page):
-                    try:
-                        # Access page directly without storing reference to minimize memory usage
-                        page = reader.pages[j]
-                        writer.add_page(page)
-                        pages_added += 1
-                    except Exception as e:
-                        click.echo(f"⚠️  Warning: Failed to process page {j + 1}: {str(e)}", err=True)
-                        continue
+    status = queue.status(chunks)
+    click.echo(f"✅ {status['done']} of {len(chunks)} chunks done"
+               + (f", {status['claimed']} still claimed by other workers" if status["claimed"] else "")
+               + (f", {status['failed']} failed {MAX_CHUNK_ATTEMPTS} times" if status["failed"] else ""))
+    return status
 
-                if pages_added == 0:
-                    click.echo(f"❌ Skipping chunk {chunk_number}: No pages could be processed", err=True)
-                    chunk_number += 1
-                    continue
+def _warm_worker():
+    """Run once in each service worker so processes are started before the first request."""
+    return os.getpid()
 
-                # Generate output filename using original basename and sequential number
-                output_filename = os.path.join(output_folder, f"{input_basename}_{chunk_number}.pdf")
+class SplitService:
+    """
+    Long-running split service backed by a pool of warm worker processes.
 
-                # Write the PDF with error handling
-                try:
-                    with open(output_filename, "wb") as output_pdf:
-                        writer.write(output_pdf)
-                    click.echo(f"✅ Created: {output_filename} ({pages_added} pages)")
-                except Exception as e:
-                    raise Exception(f"Failed to write chunk {chunk_number} to '{output_filename}': {str(e)}")
+    Requests are admitted only while fewer than jobs + max_queue splits are
+    running or waiting; beyond that they are rejected immediately so that
+    queueing delay, and with it tail latency, stays bounded.
+    """
 
-            except Exception as e:
-                click.echo(f"❌ Error processing chunk {chunk_number}: {str(e)}", err=True)
-                # Continue with next chunk instead of failing completely
+    def __init__(self, jobs=1, max_queue=16, split_options=None):
+        from concurrent.futures import ProcessPoolExecutor
+
+        self.jobs = jobs
+        self.max_queue = max_queue
+        self.split_options = split_options or {}
+        self.executor = ProcessPoolExecutor(max_workers=jobs)
+        self._slots = threading.BoundedSemaphore(jobs + max_queue)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        # Start every worker now; imports are paid once, not per request
+        for future in [self.executor.submit(_warm_worker) for _ in range(jobs)]:
+            future.result()
+
+    def try_acquire(self):
+        """Reserve a slot for a request; False means the service is saturated."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            return False
+        with self._lock:
+            self.in_flight += 1
+        return True
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+        self._slots.release()
+
+    def split(self, input_pdf_path, pages_per_chunk, output_folder, collect_metrics=False):
+        """Split one file on a worker and return its result (see _split_file_in_worker)."""
+        future = self.executor.submit(_split_file_in_worker, input_pdf_path, pages_per_chunk,
+                                      output_folder, self.split_options, collect_metrics)
+        return future.result()
+
+    def status(self):
+        with self._lock:
+            return {"workers": self.jobs, "max_queue": self.max_queue, "in_flight": self.in_flight,
+                    "completed": self.completed, "rejected": self.rejected}
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+@functools.lru_cache(maxsize=None)
+def _service_classes():
+    """
+    Return the (SplitRequestHandler, _ThreadingUnixHTTPServer) classes.
+
+    http.server pulls in the email and html packages, so the classes are
+    only defined once the split service is started.
+    """
+    import socketserver
+    import tempfile
+    import zipfile
+    from http.server import BaseHTTPRequestHandler
+    from urllib.parse import urlparse, parse_qs
+
+    class SplitRequestHandler(BaseHTTPRequestHandler):
+        """
+        HTTP API of the split service.
+
+        GET  /health                         -> JSON status and queue depth
+        POST /split?pages_per_chunk=N&name=X -> body is a PDF upload; responds with
+                                                a zip of the chunks, streamed
+        POST /split (application/json)       -> {"input": path, "output_folder": path,
+                                                "pages_per_chunk": N}; splits on the
+                                                server's filesystem, responds with JSON
+        """
+
+        server_version = "pdf-splitter"
+        # Bytes read from an upload at a time
+        UPLOAD_BLOCK_SIZE = 1024 * 1024
+
+        def address_string(self):
+            # Unix-domain sockets have no client address
+            return self.client_address[0] if self.client_address else "unix"
+
+        def log_message(self, format, *args):
+            click.echo(f"🌐 {self.address_string()} {format % args}", err=True)
 
+        def send_response(self, code, message=None):
+            self.responded = True
+            super().send_response(code, message)
+
+        def _send_json(self, status, payload, headers=None):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if urlparse(self.path).path == "/health":
+                self._send_json(200, {"status": "ok", **self.server.service.status()})
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            if url.path != "/split":
+                self._send_json(404, {"error": "not found"})
+                return
+
+            service = self.server.service
+            if not service.try_acquire():
+                # Backpressure: refuse rather than queue without bound
+                self._send_json(503, {"error": "service busy, retry later"}, {"Retry-After": "1"})
+                return
+            self.responded = False
+            try:
+                if self.headers.get("Content-Type", "").startswith("application/json"):
+                    self._split_path(service)
+                else:
+                    self._split_upload(service, parse_qs(url.query))
+            except Exception as e:
+                self.log_error("split request failed: %s", str(e))
+                # Once a response has started the client sees the connection close instead
+                if not self.responded:
+                    self._send_json(500, {"error": f"internal error: {str(e)}"})
             finally:
-                # Force garbage collection after each chunk to free memory
-                gc.collect()
+                service.release()
 
-            chunk_number += 1
+        def _split_path(self, service):
+            try:
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                input_pdf_path = request["input"]
+                pages_per_chunk = int(request.get("pages_per_chunk", 5))
+                output_folder = request.get("output_folder", "output_chunks")
+            except (ValueError, KeyError, TypeError) as e:
+                self._send_json(400, {"error": f"invalid request: {str(e)}"})
+                return
+            if pages_per_chunk <= 0 or not os.path.isfile(input_pdf_path):
+                self._send_json(400, {"error": "input must be an existing file and pages_per_chunk positive"})
+                return
 
-    click.echo(f"✅ Successfully created {chunk_number - 1} chunks")
+            result = service.split(input_pdf_path, pages_per_chunk, output_folder)
+            self._send_json(200 if result["status"] == "ok" else 422, result)
+
+        def _split_upload(self, service, query):
+            try:
+                pages_per_chunk = int(query.get("pages_per_chunk", ["5"])[0])
+            except ValueError:
+                self._send_json(400, {"error": "pages_per_chunk must be an integer"})
+                return
+            try:
+                length = int(self.headers["Content-Length"])
+            except (ValueError, KeyError, TypeError):
+                self._send_json(411, {"error": "Content-Length is required"})
+                return
+            name = os.path.splitext(os.path.basename(query.get("name", ["document"])[0]))[0] or "document"
+            if pages_per_chunk <= 0:
+                self._send_json(400, {"error": "pages_per_chunk must be positive"})
+                return
+
+            with tempfile.TemporaryDirectory(prefix="pdf-splitter-") as work_dir:
+                input_pdf_path = os.path.join(work_dir, f"{name}.pdf")
+                with open(input_pdf_path, "wb") as upload:
+                    remaining = length
+                    while remaining > 0:
+                        block = self.rfile.read(min(self.UPLOAD_BLOCK_SIZE, remaining))
+                        if not block:
+                            break
+                        upload.write(block)
+                        remaining -= len(block)
+
+                output_folder = os.path.join(work_dir, "chunks")
+                result = service.split(input_pdf_path, pages_per_chunk, output_folder, collect_metrics=True)
+                if result["status"] != "ok":
+                    self._send_json(422, {"error": result["error"]})
+                    return
+
+                # Chunks in split order, from the split's chunk events; names need
+                # not end in the chunk number (--by-outline)
+                chunk_events = sorted((event for event in result["events"] if event["event"] == "chunk"),
+                                      key=lambda event: event["chunk"])
+                chunk_files = [event["name"] for event in chunk_events]
+                # Stream the zip as it is built; the connection closes when it ends
+                self.send_response(200)
+                self.send_header("Content-Type", "application/zip")
+                self.send_header("Content-Disposition", f'attachment; filename="{name}.zip"')
+                self.send_header("X-Chunk-Count", str(len(chunk_files)))
+                self.end_headers()
+                with zipfile.ZipFile(self.wfile, "w", compression=zipfile.ZIP_STORED) as archive:
+                    for filename in chunk_files:
+                        archive.write(os.path.join(output_folder, filename), filename)
+
+    class _ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+        def server_bind(self):
+            socketserver.UnixStreamServer.server_bind(self)
+            self.server_name, self.server_port = "localhost", 0
+
+    return SplitRequestHandler, _ThreadingUnixHTTPServer
+
+def __getattr__(name):
+    # The service classes are defined on first use (see _service_classes)
+    if name in ("SplitRequestHandler", "_ThreadingUnixHTTPServer"):
+        return _service_classes()[name != "SplitRequestHandler"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def serve(address, jobs=1, max_queue=16, split_options=None):
+    """
+    Run the split service until interrupted.
+
+    address is "HOST:PORT" for TCP or "unix:/path/to.sock" for a
+    Unix-domain socket. See SplitRequestHandler for the API.
+
+    Raises ValueError for a malformed address and OSError when it cannot
+    be bound; the socket is bound before any worker process is started.
+    """
+    from http.server import ThreadingHTTPServer
+
+    SplitRequestHandler, _ThreadingUnixHTTPServer = _service_classes()
+    if address.startswith("unix:"):
+        socket_path = address[len("unix:"):]
+        if not socket_path:
+            raise ValueError("a socket path is required after 'unix:'")
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = _ThreadingUnixHTTPServer(socket_path, SplitRequestHandler)
+    else:
+        host, _, port = address.rpartition(":")
+        if not port.isdigit() or int(port) > 65535:
+            raise ValueError("expected HOST:PORT or unix:/path/to.sock")
+        server = ThreadingHTTPServer((host or "127.0.0.1", int(port)), SplitRequestHandler)
+    try:
+        server.service = SplitService(jobs, max_queue, split_options)
+    except BaseException:
+        server.server_close()
+        raise
+    service = server.service
+
+    click.echo(f"🚀 Serving on {address} with {jobs} workers (queue limit {max_queue})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        click.echo("🛑 Shutting down...")
+    finally:
+        server.server_close()
+        service.shutdown()
+        if address.startswith("unix:") and os.path.exists(address[len("unix:"):]):
+            os.unlink(address[len("unix:"):])
 
 @click.command(name="pdf-splitter")
-@click.argument('input_pdf', type=click.Path(exists=True, dir_okay=False, path_type=str))
+@click.argument('inputs', nargs=-1, type=str)
 @click.option('-p', '--pages-per-chunk', default=5, type=int,
               help='Number of pages per output file (default: 5)')
 @click.option('-o', '--output-folder', default='output_chunks', type=str,
               help='Output folder for split PDF files (default: "output_chunks")')
 @click.option('--no-progress', is_flag=True, default=False,
               help='Disable progress bars (useful for scripting)')
+@click.option('-j', '--jobs', default=1, type=int,
+              help='Number of worker processes writing chunks in parallel (default: 1)')
+@click.option('--gc-rss-mb', default=None, type=int,
+              help='Run a full garbage collection when memory use (RSS) exceeds this many MB')
+@click.option('--gc-alloc-blocks', default=DEFAULT_GC_ALLOC_BLOCKS, type=int,
+              help=f'Run a full garbage collection after this many new allocations; 0 collects after every chunk '
+                   f'(default: {DEFAULT_GC_ALLOC_BLOCKS})')
+@click.option('--engine', default='pypdf', type=click.Choice(CHUNK_ENGINES),
+              help='Chunk writer: "pypdf", "shared" (reuses fonts and images shared between chunks) '
+                   'or "raw" (shared, plus copies streams byte-for-byte from the input) (default: pypdf)')
+@click.option('--mmap/--no-mmap', 'use_mmap', default=None,
+              help=f'Read the input through a memory map instead of loading it into memory '
+                   f'(default: only for files larger than {LARGE_FILE_MB}MB)')
+@click.option('--files-from', default=None, type=click.Path(dir_okay=False, allow_dash=True),
+              help='Read additional input paths from this file, one per line ("-" for stdin)')
+@click.option('--report', 'report_path', default=None, type=click.Path(dir_okay=False, writable=True),
+              help='Write a JSON summary of a batch run to this file')
+@click.option('--serve', 'serve_address', default=None, metavar='ADDRESS',
+              help='Run as a split service on HOST:PORT or unix:/path.sock instead of splitting files')
+@click.option('--max-queue', default=16, type=int,
+              help='Requests allowed to wait for a worker in --serve mode before new ones get 503 (default: 16)')
+@click.option('--archive', 'archive_target', default=None, metavar='FILE',
+              help='Write all chunks into one zip/tar archive instead of the output folder ("-" for stdout)')
+@click.option('--archive-format', default=None, type=click.Choice(ArchiveSink.FORMATS),
+              help='Archive format, or a length-prefixed/multipart stream for pipelines '
+                   '(default: from the --archive extension, tar for stdout)')
+@click.option('--name', 'stdin_name', default='stdin', show_default=True,
+              help='Base name for chunks when the input is read from stdin ("-")')
+@click.option('--resume', is_flag=True, default=False,
+              help='Checkpoint completed chunks in a manifest in the output folder and, if one exists, '
+                   'verify it and write only the missing chunks')
+@click.option('--cache', 'use_cache', is_flag=True, default=False,
+              help='Cache the page index and chunks of each input by content hash so repeat splits skip parsing')
+@click.option('--cache-dir', type=click.Path(file_okay=False), default=None,
+              help='Directory of the split cache (default: ~/.cache/pdf-splitter); implies --cache')
+@click.option('--cache-max-mb', type=int, default=DEFAULT_CACHE_MAX_MB, show_default=True,
+              help='Evict least recently used cache entries beyond this size')
+@click.option('--page-index', 'save_page_index', is_flag=True, default=False,
+              help='Save the page index next to the input (INPUT.pageindex) and reuse it on later runs')
+@click.option('--ranges', 'ranges_spec', default=None,
+              help='Write one file per page range instead of uniform chunks, e.g. "1-10,4000-4010,last-5"')
+@click.option('--ranges-file', default=None, type=click.Path(dir_okay=False, allow_dash=True),
+              help='Read page ranges from a file, one "RANGE [NAME]" per line')
+@click.option('--max-size', 'max_size_mb', type=float, default=None,
+              help='Pack pages into chunks of at most this many MB instead of a fixed page count')
+@click.option('--by-outline', 'outline_level', type=int, is_flag=False, flag_value=1, default=None,
+              metavar='[LEVEL]',
+              help='Start a new chunk at each bookmark nested at most LEVEL deep (default: 1, chapters only)')
+@click.option('--write-behind', default=0, type=int, metavar='N',
+              help='Write chunk files from a background thread, with up to N chunks waiting in memory')
+@click.option('--fsync-every', default=0, type=int, metavar='N',
+              help=f'fsync chunk files and their folder once per N files (batches hold at most {WriteBehind.MAX_OPEN_FILES} open files)')
+@click.option('--backend', default='pypdf', type=click.Choice(SPLIT_BACKENDS), show_default=True,
+              help='What splits the file: pypdf, an external tool (qpdf, pdftk), pikepdf if installed, or auto to pick the fastest for the input')
+@click.option('--coordinate', 'coordinate_queue', default=None, metavar='QUEUE',
+              help='Plan the split into a work queue (a directory, or an SQLite .db file) for --work processes instead of writing it')
+@click.option('--work', 'work_queue', default=None, metavar='QUEUE',
+              help='Write chunks claimed from a work queue made with --coordinate until none are left')
+@click.option('--lease', default=DEFAULT_LEASE_SECONDS, type=int, show_default=True, metavar='SECONDS',
+              help='With --work, claim chunks whose worker has not renewed its claim for this long')
+@click.option('--metrics', 'metrics_format', default=None, type=click.Choice(METRICS_FORMATS),
+              help='Record per-stage timings and per-chunk sizes as JSON lines or a Prometheus textfile')
+@click.option('--metrics-file', default=None, type=click.Path(dir_okay=False, allow_dash=True),
+              help='Where to write --metrics output (JSON lines default to stderr)')
 @click.help_option('-h', '--help')
-def main(input_pdf, pages_per_chunk, output_folder, no_progress):
+def main(inputs, pages_per_chunk, output_folder, no_progress, jobs, gc_rss_mb, gc_alloc_blocks, engine, use_mmap,
+         files_from, report_path, serve_address, max_queue, archive_target, archive_format, stdin_name, resume,
+         use_cache, cache_dir, cache_max_mb, save_page_index, ranges_spec, ranges_file, max_size_mb,
+         outline_level, write_behind, fsync_every, backend, coordinate_queue, work_queue, lease,
+         metrics_format, metrics_file):
     """
     Split a PDF file into multiple smaller PDF files with sequential numbering.
 
     OUTPUT FILES: Files will be named using the pattern {original_basename}_{number}.pdf
 
+    BATCH MODE: With several inputs, a directory, a glob or --files-from, every
+    PDF found is split by a shared pool of --jobs worker processes into
+    {output_folder}/{original_basename}/.
+
     Examples:
     \b
       pdf-splitter document.pdf                    # Split every 5 pages (default)
@@ -401,6 +4314,25 @@ def main(input_pdf, pages_per_chunk, output_folder, no_progress):
       pdf-splitter document.pdf -p 3 -o my_output # Split every 3 pages, output to 'my_output' folder
       pdf-splitter /path/to/report.pdf -p 1       # Split into individual pages
       pdf-splitter document.pdf --no-progress     # Disable progress bars (useful for scripting)
+      pdf-splitter document.pdf -p 1 -j 8         # Write chunks with 8 worker processes
+      pdf-splitter catalog.pdf --engine shared    # Serialize shared fonts/images once
+      pdf-splitter scans.pdf --engine raw         # Copy image streams without re-parsing
+      pdf-splitter inbox/ -j 8 --report run.json  # Split every PDF under inbox/ with 8 workers
+      find . -name '*.pdf' | pdf-splitter --files-from -
+      pdf-splitter --serve 127.0.0.1:8765 -j 4    # Run as an HTTP split service
+      pdf-splitter document.pdf --archive out.zip # Write all chunks into one zip file
+      pdf-splitter document.pdf --archive - | tar t  # Stream a tar archive to stdout
+      curl -s URL | pdf-splitter - --archive - --archive-format multipart | upload-tool
+      pdf-splitter huge.pdf -p 1 --resume         # Rerun after a crash to finish the missing chunks
+      pdf-splitter huge.pdf -p 10 --cache         # Repeat splits of the same file skip parsing
+      pdf-splitter huge.pdf --ranges 1-10,last-5  # One file per page range
+      pdf-splitter scan.pdf --max-size 10         # Chunks of at most 10MB for email
+      pdf-splitter manual.pdf --by-outline 2      # One file per chapter and section
+      pdf-splitter huge.pdf --metrics json        # Per-stage timings as JSON lines on stderr
+      pdf-splitter huge.pdf -o /mnt/nfs --write-behind 2  # Build chunks while earlier ones are written
+      pdf-splitter huge.pdf -p 10 --backend auto  # Use qpdf, pdftk or pikepdf when faster than pypdf
+      pdf-splitter huge.pdf -o /shared/out --coordinate /shared/huge.queue  # Plan a distributed split
+      pdf-splitter --work /shared/huge.queue -j 8  # Run on every node until all chunks are written
 
     \b
     Output file naming:
@@ -415,28 +4347,269 @@ def main(input_pdf, pages_per_chunk, output_folder, no_progress):
       - Use --no-progress to disable for automated scripts
     """
 
-    # Validate input file is a PDF
-    if not input_pdf.lower().endswith('.pdf'):
-        click.echo(f"Error: Input file '{input_pdf}' is not a PDF file.", err=True)
-        sys.exit(1)
+    import glob
+
+    batch_mode = False
+    from_stdin = inputs == ('-',)
+
+    # Distributed workers read everything else from the work queue
+    if work_queue is not None:
+        if inputs or files_from is not None or serve_address is not None or coordinate_queue is not None:
+            click.echo("Error: --work takes no inputs and cannot be combined with --serve or --coordinate.",
+                       err=True)
+            sys.exit(1)
+        if jobs <= 0 or lease <= 0:
+            click.echo("Error: Jobs and --lease must be positive integers.", err=True)
+            sys.exit(1)
+        try:
+            status = work(work_queue, jobs, show_progress=not no_progress, use_mmap=use_mmap,
+                          gc_rss_mb=gc_rss_mb, gc_alloc_blocks=gc_alloc_blocks, lease=lease)
+        except Exception as e:
+            click.echo(f"Error: {e}", err=True)
+            sys.exit(1)
+        if status["failed"]:
+            sys.exit(1)
+        return
+
+    # Inputs are given per request in --serve mode
+    if serve_address is None:
+        if not inputs and files_from is None:
+            click.echo("Error: Missing argument 'INPUTS...'.", err=True)
+            sys.exit(1)
+
+        batch_mode = (len(inputs) != 1 or files_from is not None
+                      or os.path.isdir(inputs[0]) or glob.has_magic(inputs[0]))
+        if '-' in inputs and (batch_mode or files_from == '-'):
+            click.echo("Error: '-' (stdin) can only be used as the single input.", err=True)
+            sys.exit(1)
+
+    if serve_address is None and not batch_mode and not from_stdin:
+        input_pdf = inputs[0]
+
+        # Validate input file exists
+        if not os.path.isfile(input_pdf):
+            click.echo(f"Error: Input file '{input_pdf}' does not exist.", err=True)
+            sys.exit(1)
+
+        # Validate input file is a PDF
+        if not input_pdf.lower().endswith('.pdf'):
+            click.echo(f"Error: Input file '{input_pdf}' is not a PDF file.", err=True)
+            sys.exit(1)
 
     # Validate pages per chunk is positive
     if pages_per_chunk <= 0:
         click.echo(f"Error: Pages per chunk must be a positive integer, got {pages_per_chunk}.", err=True)
         sys.exit(1)
 
-    try:
-        click.echo(f"Splitting '{input_pdf}' into chunks of {pages_per_chunk} pages...")
-        click.echo(f"Output folder: '{output_folder}'")
+    # Validate size limit is positive
+    if max_size_mb is not None and max_size_mb <= 0:
+        click.echo(f"Error: Max size must be a positive number of MB, got {max_size_mb:g}.", err=True)
+        sys.exit(1)
 
-        split_pdf_by_chunks(input_pdf, pages_per_chunk, output_folder, show_progress=not no_progress)
+    # Validate outline level is positive
+    if outline_level is not None and outline_level <= 0:
+        click.echo(f"Error: Outline level must be a positive integer, got {outline_level}.", err=True)
+        sys.exit(1)
+    if outline_level is not None and max_size_mb is not None:
+        click.echo("Error: Use either --by-outline or --max-size, not both.", err=True)
+        sys.exit(1)
 
-        click.echo(click.style("PDF splitting completed successfully!", fg='green', bold=True))
+    # Validate number of jobs is positive
+    if jobs <= 0:
+        click.echo(f"Error: Jobs must be a positive integer, got {jobs}.", err=True)
+        sys.exit(1)
 
-    except Exception as e:
-        click.echo(f"Error: Failed to split PDF: {e}", err=True)
+    # Validate memory thresholds are not negative
+    if (gc_rss_mb is not None and gc_rss_mb < 0) or gc_alloc_blocks < 0:
+        click.echo("Error: Memory thresholds must not be negative.", err=True)
+        sys.exit(1)
+
+    # Validate write-behind settings are not negative
+    if write_behind < 0 or fsync_every < 0:
+        click.echo("Error: --write-behind and --fsync-every must not be negative.", err=True)
+        sys.exit(1)
+
+    # Validate cache size is not negative
+    if cache_max_mb < 0:
+        click.echo(f"Error: Cache size must not be negative, got {cache_max_mb}.", err=True)
+        sys.exit(1)
+    if use_cache and cache_dir is None:
+        cache_dir = default_cache_dir()
+
+    if resume and (archive_target is not None or serve_address is not None):
+        click.echo("Error: --resume cannot be combined with --archive or --serve.", err=True)
+        sys.exit(1)
+
+    if backend not in ("auto", "pypdf"):
+        if not BACKENDS[backend].available():
+            click.echo(f"Error: The {backend} backend is not installed.", err=True)
+            sys.exit(1)
+        if (ranges_spec is not None or ranges_file is not None or resume or cache_dir is not None
+                or save_page_index or max_size_mb is not None or outline_level is not None
+                or engine != "pypdf" or use_mmap or write_behind or fsync_every):
+            click.echo(f"Error: --backend {backend} only splits by page count; --ranges, --max-size, "
+                       f"--by-outline, --resume, --cache, --page-index, --engine, --mmap, --write-behind "
+                       f"and --fsync-every need --backend pypdf.", err=True)
+            sys.exit(1)
+
+    if coordinate_queue is not None and (batch_mode or from_stdin or serve_address is not None
+                                         or archive_target is not None or resume or cache_dir is not None
+                                         or ranges_spec is not None or ranges_file is not None
+                                         or backend not in ("auto", "pypdf")):
+        click.echo("Error: --coordinate plans the split of a single file into a folder; it cannot be combined "
+                   "with batch mode, stdin, --serve, --archive, --resume, --cache, --ranges or other backends.",
+                   err=True)
+        sys.exit(1)
+
+    if metrics_format is not None and (serve_address is not None or coordinate_queue is not None):
+        click.echo("Error: --metrics cannot be combined with --serve or --coordinate.", err=True)
+        sys.exit(1)
+    if metrics_format == "prometheus" and metrics_file in (None, "-"):
+        click.echo("Error: --metrics prometheus needs a --metrics-file to write the textfile to.", err=True)
+        sys.exit(1)
+
+    split_options = {"gc_rss_mb": gc_rss_mb, "gc_alloc_blocks": gc_alloc_blocks,
+                     "engine": engine, "use_mmap": use_mmap, "resume": resume,
+                     "cache_dir": cache_dir, "cache_max_mb": cache_max_mb,
+                     "save_page_index": save_page_index, "max_size_mb": max_size_mb,
+                     "outline_level": outline_level, "write_behind": write_behind,
+                     "fsync_every": fsync_every, "backend": backend}
+
+    if serve_address is not None:
+        # Validate queue limit is not negative
+        if max_queue < 0:
+            click.echo(f"Error: Max queue must not be negative, got {max_queue}.", err=True)
+            sys.exit(1)
+        try:
+            serve(serve_address, jobs, max_queue, split_options)
+        except (ValueError, OSError) as e:
+            click.echo(f"Error: Cannot serve on '{serve_address}': {e}", err=True)
+            sys.exit(1)
+        return
+
+    if coordinate_queue is not None:
+        try:
+            coordinate(inputs[0], coordinate_queue, pages_per_chunk, output_folder, engine, use_mmap,
+                       max_size_mb, outline_level, gc_rss_mb, gc_alloc_blocks)
+        except Exception as e:
+            click.echo(f"Error: Failed to plan the split: {e}", err=True)
+            sys.exit(1)
+        click.echo(f"Start workers with: pdf-splitter --work {coordinate_queue}")
+        return
+
+    if archive_target is not None and (batch_mode or serve_address is not None):
+        click.echo("Error: --archive can only be used when splitting a single file.", err=True)
         sys.exit(1)
 
+    ranges = None
+    if ranges_spec is not None or ranges_file is not None:
+        if ranges_spec is not None and ranges_file is not None:
+            click.echo("Error: Use either --ranges or --ranges-file, not both.", err=True)
+            sys.exit(1)
+        if batch_mode or resume or cache_dir is not None:
+            click.echo("Error: Page ranges can only be extracted from a single file, "
+                       "without --resume or --cache.", err=True)
+            sys.exit(1)
+        if ranges_file == "-" and from_stdin:
+            click.echo("Error: --ranges-file - cannot be used when the PDF is read from stdin.", err=True)
+            sys.exit(1)
+        try:
+            ranges = parse_page_ranges(ranges_spec) if ranges_spec is not None else read_ranges_file(ranges_file)
+        except (OSError, ValueError) as e:
+            click.echo(f"Error: {e}", err=True)
+            sys.exit(1)
+        if not ranges:
+            click.echo("Error: No page ranges given.", err=True)
+            sys.exit(1)
+
+    metrics = None
+    if metrics_format is not None:
+        try:
+            metrics_sink = (JsonLinesMetricsSink(metrics_file or "-") if metrics_format == "json"
+                            else PrometheusTextfileSink(metrics_file))
+        except OSError as e:
+            click.echo(f"Error: Cannot open metrics file '{metrics_file}': {e}", err=True)
+            sys.exit(1)
+        metrics = SplitMetrics([metrics_sink])
+
+        def close_metrics():
+            try:
+                metrics_sink.close()
+            except OSError as e:
+                click.echo(f"Error: Cannot write metrics file '{metrics_file}': {e}", err=True)
+
+        # Also runs when the command exits through sys.exit()
+        click.get_current_context().call_on_close(close_metrics)
+
+    if batch_mode:
+        input_pdfs, unmatched = collect_input_pdfs(inputs, files_from)
+        for candidate in unmatched:
+            click.echo(f"⚠️  No PDF files found for '{candidate}'", err=True)
+        if not input_pdfs:
+            click.echo("Error: No PDF files to split.", err=True)
+            sys.exit(1)
+
+        click.echo(f"Splitting {len(input_pdfs)} files into chunks of {pages_per_chunk} pages...")
+        click.echo(f"Output folder: '{output_folder}'")
+        results = split_batch(input_pdfs, pages_per_chunk, output_folder, show_progress=not no_progress,
+                              jobs=jobs, report_path=report_path, metrics=metrics, **split_options)
+        if any(result["status"] != "ok" for result in results):
+            sys.exit(1)
+        click.echo(click.style("PDF splitting completed successfully!", fg='green', bold=True))
+        return
+
+    archive = None
+    if archive_target is not None:
+        # Opened before stdout is redirected so "-" still means the real stdout
+        try:
+            archive = ArchiveSink(archive_target, archive_format)
+        except OSError as e:
+            click.echo(f"Error: Cannot open archive '{archive_target}': {e}", err=True)
+            sys.exit(1)
+
+    # When the archive goes to stdout, all messages go to stderr instead
+    with contextlib.redirect_stdout(sys.stderr) if archive_target == "-" else contextlib.nullcontext(), \
+            stdin_pdf_path() if from_stdin else contextlib.nullcontext(inputs[0]) as input_pdf:
+        try:
+            if ranges is not None:
+                click.echo(f"Extracting {len(ranges)} page ranges from '{'stdin' if from_stdin else input_pdf}'...")
+            else:
+                if outline_level is not None:
+                    chunk_limit = f"outline sections (level {outline_level})"
+                elif max_size_mb is not None:
+                    chunk_limit = f"chunks of {max_size_mb:g}MB"
+                else:
+                    chunk_limit = f"chunks of {pages_per_chunk} pages"
+                click.echo(f"Splitting '{'stdin' if from_stdin else input_pdf}' into {chunk_limit}...")
+            if archive is not None:
+                click.echo(f"Archive: '{archive_target}' ({archive.format})")
+            else:
+                click.echo(f"Output folder: '{output_folder}'")
+
+            with metrics.record('-' if from_stdin else input_pdf) if metrics is not None \
+                    else contextlib.nullcontext():
+                if ranges is not None:
+                    extract_page_ranges(input_pdf, ranges, output_folder, show_progress=not no_progress,
+                                        gc_rss_mb=gc_rss_mb, gc_alloc_blocks=gc_alloc_blocks, engine=engine,
+                                        use_mmap=use_mmap, archive=archive,
+                                        output_basename=stdin_name if from_stdin else None, metrics=metrics)
+                else:
+                    split_pdf_by_chunks(input_pdf, pages_per_chunk, output_folder, show_progress=not no_progress,
+                                        jobs=jobs, archive=archive,
+                                        output_basename=stdin_name if from_stdin else None,
+                                        metrics=metrics, **split_options)
+            if archive is not None:
+                archive.close()
+
+            click.echo(click.style("PDF splitting completed successfully!", fg='green', bold=True))
+
+        except Exception as e:
+            click.echo(f"Error: Failed to split PDF: {e}", err=True)
+            sys.exit(1)
+
 
 if __name__ == "__main__":
+    # Required for the --jobs process pool in frozen (PyInstaller) executables
+    import multiprocessing
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -0,0 +1,63 @@
+import os
+
+import pytest
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+import main
+
+PAGES = 23
+
+
+def make_pdf(path, pages=PAGES, outline=()):
+    """Write a PDF whose pages say "Page <n>" in one shared font; outline is (title, page index) pairs."""
+    writer = PdfWriter()
+    font = writer._add_object(DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica"),
+    }))
+    for n in range(1, pages + 1):
+        page = writer.add_blank_page(612, 792)
+        page[NameObject("/Resources")] = DictionaryObject({
+            NameObject("/Font"): DictionaryObject({NameObject("/F1"): font}),
+        })
+        contents = DecodedStreamObject()
+        contents.set_data(f"BT /F1 24 Tf 72 720 Td (Page {n}) Tj ET".encode())
+        page[NameObject("/Contents")] = writer._add_object(contents)
+    for title, page_index in outline:
+        writer.add_outline_item(title, page_index)
+    with open(path, "wb") as output:
+        writer.write(output)
+    return str(path)
+
+
+def page_labels(source):
+    """The "Page <n>" numbers of a chunk, given as a path or bytes."""
+    import io
+    reader = PdfReader(io.BytesIO(source) if isinstance(source, bytes) else source)
+    return [int(page.extract_text().split()[-1]) for page in reader.pages]
+
+
+def read_folder(folder):
+    """Map each PDF in folder to its bytes."""
+    return {name: open(os.path.join(folder, name), "rb").read()
+            for name in os.listdir(folder) if name.endswith(".pdf")}
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    return make_pdf(tmp_path / "doc.pdf")
+
+
+@pytest.fixture
+def outline_pdf(tmp_path):
+    return make_pdf(tmp_path / "book.pdf", outline=[("Intro", 0), ("Chapter 2", 8), ("Appendix", 17)])
+
+
+@pytest.fixture
+def serial_chunks(pdf, tmp_path):
+    """The chunks of a serial 4-page split of pdf, as {name: bytes}."""
+    folder = tmp_path / "serial"
+    main.split_pdf_by_chunks(pdf, 4, str(folder), show_progress=False)
+    return read_folder(folder)
@@ -0,0 +1,53 @@
+import email
+import io
+import struct
+import tarfile
+import zipfile
+
+import pytest
+
+import main
+
+
+def read_members(path, archive_format):
+    """Return the (name, bytes) members of an ArchiveSink output, in order."""
+    with open(path, "rb") as archive_file:
+        data = archive_file.read()
+    if archive_format == "zip":
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            return [(name, archive.read(name)) for name in archive.namelist()]
+    if archive_format in ("tar", "tar.gz"):
+        with tarfile.open(fileobj=io.BytesIO(data)) as archive:
+            return [(member.name, archive.extractfile(member).read()) for member in archive.getmembers()]
+    if archive_format == "length-prefixed":
+        members, offset = [], 0
+        while offset < len(data):
+            (name_length,) = struct.unpack_from(">I", data, offset)
+            name = data[offset + 4:offset + 4 + name_length].decode("utf-8")
+            offset += 4 + name_length
+            (size,) = struct.unpack_from(">Q", data, offset)
+            offset += 8
+            members.append((name, data[offset:offset + size]))
+            offset += size
+        return members
+    message = email.message_from_bytes(data)
+    return [(part.get_filename(), part.get_payload(decode=True)) for part in message.get_payload()]
+
+
+@pytest.mark.parametrize("archive_format", main.ArchiveSink.FORMATS)
+@pytest.mark.parametrize("jobs", [1, 3])
+def test_archive_holds_the_chunks_in_order(pdf, tmp_path, serial_chunks, archive_format, jobs):
+    target = str(tmp_path / "chunks.out")
+    archive = main.ArchiveSink(target, archive_format)
+    main.split_pdf_by_chunks(pdf, 4, None, show_progress=False, jobs=jobs, archive=archive)
+    archive.close()
+
+    members = read_members(target, archive_format)
+    assert [name for name, _ in members] == [f"doc_{n}.pdf" for n in range(1, 7)]
+    assert dict(members) == serial_chunks
+
+
+def test_archive_format_is_guessed_from_the_extension():
+    assert main.ArchiveSink.guess_format("out.zip") == "zip"
+    assert main.ArchiveSink.guess_format("out.tgz") == "tar.gz"
+    assert main.ArchiveSink.guess_format("-") == "tar"
@@ -0,0 +1,32 @@
+import os
+import stat
+
+import main
+
+
+def test_split_emits_chunk_and_summary_events(pdf, tmp_path):
+    events = []
+    metrics = main.SplitMetrics([events.append])
+    with metrics.record(pdf):
+        main.split_pdf_by_chunks(pdf, 4, str(tmp_path / "out"), show_progress=False, metrics=metrics)
+
+    chunks = [event for event in events if event["event"] == "chunk"]
+    assert [event["name"] for event in chunks] == [f"doc_{n}.pdf" for n in range(1, 7)]
+    summary = events[-1]
+    assert summary["event"] == "summary"
+    assert summary["status"] == "ok" and summary["chunks"] == 6 and summary["pages"] == 23
+
+
+def test_prometheus_textfile_is_readable_by_other_users(pdf, tmp_path):
+    target = str(tmp_path / "pdf_splitter.prom")
+    sink = main.PrometheusTextfileSink(target)
+    metrics = main.SplitMetrics([sink])
+    with metrics.record(pdf):
+        main.split_pdf_by_chunks(pdf, 4, str(tmp_path / "out"), show_progress=False, metrics=metrics)
+    sink.close()
+
+    assert stat.S_IMODE(os.stat(target).st_mode) == 0o644
+    with open(target) as textfile:
+        assert "pdf_splitter_" in textfile.read()
+    assert os.listdir(tmp_path / "out")
+    assert [name for name in os.listdir(tmp_path) if name.endswith(".prom")] == ["pdf_splitter.prom"]
@@ -0,0 +1,100 @@
+import contextlib
+import io
+import json
+import threading
+import urllib.error
+import urllib.request
+import zipfile
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import main
+
+
+@contextlib.contextmanager
+def running_server(service):
+    """Serve SplitRequestHandler with service on a free local port; yields the base URL."""
+    handler, _ = main._service_classes()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.service = service
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+@pytest.fixture
+def service_url(request):
+    service = main.SplitService(jobs=1, max_queue=2, split_options=getattr(request, "param", None))
+    try:
+        with running_server(service) as url:
+            yield url
+    finally:
+        service.shutdown()
+
+
+def post(url, data, content_type="application/pdf"):
+    """POST data; returns (status, headers, body) whether or not the request failed."""
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": content_type})
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+def test_upload_returns_the_chunks_as_a_zip(service_url, pdf, serial_chunks):
+    with open(pdf, "rb") as upload:
+        status, headers, body = post(f"{service_url}/split?pages_per_chunk=4&name=doc", upload.read())
+    assert status == 200
+    assert headers["X-Chunk-Count"] == "6"
+    with zipfile.ZipFile(io.BytesIO(body)) as archive:
+        assert archive.namelist() == [f"doc_{n}.pdf" for n in range(1, 7)]
+        assert {name: archive.read(name) for name in archive.namelist()} == serial_chunks
+
+
+@pytest.mark.parametrize("service_url", [{"outline_level": 1}], indirect=True)
+def test_upload_split_by_outline_keeps_chunk_order(service_url, outline_pdf):
+    with open(outline_pdf, "rb") as upload:
+        status, _, body = post(f"{service_url}/split?name=book", upload.read())
+    assert status == 200
+    with zipfile.ZipFile(io.BytesIO(body)) as archive:
+        assert archive.namelist() == ["book_1_Intro.pdf", "book_2_Chapter_2.pdf", "book_3_Appendix.pdf"]
+
+
+def test_bad_pages_per_chunk_is_a_bad_request(service_url, pdf):
+    status, _, body = post(f"{service_url}/split?pages_per_chunk=many", b"%PDF-1.7")
+    assert status == 400
+    assert "pages_per_chunk" in json.loads(body)["error"]
+
+
+def test_unreadable_upload_is_unprocessable(service_url):
+    status, _, body = post(f"{service_url}/split", b"not a pdf")
+    assert status == 422
+
+
+def test_handler_errors_are_answered_with_500():
+    class FailingService:
+        def try_acquire(self):
+            return True
+
+        def release(self):
+            pass
+
+        def split(self, *args, **kwargs):
+            raise RuntimeError("worker pool is gone")
+
+    with running_server(FailingService()) as url:
+        status, _, body = post(f"{url}/split", b"%PDF-1.7")
+    assert status == 500
+    assert "worker pool is gone" in json.loads(body)["error"]
+
+
+def test_serve_rejects_a_malformed_address():
+    with pytest.raises(ValueError):
+        main.serve("localhost:http")
@@ -0,0 +1,103 @@
+import os
+
+import pytest
+from click.testing import CliRunner
+
+import main
+from conftest import PAGES, make_pdf, page_labels, read_folder
+
+
+def test_chunks_hold_consecutive_pages(serial_chunks):
+    assert sorted(serial_chunks) == sorted(f"doc_{n}.pdf" for n in range(1, 7))
+    assert page_labels(serial_chunks["doc_1.pdf"]) == [1, 2, 3, 4]
+    assert page_labels(serial_chunks["doc_6.pdf"]) == [21, 22, 23]
+
+
+@pytest.mark.parametrize("engine", main.CHUNK_ENGINES)
+def test_parallel_output_matches_serial(pdf, tmp_path, engine):
+    main.split_pdf_by_chunks(pdf, 4, str(tmp_path / "serial"), show_progress=False, engine=engine)
+    main.split_pdf_by_chunks(pdf, 4, str(tmp_path / "parallel"), show_progress=False, engine=engine, jobs=3)
+    assert read_folder(tmp_path / "parallel") == read_folder(tmp_path / "serial")
+
+
+def test_ranges_write_one_file_per_range(pdf, tmp_path):
+    output_folder = tmp_path / "ranges"
+    result = CliRunner().invoke(main.main, [pdf, "--ranges", "2-4,last-2", "-o", str(output_folder), "--no-progress"])
+    assert result.exit_code == 0, result.output
+    chunks = read_folder(output_folder)
+    assert sorted(chunks) == ["doc_2-4.pdf", "doc_22-23.pdf"]
+    assert page_labels(chunks["doc_2-4.pdf"]) == [2, 3, 4]
+    assert page_labels(chunks["doc_22-23.pdf"]) == [22, 23]
+
+
+def test_out_of_range_fails_without_indexing_every_page(pdf, tmp_path, monkeypatch):
+    def load_page_index(*args, **kwargs):
+        raise AssertionError("the whole page tree was indexed")
+
+    monkeypatch.setattr(main, "load_page_index", load_page_index)
+    with pytest.raises(main.PageRangeError):
+        main.extract_page_ranges(pdf, main.parse_page_ranges("1-999"), str(tmp_path / "out"), show_progress=False)
+
+
+def test_max_size_splits_by_estimated_size(pdf, tmp_path):
+    sizes = {}
+    for max_size_mb in (0.002, 0.004):
+        output_folder = tmp_path / str(max_size_mb)
+        main.split_pdf_by_chunks(pdf, 5, str(output_folder), show_progress=False, max_size_mb=max_size_mb)
+        chunks = read_folder(output_folder)
+        labels = [page_labels(chunks[f"doc_{n}.pdf"]) for n in range(1, len(chunks) + 1)]
+        assert [label for chunk in labels for label in chunk] == list(range(1, PAGES + 1))
+        sizes[max_size_mb] = len(chunks)
+    assert sizes[0.002] > sizes[0.004] > 1
+
+
+def test_resume_rewrites_only_missing_or_damaged_chunks(pdf, tmp_path, serial_chunks):
+    output_folder = tmp_path / "resumed"
+    main.split_pdf_by_chunks(pdf, 4, str(output_folder), show_progress=False, resume=True)
+    assert read_folder(output_folder) == serial_chunks
+    assert os.path.exists(output_folder / "doc.manifest.jsonl")
+
+    os.remove(output_folder / "doc_2.pdf")
+    with open(output_folder / "doc_3.pdf", "r+b") as damaged:
+        damaged.truncate(100)
+    os.utime(output_folder / "doc_1.pdf", ns=(0, 0))
+
+    main.split_pdf_by_chunks(pdf, 4, str(output_folder), show_progress=False, resume=True)
+    assert read_folder(output_folder) == serial_chunks
+    assert os.stat(output_folder / "doc_1.pdf").st_mtime_ns == 0
+    assert not [name for name in os.listdir(output_folder) if name.endswith(".part")]
+
+
+def test_resume_refuses_a_different_chunk_size(pdf, tmp_path):
+    output_folder = str(tmp_path / "resumed")
+    main.split_pdf_by_chunks(pdf, 4, output_folder, show_progress=False, resume=True)
+    with pytest.raises(Exception, match="manifest"):
+        main.split_pdf_by_chunks(pdf, 5, output_folder, show_progress=False, resume=True)
+
+
+def test_trailing_junk_after_eof_is_not_damage(pdf, tmp_path):
+    junk_path = tmp_path / "junk.pdf"
+    with open(pdf, "rb") as source:
+        junk_path.write_bytes(source.read() + b"\0junk" * 2000)
+    assert main.inspect_pdf_bytes(str(junk_path)) == []
+
+    truncated_path = tmp_path / "truncated.pdf"
+    truncated_path.write_bytes(junk_path.read_bytes()[:1000])
+    assert "truncated" in main.inspect_pdf_bytes(str(truncated_path))
+
+
+def test_bad_option_combination_is_an_option_error(pdf, tmp_path):
+    with pytest.raises(main.OptionError):
+        main.split_pdf_by_chunks(pdf, 4, str(tmp_path / "out"), show_progress=False, backend="qpdf", resume=True)
+
+
+def test_batch_folders_do_not_depend_on_other_inputs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("a")
+    os.makedirs("b")
+    first = make_pdf(os.path.join("a", "text.pdf"), pages=3)
+    second = make_pdf(os.path.join("b", "text.pdf"), pages=3)
+    alone = main._batch_output_folders([second], "out")
+    together = main._batch_output_folders([first, second], "out")
+    assert alone[second] == together[second] == os.path.join("out", "b", "text")
+    assert together[first] == os.path.join("out", "a", "text")
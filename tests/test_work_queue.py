@@ -0,0 +1,73 @@
+import os
+
+import pytest
+
+import main
+from conftest import read_folder
+
+QUEUE_NAMES = ["queue", "queue.db"]
+
+
+@pytest.fixture(params=QUEUE_NAMES)
+def queue_path(request, tmp_path):
+    return str(tmp_path / request.param)
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_workers_write_the_planned_chunks(pdf, tmp_path, serial_chunks, queue_path, jobs):
+    output_folder = tmp_path / "queued"
+    job = main.coordinate(pdf, queue_path, 4, str(output_folder))
+    assert len(job["chunks"]) == 6
+
+    status = main.work(queue_path, jobs=jobs, show_progress=False)
+    assert status == {"done": 6, "claimed": 0, "failed": 0, "pending": 0}
+    assert read_folder(output_folder) == serial_chunks
+    assert not [name for name in os.listdir(output_folder) if name.endswith(".part")]
+
+
+def test_coordinate_refuses_an_existing_queue(pdf, tmp_path, queue_path):
+    main.coordinate(pdf, queue_path, 4, str(tmp_path / "queued"))
+    with pytest.raises(Exception, match="already exists"):
+        main.coordinate(pdf, queue_path, 4, str(tmp_path / "queued"))
+
+
+def test_only_the_claim_holder_completes_a_chunk(pdf, tmp_path, queue_path):
+    chunks = main.coordinate(pdf, queue_path, 4, str(tmp_path / "queued"))["chunks"]
+    first = main.open_work_queue(queue_path, "worker-1")
+    second = main.open_work_queue(queue_path, "worker-2")
+
+    chunk = first.claim(chunks)
+    assert first.holds(chunk["chunk"]) and not second.holds(chunk["chunk"])
+    assert first.renew(chunk["chunk"])
+    assert not second.renew(chunk["chunk"])
+    # A renewed claim is not taken over, so the second worker gets the next chunk
+    assert second.claim(chunks, lease=3600)["chunk"] != chunk["chunk"]
+
+    assert not second.complete(chunk["chunk"], 1, "0" * 64)
+    assert first.complete(chunk["chunk"], 1, "0" * 64)
+    assert first.status(chunks)["done"] == 1
+
+
+def test_an_expired_claim_is_taken_over(pdf, tmp_path, queue_path):
+    chunks = main.coordinate(pdf, queue_path, 4, str(tmp_path / "queued"))["chunks"]
+    first = main.open_work_queue(queue_path, "worker-1")
+    second = main.open_work_queue(queue_path, "worker-2")
+
+    chunk = first.claim(chunks)
+    assert second.claim(chunks, lease=0)["chunk"] == chunk["chunk"]
+    assert not first.holds(chunk["chunk"])
+    assert not first.complete(chunk["chunk"], 1, "0" * 64)
+    assert second.complete(chunk["chunk"], 1, "0" * 64)
+
+
+def test_lost_claim_discards_the_written_chunk(tmp_path):
+    output_filename = str(tmp_path / "chunk.pdf")
+
+    def chunk_writer(start_page, end_page, output):
+        output.write(b"%PDF-1.7 stand-in")
+        return end_page - start_page, []
+
+    pages_added, _, size, sha256 = main.write_checkpointed_chunk(chunk_writer, 0, 2, output_filename,
+                                                                 keep=lambda: False)
+    assert pages_added == 2 and size is None and sha256 is None
+    assert os.listdir(tmp_path) == []